@@ -4,12 +4,9 @@ Bootcamp F2025
 Main process to setup and manage all the other working processes
 """
 
-import multiprocessing as mp
-import queue
+import pathlib
 import time
 
-from pymavlink import mavutil
-
 from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
@@ -17,10 +14,13 @@ from modules.command import command
 from modules.command import command_worker
 from modules.heartbeat import heartbeat_receiver_worker
 from modules.heartbeat import heartbeat_sender_worker
+from modules.mavlink_hub import mavlink_hub
+from modules.mavlink_hub import mavlink_hub_worker
+from modules.mavlink_hub import send_scheduler
+from modules.telemetry import telemetry_history
 from modules.telemetry import telemetry_worker
-from utilities.workers import queue_proxy_wrapper
-from utilities.workers import worker_controller
-from utilities.workers import worker_manager
+from utilities.workers import pipeline_builder
+from utilities.workers import queue_wait
 
 
 # MAVLink connection
@@ -29,19 +29,26 @@ CONNECTION_STRING = "tcp:localhost:12345"
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
-# Set queue max sizes (<= 0 for infinity)
-HEARTBEAT_QUEUE_MAX_SIZE = 10
-TELEMETRY_QUEUE_MAX_SIZE = 10
-COMMAND_QUEUE_MAX_SIZE = 10
+# Queues, worker counts, backends and runtime profiles of each stage
+PIPELINE_CONFIG_FILE_PATH = pathlib.Path("pipeline.yaml")
+
+# Sends per second and burst size of each priority class, heartbeats are never limited
+# so that a burst of commands cannot delay them past the drone's timeout
+SEND_RATE_LIMITS = {
+    send_scheduler.SAFETY: (20.0, 5),
+    send_scheduler.ROUTINE: (10.0, 5),
+}
 
-# Set worker counts
-HEARTBEAT_SENDER_WORKER_COUNT = 1
-HEARTBEAT_RECEIVER_WORKER_COUNT = 1
-TELEMETRY_WORKER_COUNT = 1
-COMMAND_WORKER_COUNT = 1
+# Log queue and send statistics periodically, if the pipeline instruments the queues
+QUEUE_STATISTICS_PERIOD = 5  # seconds
 
 # Any other constants
 LOOP_DURATION = 100
+# Longer than the MAVLink read timeouts, so that workers blocked on the drone can exit on their own
+WORKER_JOIN_TIMEOUT = 2  # seconds
+MAIN_BATCH_SIZE = 64
+# Telemetry kept for the stages that query it, enough for a whole LOOP_DURATION flight
+TELEMETRY_HISTORY_CAPACITY = 1024
 TARGET = command.Position(10, 20, 30)
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -70,154 +77,164 @@ def main() -> int:
     # Get Pylance to stop complaining
     assert main_logger is not None
 
-    # Create a connection to the drone. Assume that this is safe to pass around to all processes
-    # In reality, this will not work, but to simplify the bootamp, preetend it is allowed
+    # The connection to the drone cannot be passed to other processes, so only the MAVLink hub
+    # worker connects to it, see below
     # To test, you will run each of your workers individually to see if they work
     # (test "drones" are provided for you test your workers)
-    # NOTE: If you want to have type annotations for the connection, it is of type mavutil.mavfile
-    connection = mavutil.mavlink_connection(CONNECTION_STRING)
-    connection.wait_heartbeat(timeout=30)  # Wait for the "drone" to connect
 
     # =============================================================================================
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
-    # Create a worker controller
-    controller = worker_controller.WorkerController()
-
-    # Create a multiprocess manager for synchronized queues
-    mp_manager = mp.Manager()
-    # Create queues
-    heartbeat_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, HEARTBEAT_QUEUE_MAX_SIZE)
-    telemetry_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, TELEMETRY_QUEUE_MAX_SIZE)
-    command_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, COMMAND_QUEUE_MAX_SIZE)
-
-    # Create worker properties for each worker type (what inputs it takes, how many workers)
-    # Heartbeat sender
-    result, heartbeat_sender_props = worker_manager.WorkerProperties.create(
-        HEARTBEAT_SENDER_WORKER_COUNT,
-        heartbeat_sender_worker.heartbeat_sender_worker,
-        (connection,),
-        [],
-        [],
-        controller,
-        main_logger,
-    )
-    if not result:
-        main_logger.error("Failed to create heartbeat sender properties")
-        return -1
-
-    # Heartbeat receiver
-    result, heartbeat_receiver_props = worker_manager.WorkerProperties.create(
-        HEARTBEAT_RECEIVER_WORKER_COUNT,
-        heartbeat_receiver_worker.heartbeat_receiver_worker,
-        (connection,),
-        [],
-        [heartbeat_queue],
-        controller,
-        main_logger,
-    )
+    # Stages and queues
+    result, pipeline_config = read_yaml.open_config(PIPELINE_CONFIG_FILE_PATH)
     if not result:
-        main_logger.error("Failed to create heartbeat receiver properties")
+        main_logger.error("Failed to load pipeline configuration file")
         return -1
 
-    # Telemetry
+    # Get Pylance to stop complaining
+    assert pipeline_config is not None
 
-    result, telemetry_props = worker_manager.WorkerProperties.create(
-        TELEMETRY_WORKER_COUNT,
-        telemetry_worker.telemetry_worker,
-        (connection,),
-        [],
-        [telemetry_queue],
-        controller,
-        main_logger,
-    )
+    # The hub's queues are shared with the workers, so they are created with their start method
+    result, _ = pipeline_builder.set_start_method(pipeline_config.get("pipeline", {}), main_logger)
     if not result:
-        main_logger.error("Failed to create telemetry properties")
+        main_logger.error("Failed to set start method")
         return -1
 
-    # Command
-    result, command_props = worker_manager.WorkerProperties.create(
-        COMMAND_WORKER_COUNT,
-        command_worker.command_worker,
-        (connection, TARGET),
-        [telemetry_queue],
-        [command_queue],
-        controller,
-        main_logger,
+    # Only the hub reads and writes the connection, so that workers do not discard each other's
+    # messages. Every other worker gets a stand in connection for the messages it needs
+    result, hub = mavlink_hub.MavlinkHub.create(
+        CONNECTION_STRING, main_logger, rate_limits=SEND_RATE_LIMITS
     )
     if not result:
-        main_logger.error("Failed to create command properties")
+        main_logger.error("Failed to create MAVLink hub")
         return -1
 
-    # Create the workers (processes) and obtain their managers
-    result, heartbeat_sender_managers = worker_manager.WorkerManager.create(
-        heartbeat_sender_props, main_logger
-    )
+    # Get Pylance to stop complaining
+    assert hub is not None
+
+    hub_connections = {}
+    for name, message_types in [
+        ("heartbeat_sender", []),
+        ("heartbeat_receiver", ["HEARTBEAT"]),
+        ("telemetry", ["LOCAL_POSITION_NED", "ATTITUDE"]),
+        ("command", []),
+    ]:
+        result, hub_connections[name] = hub.subscribe(message_types)
+        if not result:
+            main_logger.error(f"Failed to subscribe {name} to MAVLink hub")
+            return -1
+
+    # The telemetry worker appends to the history and the command worker reads it
+    result, history = telemetry_history.TelemetryHistory.create(TELEMETRY_HISTORY_CAPACITY)
     if not result:
-        main_logger.error("Failed to create heartbeat sender managers")
+        main_logger.error("Failed to create telemetry history")
         return -1
-    result, heartbeat_receiver_managers = worker_manager.WorkerManager.create(
-        heartbeat_receiver_props, main_logger
+
+    # Get Pylance to stop complaining
+    assert history is not None
+
+    # Worker function and arguments of each stage, before the queues and controller
+    stage_targets = {
+        "mavlink_hub": (mavlink_hub_worker.mavlink_hub_worker, (hub,)),
+        "heartbeat_sender": (
+            heartbeat_sender_worker.heartbeat_sender_worker,
+            (hub_connections["heartbeat_sender"],),
+        ),
+        "heartbeat_receiver": (
+            heartbeat_receiver_worker.heartbeat_receiver_worker,
+            (hub_connections["heartbeat_receiver"],),
+        ),
+        "telemetry": (
+            telemetry_worker.telemetry_worker,
+            (hub_connections["telemetry"], history),
+        ),
+        "command": (
+            command_worker.command_worker,
+            (hub_connections["command"], TARGET, history.get_reader()),
+        ),
+    }
+
+    # Create the queues and workers (processes)
+    # The hub's queues are closed with the pipeline's, so that no worker stays blocked on the hub
+    result, pipeline = pipeline_builder.Pipeline.create(
+        pipeline_config.get("pipeline", {}), stage_targets, main_logger, hub.get_queues()
     )
     if not result:
-        main_logger.error("Failed to create heartbeat receiver managers")
-        return -1
-    result, telemetry_managers = worker_manager.WorkerManager.create(telemetry_props, main_logger)
-    if not result:
-        main_logger.error("Failed to create telemetry managers")
-        return -1
-    result, command_managers = worker_manager.WorkerManager.create(command_props, main_logger)
-    if not result:
-        main_logger.error("Failed to create command managers")
+        main_logger.error("Failed to create pipeline")
         return -1
 
-    # Start worker processes
-    heartbeat_sender_managers.start_workers()
-    heartbeat_receiver_managers.start_workers()
-    telemetry_managers.start_workers()
-    command_managers.start_workers()
+    # Get Pylance to stop complaining
+    assert pipeline is not None
+
+    heartbeat_queue = pipeline.get_main_queues()["heartbeat"]
+    command_queue = pipeline.get_main_queues()["command"]
+    main_queues = list(pipeline.get_main_queues().values())
+
+    # Start worker processes, producers first
+    pipeline.start()
 
     main_logger.info("Started")
 
     # Main's work: read from all queues that output to main, and log any commands that we make
     # Continue running for 100 seconds or until the drone disconnects
     start = time.time()
-    while time.time() - start < LOOP_DURATION:
-        try:
-            if not heartbeat_queue.queue.empty():
-                heartbeat_status = heartbeat_queue.queue.get_nowait()
+    # Main sleeps until any queue has data, then drains each queue in batches
+    # so that it catches up in one call if it falls behind
+    disconnected = False
+    last_statistics_time = start
+    while not disconnected and time.time() - start < LOOP_DURATION:
+        timeout = min(
+            LOOP_DURATION - (time.time() - start),
+            QUEUE_STATISTICS_PERIOD - (time.time() - last_statistics_time),
+        )
+        result, ready_queues = queue_wait.wait_any(main_queues, timeout)
+        if not result:
+            main_logger.error("Queues read by main do not share a notifier")
+            break
+
+        # Get Pylance to stop complaining
+        assert ready_queues is not None
+
+        if time.time() - last_statistics_time >= QUEUE_STATISTICS_PERIOD:
+            last_statistics_time = time.time()
+            for name, output_queue in pipeline.get_queues().items():
+                result, statistics = output_queue.get_statistics()
+                if result:
+                    main_logger.info(f"{name} queue statistics: {statistics}")
+
+                dropped_count = output_queue.get_dropped_count()
+                if dropped_count > 0:
+                    main_logger.info(f"{name} queue dropped {dropped_count} items")
+
+            for name, send_statistics in hub.get_send_statistics().items():
+                main_logger.info(f"{name} send statistics: {send_statistics}")
+
+        if heartbeat_queue in ready_queues:
+            for heartbeat_status in heartbeat_queue.get_many(MAIN_BATCH_SIZE, 0.0):
                 main_logger.info(f"Heartbeat status: {heartbeat_status}")
                 if heartbeat_status == "Disconnected":
                     main_logger.warning("Drone disconnected")
+                    disconnected = True
                     break
-            if not command_queue.queue.empty():
-                command_data = command_queue.queue.get_nowait()
-                main_logger.info(f"Command data: {command_data}")
-        except queue.Empty:
-            pass
-
-    # Stop the processes
-    controller.request_exit()
-    main_logger.info("Requested exit")
 
-    # Fill and drain queues from END TO START
-    command_queue.fill_and_drain_queue()
-    telemetry_queue.fill_and_drain_queue()
-    heartbeat_queue.fill_and_drain_queue()
+        if disconnected:
+            break
 
-    main_logger.info("Queues cleared")
+        if command_queue in ready_queues:
+            for command_data in command_queue.get_many(MAIN_BATCH_SIZE, 0.0):
+                main_logger.info(f"Command data: {command_data}")
 
-    # Clean up worker processes
-    command_managers.join_workers()
-    telemetry_managers.join_workers()
-    heartbeat_receiver_managers.join_workers()
-    heartbeat_sender_managers.join_workers()
+    # Stop the processes
+    # Exit is requested and the queues are closed, so that workers blocked on a queue
+    # wake up immediately, then the stages are joined in reverse order
+    # Workers that do not exit in time are terminated
+    pipeline.stop(WORKER_JOIN_TIMEOUT)
 
     main_logger.info("Stopped")
 
     # We can reset controller in case we want to reuse it
     # Alternatively, create a new WorkerController instance
-    controller.clear_exit()
+    pipeline.get_controller().clear_exit()
 
     # =============================================================================================
     #                          ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
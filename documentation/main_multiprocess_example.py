@@ -5,7 +5,6 @@ python -m documentation.main_multiprocess_example
 ```
 """
 
-import multiprocessing as mp
 import time
 
 from documentation.multiprocess_example.add_random import add_random_worker
@@ -28,6 +27,9 @@ COUNTUP_WORKER_COUNT = 2
 ADD_RANDOM_WORKER_COUNT = 2
 CONCATENATOR_WORKER_COUNT = 2
 
+# Time for workers to exit on their own before they are terminated
+WORKER_JOIN_TIMEOUT = 1  # seconds
+
 
 # main() is required for early return
 def main() -> int:
@@ -60,7 +62,7 @@ def main() -> int:
     # caused by its implementation (background thread work)
     # so a queue from a SyncManager is used instead
     # See 2nd note: https://docs.python.org/3/library/multiprocessing.html#pipes-and-queues
-    mp_manager = mp.Manager()
+    mp_manager = queue_proxy_wrapper.create_manager()
 
     # Queue maxsize should always be >= the larger of producers/consumers count
     # Example: Producers 3, consumers 2, so queue maxsize minimum is 3
@@ -198,15 +200,17 @@ def main() -> int:
 
     main_logger.info("Requested exit", True)
 
-    # Fill and drain queues from END TO START
-    countup_to_add_random_queue.fill_and_drain_queue()
-    add_random_to_concatenator_queue.fill_and_drain_queue()
+    # Close queues so that workers blocked on a queue wake up immediately
+    # Blocked gets return the sentinel (None) and blocked puts discard their item
+    countup_to_add_random_queue.close()
+    add_random_to_concatenator_queue.close()
 
-    main_logger.info("Queues cleared", True)
+    main_logger.info("Queues closed", True)
 
     # Clean up worker processes
+    # Workers that do not exit in time are terminated
     for manager in worker_managers:
-        manager.join_workers()
+        manager.join_workers(WORKER_JOIN_TIMEOUT)
 
     main_logger.info("Stopped", True)
 
@@ -8,6 +8,7 @@ from pymavlink import mavutil
 
 from ..common.modules.logger import logger
 from ..telemetry import telemetry
+from ..telemetry import telemetry_history
 
 
 class Position:
@@ -39,18 +40,22 @@ class Command:  # pylint: disable=too-many-instance-attributes
         cls,
         connection: mavutil.mavfile,
         target: Position,
+        history: telemetry_history.TelemetryHistory,
         local_logger: logger.Logger,
     ) -> "tuple[True, Command] | tuple[False, None]":
         """
         Falliable create (instantiation) method to create a Command object.
+
+        history: History of the received telemetry, usually a reader.
         """
-        return True, cls(cls.__private_key, connection, target, local_logger)
+        return True, cls(cls.__private_key, connection, target, history, local_logger)
 
     def __init__(
         self,
         key: object,
         connection: mavutil.mavfile,
         target: Position,
+        history: telemetry_history.TelemetryHistory,
         local_logger: logger.Logger,
     ) -> None:
         assert key is Command.__private_key, "Use create() method"
@@ -58,6 +63,7 @@ class Command:  # pylint: disable=too-many-instance-attributes
         # Do any intializiation here
         self.connection = connection
         self.target = target
+        self.history = history
         self.local_logger = local_logger
 
         self.height_tolerance_m = 0.5
@@ -66,26 +72,18 @@ class Command:  # pylint: disable=too-many-instance-attributes
         self.target_system = 1
         self.target_component = 0
 
-        self.vx_sum = 0.0
-        self.vy_sum = 0.0
-        self.vz_sum = 0.0
-        self.count = 0
-
     def run(
         self, telemetry_data: telemetry.TelemetryData
     ) -> "tuple[True, str] | tuple[False, None]":
         """
         Make a decision based on received telemetry data.
         """
-        # Log average velocity for this trip so far
-        vx, vy, vz = telemetry_data.x_velocity, telemetry_data.y_velocity, telemetry_data.z_velocity
-        self.vx_sum += vx
-        self.vy_sum += vy
-        self.vz_sum += vz
-        self.count += 1
-        avg_vx = self.vx_sum / self.count
-        avg_vy = self.vy_sum / self.count
-        avg_vz = self.vz_sum / self.count
+        # Log average velocity for this trip so far, over all the telemetry kept in the history
+        statistics = self.history.get_statistics()
+        avg_vx, avg_vy, avg_vz = (
+            statistics.mean[telemetry_history.FIELD_INDEX[name]]
+            for name in ["x_velocity", "y_velocity", "z_velocity"]
+        )
         self.local_logger.info(
             f"Average velocity: ({avg_vx:.2f}, {avg_vy:.2f}, {avg_vz:.2f}) m/s", True
         )
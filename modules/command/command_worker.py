@@ -8,8 +8,10 @@ import pathlib
 from pymavlink import mavutil
 
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_wait
 from utilities.workers import worker_controller
 from . import command
+from ..telemetry import telemetry_history
 from ..common.modules.logger import logger
 
 
@@ -19,6 +21,7 @@ from ..common.modules.logger import logger
 def command_worker(
     connection: mavutil.mavfile,
     target: command.Position,
+    history: telemetry_history.TelemetryHistory,
     telemetry_queue: queue_proxy_wrapper.QueueProxyWrapper,
     output_queue: queue_proxy_wrapper.QueueProxyWrapper,
     controller: worker_controller.WorkerController,
@@ -29,6 +32,7 @@ def command_worker(
     Args:
         connection: MAVLink connection to drone
         target: Target position for  command
+        history: Reader of the history the telemetry worker appends to
         telemetry_queue: Telemetry receival queue
         output_queue: Command results queue
         controller: Controller for worker
@@ -54,22 +58,24 @@ def command_worker(
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
     # Instantiate class object (command.Command)
-    result, cmd = command.Command.create(connection, target, local_logger)
+    result, cmd = command.Command.create(connection, target, history, local_logger)
     if not result:
         local_logger.error("Failed to create Command", True)
         return
     local_logger.info("Command created", True)
 
     # Main loop: do work.
+    # Blocks until telemetry arrives instead of polling, waking up for exit
     while not controller.is_exit_requested():
-        controller.check_pause()
-        if telemetry_queue.queue.empty():
-            continue
+        result, telemetry_data = queue_wait.get_or_exit(telemetry_queue, controller)
+        if not result:
+            break
 
-        telemetry_data = telemetry_queue.queue.get()
-        local_logger.info("Received telemetry", True)
+        # Exit on sentinel
         if telemetry_data is None:
-            continue
+            break
+
+        local_logger.info("Received telemetry", True)
 
         result, cmd_action = cmd.run(telemetry_data)
         if result:
@@ -67,8 +67,9 @@ def heartbeat_sender_worker(
             time.time() - iteration_start
         )  # logger was taking too long and delaying heartbeats :(
         sleep_time = 1.0 - elapsed
+        # Wakes up early on exit so that shutdown is not delayed by up to a period
         if sleep_time > 0:
-            time.sleep(sleep_time)
+            controller.wait_for_exit(sleep_time)
 
 
 # =================================================================================================
@@ -0,0 +1,350 @@
+"""
+asyncio transport for MAVLink connections, so that many tasks can wait on messages
+on a single event loop instead of each blocking a process in recv_match().
+"""
+
+import asyncio
+
+from pymavlink import mavutil
+
+from ..common.modules.logger import logger
+
+
+# Connection string kinds, same as mavutil.mavlink_connection()
+# Connect to a TCP server
+TCP = "tcp"
+# Listen for UDP datagrams, replying to the last sender
+UDP_IN = "udpin"
+# Send UDP datagrams to an address
+UDP_OUT = "udpout"
+
+
+class _Writer:
+    """
+    File like object that the MAVLink encoder writes its frames to.
+    """
+
+    def __init__(self, write: "(bytes) -> None") -> None:  # type: ignore
+        self.write = write
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    """
+    Passes received datagrams and their sender on, once attached.
+    """
+
+    def __init__(self) -> None:
+        self.__on_data: "((bytes, tuple) -> None) | None" = None  # type: ignore
+        self.__on_close: "(() -> None) | None" = None  # type: ignore
+
+    def attach(
+        self,
+        on_data: "(bytes, tuple) -> None",  # type: ignore
+        on_close: "() -> None",  # type: ignore
+    ) -> None:
+        """
+        Sets the receivers, before the event loop runs any callbacks.
+        """
+        self.__on_data = on_data
+        self.__on_close = on_close
+
+    def datagram_received(self, data: bytes, addr: "tuple") -> None:
+        if self.__on_data is not None:
+            self.__on_data(data, addr)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        if self.__on_close is not None:
+            self.__on_close()
+
+
+class Subscription:
+    """
+    Messages of the subscribed types in arrival order, for `async for`.
+    A subscriber that falls behind drops its oldest messages instead of holding up the others.
+    Iteration ends when the connection or the subscription is closed.
+    """
+
+    def __init__(self, message_types: "frozenset[str]", maxsize: int) -> None:
+        """
+        message_types: Message types to receive, empty for all types.
+        maxsize: Number of messages held before dropping the oldest.
+        """
+        self.message_types = message_types
+        self.__channel: "asyncio.Queue[object | None]" = asyncio.Queue(maxsize)
+        self.__is_closed = False
+        self.dropped_count = 0
+
+    def put(self, message: object) -> None:
+        """
+        Adds a message, called by the connection. Does nothing once closed,
+        so that the sentinel ending the iteration is never dropped.
+        """
+        if not self.__is_closed:
+            self.__put(message)
+
+    def __put(self, message: object | None) -> None:
+        """
+        Adds a message or the sentinel (None), dropping the oldest if full.
+        """
+        if self.__channel.full():
+            self.__channel.get_nowait()
+            self.dropped_count += 1
+
+        self.__channel.put_nowait(message)
+
+    def close(self) -> None:
+        """
+        Ends the iteration once the messages already received are consumed.
+        """
+        if not self.__is_closed:
+            self.__is_closed = True
+            self.__put(None)
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the subscription is closed.
+        """
+        return self.__is_closed
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> object:
+        message = await self.__channel.get()
+        if message is None:
+            # Wake any other task iterating
+            self.__channel.put_nowait(None)
+            raise StopAsyncIteration
+
+        return message
+
+
+class AsyncMavlinkConnection:  # pylint: disable=too-many-instance-attributes
+    """
+    MAVLink connection read by the event loop as data arrives,
+    parsed once with MAVLink.parse_buffer() and delivered to every matching subscription
+    without waiting for a timeout.
+
+    Send with `mav.<message>_send()`, same as mavutil.mavfile . Sends do not block.
+    Only use from the event loop it was created on.
+    """
+
+    __create_key = object()
+
+    __READ_SIZE = 4096  # bytes
+
+    @classmethod
+    async def create(
+        cls,
+        connection_string: str,
+        local_logger: logger.Logger,
+        source_system: int = 255,
+        source_component: int = 0,
+    ) -> "tuple[True, AsyncMavlinkConnection] | tuple[False, None]":
+        """
+        Opens a connection, must be awaited on the event loop that uses it.
+
+        connection_string: "tcp:<host>:<port>", "udpin:<host>:<port>" (or "udp:"),
+            or "udpout:<host>:<port>", same as mavutil.mavlink_connection() .
+        local_logger: Existing logger from process.
+        source_system: System ID of sent messages.
+        source_component: Component ID of sent messages.
+
+        Returns the AsyncMavlinkConnection object.
+        """
+        kind, _, address = connection_string.partition(":")
+        host, _, port = address.rpartition(":")
+        if kind == "udp":
+            kind = UDP_IN
+
+        if kind not in [TCP, UDP_IN, UDP_OUT] or host == "" or not port.isdigit():
+            local_logger.error(f"Unsupported connection string: {connection_string}", True)
+            return False, None
+
+        stream = None
+        datagram = None
+        try:
+            if kind == TCP:
+                stream = await asyncio.open_connection(host, int(port))
+            else:
+                datagram = await asyncio.get_running_loop().create_datagram_endpoint(
+                    _DatagramProtocol,
+                    local_addr=(host, int(port)) if kind == UDP_IN else None,
+                    remote_addr=(host, int(port)) if kind == UDP_OUT else None,
+                )
+        except OSError as exception:
+            local_logger.error(f"Failed to open {connection_string}: {exception}", True)
+            return False, None
+
+        # Nothing is awaited from here on, so no data arrives before the connection is attached
+        return True, AsyncMavlinkConnection(
+            cls.__create_key,
+            local_logger,
+            source_system,
+            source_component,
+            stream,
+            datagram,
+            kind == UDP_IN,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        local_logger: logger.Logger,
+        source_system: int,
+        source_component: int,
+        stream: "tuple[asyncio.StreamReader, asyncio.StreamWriter] | None",
+        datagram: "tuple[asyncio.DatagramTransport, _DatagramProtocol] | None",
+        is_replying_to_sender: bool,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert (
+            class_private_create_key is AsyncMavlinkConnection.__create_key
+        ), "Use create() method"
+
+        self.__logger = local_logger
+        self.mav = mavutil.mavlink.MAVLink(_Writer(self.__write), source_system, source_component)
+        # Bad frames are returned as BAD_DATA messages instead of raising
+        self.mav.robust_parsing = True
+
+        self.__subscriptions: "list[Subscription]" = []
+        self.__is_closed = False
+
+        self.__stream_writer: asyncio.StreamWriter | None = None
+        self.__read_task: "asyncio.Task | None" = None
+        if stream is not None:
+            reader, self.__stream_writer = stream
+            self.__read_task = asyncio.get_running_loop().create_task(self.__read_stream(reader))
+
+        self.__datagram_transport: asyncio.DatagramTransport | None = None
+        # Replies of UDP_IN go to the last sender, like mavutil
+        self.__is_replying_to_sender = is_replying_to_sender
+        self.__remote_address: "tuple | None" = None
+        if datagram is not None:
+            self.__datagram_transport, protocol = datagram
+            protocol.attach(self.__on_datagram, self.__on_close)
+            if not is_replying_to_sender:
+                self.__remote_address = self.__datagram_transport.get_extra_info("peername")
+
+    async def __read_stream(self, reader: asyncio.StreamReader) -> None:
+        """
+        Task reading the TCP connection until it closes.
+        """
+        try:
+            while True:
+                data = await reader.read(self.__READ_SIZE)
+                if len(data) == 0:
+                    break
+
+                self.__dispatch(data)
+        except OSError as exception:
+            self.__logger.error(f"Connection read failed: {exception}", True)
+        finally:
+            self.__on_close()
+
+    def __on_datagram(self, data: bytes, address: "tuple") -> None:
+        """
+        Handles a received UDP datagram.
+        """
+        if self.__is_replying_to_sender:
+            self.__remote_address = address
+
+        self.__dispatch(data)
+
+    def __on_close(self) -> None:
+        """
+        Ends all subscriptions once the connection is closed.
+        """
+        self.__is_closed = True
+        for subscription in self.__subscriptions:
+            subscription.close()
+
+    def __dispatch(self, data: bytes) -> None:
+        """
+        Parses the data and delivers the complete messages.
+        """
+        messages = self.mav.parse_buffer(data)
+        if messages is None:
+            return
+
+        # Subscriptions closed directly instead of through unsubscribe()
+        if any(subscription.is_closed() for subscription in self.__subscriptions):
+            self.__subscriptions = [
+                subscription
+                for subscription in self.__subscriptions
+                if not subscription.is_closed()
+            ]
+
+        for message in messages:
+            message_type = message.get_type()
+            for subscription in self.__subscriptions:
+                if message_type in subscription.message_types or (
+                    len(subscription.message_types) == 0 and message_type != "BAD_DATA"
+                ):
+                    subscription.put(message)
+
+    def __write(self, data: bytes) -> None:
+        """
+        Writes an encoded frame, frames sent before the first UDP_IN datagram are dropped.
+        """
+        if self.__is_closed:
+            return
+
+        if self.__stream_writer is not None:
+            self.__stream_writer.write(data)
+            return
+
+        if self.__datagram_transport is not None and self.__remote_address is not None:
+            self.__datagram_transport.sendto(data, self.__remote_address)
+
+    def subscribe(self, *message_types: str, maxsize: int = 16) -> Subscription:
+        """
+        Subscribes to messages, starting immediately.
+
+        message_types: Message types to receive, such as "ATTITUDE". None given for all types.
+        maxsize: Number of messages held before dropping the oldest.
+
+        Returns the subscription, iterate it with `async for`.
+        """
+        subscription = Subscription(frozenset(message_types), maxsize)
+        if self.__is_closed:
+            subscription.close()
+        else:
+            self.__subscriptions.append(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Closes the subscription and stops delivering to it.
+        """
+        subscription.close()
+        if subscription in self.__subscriptions:
+            self.__subscriptions.remove(subscription)
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the connection is closed.
+        """
+        return self.__is_closed
+
+    async def close(self) -> None:
+        """
+        Closes the connection and ends all subscriptions.
+        """
+        if self.__stream_writer is not None:
+            self.__stream_writer.close()
+            try:
+                await self.__stream_writer.wait_closed()
+            except OSError:
+                pass
+
+        if self.__read_task is not None:
+            await self.__read_task
+
+        if self.__datagram_transport is not None:
+            self.__datagram_transport.close()
+
+        self.__on_close()
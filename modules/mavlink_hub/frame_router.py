@@ -0,0 +1,154 @@
+"""
+Routing of raw MAVLink frames by message ID, decoding only the frames that have handlers.
+"""
+
+from pymavlink import mavutil
+
+
+# Start of frame markers
+MAGIC_V1 = 0xFE
+MAGIC_V2 = 0xFD
+
+# Header is magic, payload length, sequence, system, component, message ID
+HEADER_LENGTH_V1 = 6
+# Header is magic, payload length, incompatibility flags, compatibility flags, sequence,
+# system, component, 3 byte little endian message ID
+HEADER_LENGTH_V2 = 10
+CHECKSUM_LENGTH = 2
+SIGNATURE_LENGTH = 13
+SIGNED_FLAG = 0x01
+
+
+class FrameRouter:
+    """
+    Peeks at the message ID in the header of each frame and skips frames without handlers,
+    so that decoding and checksum work is only spent on the messages that are used.
+    Decoded messages are passed to the handlers of their message ID.
+
+    Skipped frames are not checksummed, so a corrupted length in a skipped frame can cause
+    the next frame to be skipped too before the stream resynchronizes on a start marker.
+    """
+
+    def __init__(self, mav: mavutil.mavlink.MAVLink) -> None:
+        """
+        mav: Parser to decode frames with, such as mavutil.mavfile.mav .
+        """
+        self.__mav = mav
+        self.__buffer = bytearray()
+        self.__routes: "dict[int, tuple[(object) -> None, ...]]" = {}  # type: ignore
+        self.__catch_all: "tuple[(object) -> None, ...]" = ()  # type: ignore
+        self.__decoded_count = 0
+        self.__skipped_count = 0
+        self.__bad_count = 0
+
+    def set_routes(
+        self,
+        routes: "dict[int, list[(object) -> None]]",  # type: ignore
+        catch_all: "list[(object) -> None] | None" = None,  # type: ignore
+    ) -> None:
+        """
+        Replaces the handlers.
+
+        routes: Handlers of each message ID, called with the decoded message.
+        catch_all: Handlers called with every message, which decodes every frame.
+        """
+        self.__catch_all = () if catch_all is None else tuple(catch_all)
+        self.__routes = {
+            message_id: tuple(handlers) + self.__catch_all
+            for message_id, handlers in routes.items()
+            if len(handlers) > 0
+        }
+
+    def __find_magic(self, start: int) -> int:
+        """
+        Returns the index of the next start of frame marker, the buffer length if there is none.
+        """
+        indices = [
+            index
+            for index in (self.__buffer.find(MAGIC_V1, start), self.__buffer.find(MAGIC_V2, start))
+            if index >= 0
+        ]
+        return min(indices, default=len(self.__buffer))
+
+    def feed(self, data: bytes) -> int:
+        """
+        Adds received data and routes every complete frame in it.
+        Incomplete frames are kept until the rest arrives.
+
+        data: Received data.
+
+        Returns the number of handler calls.
+        """
+        buffer = self.__buffer
+        buffer += data
+        length = len(buffer)
+        routes = self.__routes
+        start = 0
+        call_count = 0
+        while start < length:
+            magic = buffer[start]
+            if magic == MAGIC_V1:
+                if length - start < HEADER_LENGTH_V1:
+                    break
+
+                message_id = buffer[start + 5]
+                frame_length = HEADER_LENGTH_V1 + buffer[start + 1] + CHECKSUM_LENGTH
+            elif magic == MAGIC_V2:
+                if length - start < HEADER_LENGTH_V2:
+                    break
+
+                message_id = (
+                    buffer[start + 7] | (buffer[start + 8] << 8) | (buffer[start + 9] << 16)
+                )
+                frame_length = HEADER_LENGTH_V2 + buffer[start + 1] + CHECKSUM_LENGTH
+                if buffer[start + 2] & SIGNED_FLAG:
+                    frame_length += SIGNATURE_LENGTH
+            else:
+                start = self.__find_magic(start + 1)
+                continue
+
+            if length - start < frame_length:
+                break
+
+            handlers = routes.get(message_id, self.__catch_all)
+            if len(handlers) == 0:
+                self.__skipped_count += 1
+                start += frame_length
+                continue
+
+            try:
+                message = self.__mav.decode(buffer[start : start + frame_length])
+            except mavutil.mavlink.MAVError:
+                # Not a frame after all, resynchronize on the next marker
+                self.__bad_count += 1
+                start = self.__find_magic(start + 1)
+                continue
+
+            self.__decoded_count += 1
+            for handler in handlers:
+                handler(message)
+
+            call_count += len(handlers)
+            start += frame_length
+
+        del buffer[:start]
+
+        return call_count
+
+    def get_decoded_count(self) -> int:
+        """
+        Returns the number of frames decoded and routed.
+        """
+        return self.__decoded_count
+
+    def get_skipped_count(self) -> int:
+        """
+        Returns the number of frames skipped without decoding.
+        """
+        return self.__skipped_count
+
+    def get_bad_count(self) -> int:
+        """
+        Returns the number of frames that failed to decode.
+        """
+        return self.__bad_count
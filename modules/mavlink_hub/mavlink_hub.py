@@ -0,0 +1,330 @@
+"""
+Single owner of the MAVLink connection that parses every frame once
+and routes the messages to subscribers by message ID.
+"""
+
+import queue
+import threading
+
+from pymavlink import mavutil
+
+from utilities.workers import overflow_policy
+from utilities.workers import shared_memory_queue
+from . import frame_router
+from . import send_scheduler
+from ..common.modules.logger import logger
+
+
+class HubSender:
+    """
+    Stands in for `mavutil.mavfile.mav` of subscribers.
+    Every `<message>_send()` call is passed to the hub, which encodes and writes it
+    in priority order, so that all sends share the sequence numbers of the connection.
+    """
+
+    def __init__(self, scheduler: send_scheduler.SendScheduler) -> None:
+        """
+        scheduler: Scheduler of the sends for the hub to write.
+        """
+        self.__scheduler = scheduler
+
+    def __getattr__(self, name: str) -> "(...) -> None":  # type: ignore
+        # Private names are not passed through, which also keeps unpickling safe
+        if name.startswith("_") or not name.endswith("_send"):
+            raise AttributeError(name)
+
+        def send(*args: object, **kwargs: object) -> None:
+            self.__scheduler.put(name, args, kwargs)
+
+        return send
+
+
+class HubConnection:
+    """
+    Stands in for `mavutil.mavfile` in the workers, receiving from the channel of its subscription
+    and sending through the hub. Only `recv_match()` and `mav.<message>_send()` are supported.
+    """
+
+    def __init__(
+        self,
+        channel: shared_memory_queue.SharedMemoryQueueWrapper | None,
+        scheduler: send_scheduler.SendScheduler,
+    ) -> None:
+        """
+        channel: Queue of the subscribed messages, None if only sending.
+        scheduler: Scheduler of the sends for the hub to write.
+        """
+        self.__channel = channel
+        self.mav = HubSender(scheduler)
+
+    def recv_match(
+        self,
+        condition: str | None = None,
+        type: "str | list[str] | None" = None,  # pylint: disable=redefined-builtin
+        blocking: bool = False,
+        timeout: float | None = None,
+    ) -> object | None:
+        """
+        Same as mavutil.mavfile.recv_match(), from the subscribed messages only.
+
+        condition: Unsupported, must be None.
+        type: Message type or types to return, others are discarded. None returns any type.
+        blocking: Whether to wait for a message.
+        timeout: Time waiting in seconds for a message, None waits forever.
+
+        Returns the message, None if no message arrived or the hub stopped.
+        """
+        assert condition is None, "Conditions are not supported"
+
+        if self.__channel is None:
+            return None
+
+        types = [type] if isinstance(type, str) else type
+        while True:
+            try:
+                message = self.__channel.queue.get(blocking, timeout)
+            except queue.Empty:
+                return None
+
+            # Hub stopped
+            if message is None:
+                return None
+
+            if types is None or message.get_type() in types:
+                return message
+
+
+class MavlinkHub:  # pylint: disable=too-many-instance-attributes
+    """
+    Opens the connection in the hub worker and reads every frame of it exactly once,
+    so that workers no longer discard each other's messages from a shared connection.
+    Subscribers get a HubConnection with a channel for the message IDs they subscribed to.
+    Frames that nobody subscribed to are skipped without decoding, see frame_router.FrameRouter .
+    Only the connection string is passed to the hub worker, so it can be started with any
+    start method.
+
+    A channel that falls behind drops its oldest messages instead of stalling the other channels.
+    Sends are written from a thread, so that reads and writes do not wait for each other.
+    Heartbeats are written before safety commands, which are written before routine sends,
+    see send_scheduler.SendScheduler .
+    """
+
+    __create_key = object()
+
+    __READ_TIMEOUT = 0.1  # seconds
+    __READ_SIZE = 4096  # bytes
+
+    @classmethod
+    def create(
+        cls,
+        connection_string: str,
+        local_logger: logger.Logger,
+        outgoing_maxsize: int = 64,
+        rate_limits: "dict[int, tuple[float, int]] | None" = None,
+    ) -> "tuple[True, MavlinkHub] | tuple[False, None]":
+        """
+        Creates a hub, call subscribe() for every subscriber before starting the hub worker.
+
+        connection_string: MAVLink connection string of the drone, such as "tcp:localhost:12345",
+            only connected to by the hub worker.
+        local_logger: Existing logger from process.
+        outgoing_maxsize: Maximum number of sends waiting to be written per priority class,
+            sends block when full.
+        rate_limits: Sends per second and burst size by priority class of send_scheduler,
+            classes without a limit are unlimited.
+
+        Returns the MavlinkHub object.
+        """
+        result, scheduler = send_scheduler.SendScheduler.create(outgoing_maxsize, rate_limits)
+        if not result:
+            local_logger.error(
+                f"Invalid outgoing queue size {outgoing_maxsize} or rate limits {rate_limits}",
+                True,
+            )
+            return False, None
+
+        # Get Pylance to stop complaining
+        assert scheduler is not None
+
+        return True, MavlinkHub(cls.__create_key, connection_string, scheduler, local_logger)
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        connection_string: str,
+        scheduler: send_scheduler.SendScheduler,
+        local_logger: logger.Logger,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is MavlinkHub.__create_key, "Use create() method"
+
+        self.__connection_string = connection_string
+        self.__scheduler = scheduler
+        self.__logger = local_logger
+        # Message ID to channels
+        self.__routes: "dict[int, list[shared_memory_queue.SharedMemoryQueueWrapper]]" = {}
+        self.__channels: "list[shared_memory_queue.SharedMemoryQueueWrapper]" = []
+        # Only in the hub worker, see start()
+        self.__connection: mavutil.mavfile | None = None
+        self.__router: frame_router.FrameRouter | None = None
+        self.__writer: threading.Thread | None = None
+        self.__writer_stop: threading.Event | None = None
+
+    def subscribe(
+        self, message_types: "list[str]", maxsize: int = 16
+    ) -> "tuple[True, HubConnection] | tuple[False, None]":
+        """
+        Subscribes to messages, call before the hub worker starts.
+
+        message_types: Names of the message types, such as "HEARTBEAT". Empty for only sending.
+        maxsize: Number of messages the channel holds before dropping the oldest.
+
+        Returns the connection for the subscriber.
+        """
+        message_ids = []
+        for message_type in message_types:
+            message_id = getattr(mavutil.mavlink, f"MAVLINK_MSG_ID_{message_type}", None)
+            if message_id is None:
+                self.__logger.error(f"Unknown message type: {message_type}", True)
+                return False, None
+
+            message_ids.append(message_id)
+
+        if len(message_ids) == 0:
+            return True, HubConnection(None, self.__scheduler)
+
+        if maxsize <= 0:
+            self.__logger.error(f"Channel size must be positive: {maxsize}", True)
+            return False, None
+
+        channel = shared_memory_queue.SharedMemoryQueueWrapper(
+            None, maxsize, overflow=overflow_policy.OverflowPolicy.DROP_OLDEST
+        )
+        self.__channels.append(channel)
+        for message_id in message_ids:
+            self.__routes.setdefault(message_id, []).append(channel)
+
+        return True, HubConnection(channel, self.__scheduler)
+
+    def start(self, local_logger: logger.Logger) -> bool:
+        """
+        Connects to the drone and starts writing sends from a thread, call in the hub worker.
+
+        local_logger: Logger of the hub worker.
+
+        Returns whether the connection was opened.
+        """
+        try:
+            self.__connection = mavutil.mavlink_connection(self.__connection_string)
+        # Catching all exceptions for library call
+        # pylint: disable-next=broad-exception-caught
+        except Exception as exception:
+            local_logger.error(
+                f"Failed to connect to {self.__connection_string}: {exception}", True
+            )
+            return False
+
+        self.__router = frame_router.FrameRouter(self.__connection.mav)
+        self.__router.set_routes(
+            {
+                message_id: [channel.queue.put for channel in channels]
+                for message_id, channels in self.__routes.items()
+            }
+        )
+
+        self.__writer_stop = threading.Event()
+        self.__writer = threading.Thread(
+            target=self.__write, args=(local_logger,), name="MavlinkHubWriter", daemon=True
+        )
+        self.__writer.start()
+        return True
+
+    def stop(self) -> None:
+        """
+        Stops writing, closes the connection and closes the channels and send queues,
+        so that subscribers waiting to receive or to send wake up.
+        """
+        if self.__writer is not None:
+            self.__writer_stop.set()
+            self.__writer.join()
+            self.__writer = None
+
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+        for channel in self.__channels:
+            channel.close()
+
+        self.__scheduler.close()
+
+    def get_queues(self) -> "list[shared_memory_queue.SharedMemoryQueueWrapper]":
+        """
+        Returns the channels and send queues, which are shared with the subscribers.
+        """
+        return self.__channels + self.__scheduler.get_queues()
+
+    def get_send_statistics(self) -> "dict[str, send_scheduler.SendStatistics]":
+        """
+        Returns a snapshot of the send statistics by priority class name,
+        can be called from any process.
+        """
+        return self.__scheduler.get_statistics()
+
+    def get_frame_counts(self) -> "tuple[int, int, int]":
+        """
+        Returns the number of frames routed, skipped and bad in the hub worker,
+        only meaningful in the hub worker.
+        """
+        if self.__router is None:
+            return 0, 0, 0
+
+        return (
+            self.__router.get_decoded_count(),
+            self.__router.get_skipped_count(),
+            self.__router.get_bad_count(),
+        )
+
+    def run(self) -> "tuple[bool, int]":
+        """
+        Reads the available data and routes the messages in it to their subscribers.
+
+        Returns whether data was read and the number of messages put into channels.
+        """
+        # Get Pylance to stop complaining
+        assert self.__connection is not None
+        assert self.__router is not None
+
+        if not self.__connection.select(self.__READ_TIMEOUT):
+            return False, 0
+
+        data = self.__connection.recv(self.__READ_SIZE)
+        if len(data) == 0:
+            return False, 0
+
+        return True, self.__router.feed(data)
+
+    def __write(self, local_logger: logger.Logger) -> None:
+        """
+        Writer thread, encodes and writes sends in priority order until stopped.
+        """
+        while not self.__writer_stop.is_set():
+            result, send = self.__scheduler.get(self.__READ_TIMEOUT)
+            if not result:
+                continue
+
+            # Get Pylance to stop complaining
+            assert send is not None
+
+            priority, name, args, kwargs, put_time = send
+            try:
+                getattr(self.__connection.mav, name)(*args, **kwargs)
+            # Any send error only loses that send
+            # pylint: disable-next=broad-exception-caught
+            except Exception as exception:
+                local_logger.error(f"Failed to send {name}: {exception}", True)
+                continue
+
+            self.__scheduler.record(priority, put_time)
@@ -0,0 +1,53 @@
+"""
+MAVLink hub worker that owns the connection to the drone.
+"""
+
+import os
+import pathlib
+
+from utilities.workers import worker_controller
+from . import mavlink_hub
+from ..common.modules.logger import logger
+
+
+def mavlink_hub_worker(
+    hub: mavlink_hub.MavlinkHub,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Worker process, there must only be one per connection.
+
+    hub: Hub with all subscriptions made, connects to the drone
+    controller: worker controller to communicate with the main process
+    """
+    # Instantiate logger
+    worker_name = pathlib.Path(__file__).stem
+    process_id = os.getpid()
+    result, local_logger = logger.Logger.create(f"{worker_name}_{process_id}", True)
+    if not result:
+        print("ERROR: Worker failed to create logger")
+        return
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    local_logger.info("Logger initialized", True)
+
+    # Connects in the worker, since a connection cannot be passed to a process
+    if not hub.start(local_logger):
+        local_logger.error("Failed to start MAVLink hub", True)
+        hub.stop()
+        return
+
+    # Main loop: do work.
+    # Messages are not logged, the hub must keep up with the full message rate
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        hub.run()
+
+    hub.stop()
+    routed_count, skipped_count, bad_count = hub.get_frame_counts()
+    local_logger.info(
+        f"Hub stopped, frames routed: {routed_count}, skipped: {skipped_count}, bad: {bad_count}",
+        True,
+    )
@@ -0,0 +1,310 @@
+"""
+Prioritized and rate limited scheduling of the sends written by the MAVLink hub.
+"""
+
+import ctypes
+import multiprocessing as mp
+import queue
+import time
+
+from pymavlink import mavutil
+
+from utilities.workers import overflow_policy
+from utilities.workers import queue_notifier
+from utilities.workers import shared_memory_queue
+
+
+# Priority classes, lower is sent first
+HEARTBEAT = 0
+SAFETY = 1
+ROUTINE = 2
+PRIORITY_NAMES = ["heartbeat", "safety", "routine"]
+
+# Commands that keep the drone safe, sent before routine commands
+SAFETY_COMMANDS = {
+    mavutil.mavlink.MAV_CMD_NAV_LAND,
+    mavutil.mavlink.MAV_CMD_NAV_RETURN_TO_LAUNCH,
+    mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM,
+    mavutil.mavlink.MAV_CMD_DO_FLIGHTTERMINATION,
+    mavutil.mavlink.MAV_CMD_DO_PAUSE_CONTINUE,
+}
+
+# Argument index of the command in the positional arguments of each command send
+COMMAND_ARGUMENT_INDEX = {"command_long_send": 2, "command_int_send": 3}
+
+
+def classify(name: str, args: "tuple", kwargs: "dict") -> int:
+    """
+    Returns the priority class of a send.
+
+    name: Name of the send method of mavutil.mavfile.mav .
+    args: Positional arguments of the send.
+    kwargs: Keyword arguments of the send.
+    """
+    if name == "heartbeat_send":
+        return HEARTBEAT
+
+    index = COMMAND_ARGUMENT_INDEX.get(name)
+    if index is None:
+        return ROUTINE
+
+    command = kwargs.get("command", args[index] if len(args) > index else None)
+    if command in SAFETY_COMMANDS:
+        return SAFETY
+
+    return ROUTINE
+
+
+class SendStatistics:
+    """
+    Snapshot of the sends of a priority class. Times are in seconds.
+    Latency is from the send call in the worker until it was written to the connection.
+    """
+
+    def __init__(
+        self, sent_count: int, latency_total: float, latency_max: float, limited_count: int
+    ) -> None:
+        self.sent_count = sent_count
+        self.latency_total = latency_total
+        self.latency_max = latency_max
+        # Times the next send was held back by the rate limit
+        self.limited_count = limited_count
+
+    def __str__(self) -> str:
+        latency_mean = self.latency_total / self.sent_count if self.sent_count > 0 else 0.0
+        return (
+            f"sent: {self.sent_count}, "
+            f"latency: {latency_mean * 1000:.3f} ms (max {self.latency_max * 1000:.3f} ms), "
+            f"rate limited: {self.limited_count}"
+        )
+
+
+class TokenBucket:
+    """
+    Allows `rate` sends per second on average, with bursts of up to `burst` sends.
+    Only used by the writer thread, so no lock is required.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """
+        rate: Sends per second, <= 0 for unlimited.
+        burst: Maximum number of sends in a burst, must be greater than 0 .
+        """
+        self.__rate = rate
+        self.__burst = float(burst)
+        self.__tokens = float(burst)
+        self.__time = time.perf_counter()
+
+    def __refill(self, now: float) -> None:
+        """
+        Adds the tokens accumulated since the last refill.
+        """
+        self.__tokens = min(self.__burst, self.__tokens + (now - self.__time) * self.__rate)
+        self.__time = now
+
+    def take(self, now: float) -> None:
+        """
+        Takes a token, call once get_wait() returned 0 .
+        """
+        if self.__rate <= 0.0:
+            return
+
+        self.__refill(now)
+        self.__tokens -= 1.0
+
+    def get_wait(self, now: float) -> float:
+        """
+        Returns the time in seconds until a token is available.
+        """
+        if self.__rate <= 0.0:
+            return 0.0
+
+        self.__refill(now)
+        return max(0.0, (1.0 - self.__tokens) / self.__rate)
+
+
+class SendScheduler:
+    """
+    One queue per priority class, so that a burst of commands filling their queue
+    never blocks or delays a heartbeat. The writer always takes the highest priority send
+    allowed by the rate limit of its class.
+
+    Sends are put from any process, and taken and recorded by the hub writer thread only.
+    Statistics are in shared memory, so that they can be read from any process.
+    """
+
+    __create_key = object()
+
+    # Sent count, latency total, latency maximum, limited count per priority class
+    __STATISTICS_SIZE = 4
+
+    # Heartbeats only matter while fresh, so stale ones are dropped instead of blocking
+    __HEARTBEAT_QUEUE_SIZE = 4
+
+    @classmethod
+    def create(
+        cls, maxsize: int, rate_limits: "dict[int, tuple[float, int]] | None" = None
+    ) -> "tuple[True, SendScheduler] | tuple[False, None]":
+        """
+        Creates a scheduler.
+
+        maxsize: Number of safety or routine sends waiting before their senders block,
+            must be greater than 0 .
+        rate_limits: Sends per second and burst size by priority class,
+            classes without a limit are unlimited.
+
+        Returns the SendScheduler object.
+        """
+        if maxsize <= 0:
+            return False, None
+
+        if rate_limits is None:
+            rate_limits = {}
+
+        for priority, (_, burst) in rate_limits.items():
+            if priority not in range(0, len(PRIORITY_NAMES)) or burst <= 0:
+                return False, None
+
+        return True, SendScheduler(cls.__create_key, maxsize, rate_limits)
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        maxsize: int,
+        rate_limits: "dict[int, tuple[float, int]]",
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is SendScheduler.__create_key, "Use create() method"
+
+        self.__notifier = queue_notifier.QueueNotifier()
+        self.__queues = [
+            shared_memory_queue.SharedMemoryQueueWrapper(
+                None,
+                self.__HEARTBEAT_QUEUE_SIZE,
+                overflow=overflow_policy.OverflowPolicy.DROP_OLDEST,
+                notifier=self.__notifier,
+            ),
+            shared_memory_queue.SharedMemoryQueueWrapper(None, maxsize, notifier=self.__notifier),
+            shared_memory_queue.SharedMemoryQueueWrapper(None, maxsize, notifier=self.__notifier),
+        ]
+        self.__buckets = [
+            TokenBucket(*rate_limits.get(priority, (0.0, 1)))
+            for priority in range(0, len(PRIORITY_NAMES))
+        ]
+        # Only written by the writer thread, so no lock is required
+        self.__statistics = mp.RawArray(
+            ctypes.c_double, self.__STATISTICS_SIZE * len(PRIORITY_NAMES)
+        )
+
+    def put(self, name: str, args: "tuple", kwargs: "dict") -> None:
+        """
+        Queues a send in its priority class, can be called from any process.
+        Blocks while the queue of the class is full, except for heartbeats.
+
+        name: Name of the send method of mavutil.mavfile.mav .
+        args: Positional arguments of the send.
+        kwargs: Keyword arguments of the send.
+        """
+        priority = classify(name, args, kwargs)
+        self.__queues[priority].queue.put((name, args, kwargs, time.perf_counter()))
+
+    def get(
+        self, timeout: float
+    ) -> "tuple[True, tuple[int, str, tuple, dict, float]] | tuple[False, None]":
+        """
+        Takes the next send, called by the writer thread.
+
+        timeout: Time waiting in seconds for a send.
+
+        Returns the priority class, name, arguments, keyword arguments and put time of the send.
+        Fails if no send was allowed before the timeout.
+        """
+        deadline = time.perf_counter() + timeout
+        is_limited = [False] * len(PRIORITY_NAMES)
+        while True:
+            # Read before checking so that a put in between is not missed
+            sequence = self.__notifier.get_sequence()
+
+            now = time.perf_counter()
+            wait = deadline - now
+            for priority, send_queue in enumerate(self.__queues):
+                if send_queue.queue.empty():
+                    continue
+
+                bucket_wait = self.__buckets[priority].get_wait(now)
+                if bucket_wait > 0.0:
+                    if not is_limited[priority]:
+                        is_limited[priority] = True
+                        self.__add(priority, 3, 1.0)
+
+                    wait = min(wait, bucket_wait)
+                    continue
+
+                # The token is only taken for a send, so an empty poll does not use up the rate
+                try:
+                    send = send_queue.queue.get(False)
+                except queue.Empty:
+                    continue
+
+                # Closed
+                if send is None:
+                    continue
+
+                self.__buckets[priority].take(now)
+                name, args, kwargs, put_time = send
+                return True, (priority, name, args, kwargs, put_time)
+
+            if now >= deadline:
+                return False, None
+
+            self.__notifier.wait(sequence, max(wait, 0.0))
+
+    def get_queues(self) -> "list[shared_memory_queue.SharedMemoryQueueWrapper]":
+        """
+        Returns the queue of each priority class.
+        """
+        return self.__queues
+
+    def close(self) -> None:
+        """
+        Closes the queues, so that senders blocked on a full queue wake up and discard their send.
+        """
+        for send_queue in self.__queues:
+            send_queue.close()
+
+    def record(self, priority: int, put_time: float) -> None:
+        """
+        Records a send written to the connection, called by the writer thread.
+
+        priority: Priority class of the send.
+        put_time: Put time of the send from get().
+        """
+        latency = time.perf_counter() - put_time
+        self.__add(priority, 0, 1.0)
+        self.__add(priority, 1, latency)
+        index = priority * self.__STATISTICS_SIZE + 2
+        self.__statistics[index] = max(self.__statistics[index], latency)
+
+    def __add(self, priority: int, field: int, value: float) -> None:
+        """
+        Adds to a statistics field of a priority class.
+        """
+        self.__statistics[priority * self.__STATISTICS_SIZE + field] += value
+
+    def get_statistics(self) -> "dict[str, SendStatistics]":
+        """
+        Returns a snapshot of the statistics by priority class name, can be called from any process.
+        """
+        statistics = {}
+        for priority, name in enumerate(PRIORITY_NAMES):
+            start = priority * self.__STATISTICS_SIZE
+            sent_count, latency_total, latency_max, limited_count = self.__statistics[
+                start : start + self.__STATISTICS_SIZE
+            ]
+            statistics[name] = SendStatistics(
+                int(sent_count), latency_total, latency_max, int(limited_count)
+            )
+
+        return statistics
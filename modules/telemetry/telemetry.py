@@ -2,6 +2,10 @@
 Telemetry gathering logic.
 """
 
+import collections
+import math
+import operator
+import struct
 import time
 
 from pymavlink import mavutil
@@ -12,8 +16,37 @@ from ..common.modules.logger import logger
 class TelemetryData:  # pylint: disable=too-many-instance-attributes
     """
     Python struct to represent Telemtry Data. Contains the most recent attitude and position reading.
+
+    Fields are slots rather than an instance dictionary, so that each sample is compact.
+    Pickles to a fixed layout binary encoding (see to_bytes()) for cheaper queue transport,
+    see CompactTelemetryData for a smaller encoding.
     """
 
+    # Field order of the binary encoding, tuples and history rows
+    __slots__ = (
+        "time_since_boot",
+        "x",
+        "y",
+        "z",
+        "x_velocity",
+        "y_velocity",
+        "z_velocity",
+        "roll",
+        "pitch",
+        "yaw",
+        "roll_speed",
+        "pitch_speed",
+        "yaw_speed",
+    )
+    FIELDS = __slots__
+    __GETTER = operator.attrgetter(*__slots__)
+    # Presence bitmask of the fields that are not None, then time since boot and the 12 floats
+    __CODEC = struct.Struct("<Hq12d")
+    # Same with single precision floats and an unsigned 32 bit time (49 days)
+    __COMPACT_CODEC = struct.Struct("<HI12f")
+    __COMPACT_TIME_MAX = (1 << 32) - 1  # ms
+    __ALL_PRESENT = (1 << len(__slots__)) - 1
+
     def __init__(
         self,
         time_since_boot: int | None = None,  # ms
@@ -44,22 +77,307 @@ class TelemetryData:  # pylint: disable=too-many-instance-attributes
         self.pitch_speed = pitch_speed
         self.yaw_speed = yaw_speed
 
-    def __str__(self) -> str:
-        return f"""{{
-            time_since_boot: {self.time_since_boot},
-            x: {self.x},
-            y: {self.y},
-            z: {self.z},
-            x_velocity: {self.x_velocity},
-            y_velocity: {self.y_velocity},
-            z_velocity: {self.z_velocity},
-            roll: {self.roll},
-            pitch: {self.pitch},
-            yaw: {self.yaw},
-            roll_speed: {self.roll_speed},
-            pitch_speed: {self.pitch_speed},
-            yaw_speed: {self.yaw_speed}
-        }}"""
+    def to_bytes(self, compact: bool = False) -> bytes:
+        """
+        Encodes into the fixed layout binary encoding.
+        Bit i of the presence bitmask is set if field i is not None, otherwise the field is 0 .
+
+        compact: Single precision floats (about 7 significant digits) in 54 bytes
+            instead of double precision in 106 bytes. Times since boot that are negative
+            or do not fit in 32 bits use the double precision encoding.
+
+        Returns the encoding.
+        """
+        time_since_boot, *values = self.__GETTER(self)
+        # Integer time even if set from a float, as struct only packs integers into integers
+        time_value = 0 if time_since_boot is None else int(time_since_boot)
+        codec = self.__CODEC
+        if compact and 0 <= time_value <= self.__COMPACT_TIME_MAX:
+            codec = self.__COMPACT_CODEC
+
+        mask = self.__ALL_PRESENT
+        if time_since_boot is None or None in values:
+            mask = 0 if time_since_boot is None else 1
+            for i, value in enumerate(values, 1):
+                if value is not None:
+                    mask |= 1 << i
+
+            values = [0 if value is None else value for value in values]
+
+        return codec.pack(mask, time_value, *values)
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "TelemetryData":
+        """
+        Decodes from the fixed layout binary encoding.
+
+        data: Encoding from to_bytes(), either layout.
+
+        Returns the decoded TelemetryData.
+        """
+        if len(data) == TelemetryData.__COMPACT_CODEC.size:
+            mask, *values = TelemetryData.__COMPACT_CODEC.unpack(data)
+        else:
+            mask, *values = TelemetryData.__CODEC.unpack(data)
+
+        if mask != TelemetryData.__ALL_PRESENT:
+            values = [value if mask & (1 << i) else None for i, value in enumerate(values)]
+
+        return TelemetryData(*values)
+
+    def __reduce_ex__(self, protocol: int) -> "tuple":
+        # Pickle the binary encoding instead of the instance dictionary
+        # Module function so that it pickles by a short name without an extra reduction
+        return _decode, (self.to_bytes(),)
+
+    def to_tuple(self) -> "tuple":
+        """
+        Returns the fields in FIELDS order.
+        """
+        return self.__GETTER(self)
+
+    @staticmethod
+    def from_tuple(values: "tuple") -> "TelemetryData":
+        """
+        values: Fields in FIELDS order.
+
+        Returns the TelemetryData of the fields.
+        """
+        return TelemetryData(*values)
+
+    def __repr__(self) -> str:
+        # Single line, only built when the string is needed such as when logged
+        return (
+            f"TelemetryData(time_since_boot={self.time_since_boot}, "
+            f"x={self.x}, y={self.y}, z={self.z}, "
+            f"x_velocity={self.x_velocity}, y_velocity={self.y_velocity}, "
+            f"z_velocity={self.z_velocity}, "
+            f"roll={self.roll}, pitch={self.pitch}, yaw={self.yaw}, "
+            f"roll_speed={self.roll_speed}, pitch_speed={self.pitch_speed}, "
+            f"yaw_speed={self.yaw_speed})"
+        )
+
+
+class CompactTelemetryData(TelemetryData):
+    """
+    TelemetryData that pickles to the compact encoding, trading precision for queue transport
+    of 115 bytes instead of 167. Unpickles as TelemetryData.
+    """
+
+    __slots__ = ()
+
+    def __reduce_ex__(self, protocol: int) -> "tuple":
+        return _decode, (self.to_bytes(True),)
+
+
+def _decode(data: bytes) -> TelemetryData:
+    """
+    Unpickles TelemetryData, see TelemetryData.from_bytes() .
+    """
+    return TelemetryData.from_bytes(data)
+
+
+# Fusion modes of TelemetryFuser
+# Latest attitude and position, at the time of the newer one
+LATEST = "latest"
+# Attitude and position interpolated to the same time
+INTERPOLATE = "interpolate"
+FUSION_MODES = [LATEST, INTERPOLATE]
+
+
+class TelemetryFuser:
+    """
+    Keeps the latest ATTITUDE and LOCAL_POSITION_NED and fuses them whenever either updates,
+    so that the output rate tracks the faster stream instead of the slower one.
+
+    In LATEST mode the latest of each are paired if their drone boot times are at most
+    the maximum age apart, so that a stalled stream does not keep being paired with fresh data
+    from the other.
+
+    In INTERPOLATE mode a short history of each is kept, and the output is at the latest time
+    both streams have reached: the stream that is behind is used as is, and the other is
+    linearly interpolated between the samples around that time. Angles take the shortest arc,
+    so that yaw does not spin the long way round when it wraps at pi. Samples around the time
+    must be at most the maximum age apart.
+
+    If the boot time of a stream goes backwards, such as after a reboot, both histories restart.
+    """
+
+    __create_key = object()
+
+    # Number of attitude values that are angles, which are first
+    __ANGLE_COUNT = 3
+
+    @classmethod
+    def create(
+        cls, max_age: float, mode: str = LATEST, history_size: int = 8
+    ) -> "tuple[True, TelemetryFuser] | tuple[False, None]":
+        """
+        Creates a fuser.
+
+        max_age: Maximum time in seconds between the attitude and position that are paired,
+            or between the samples interpolated, must be greater than 0 .
+        mode: One of FUSION_MODES.
+        history_size: Number of samples of each stream kept for interpolation,
+            must be at least 2 .
+
+        Returns the TelemetryFuser object.
+        """
+        if max_age <= 0.0:
+            return False, None
+
+        if mode not in FUSION_MODES:
+            return False, None
+
+        if history_size < 2:
+            return False, None
+
+        return True, TelemetryFuser(
+            cls.__create_key, max_age, 1 if mode == LATEST else history_size
+        )
+
+    def __init__(self, class_private_create_key: object, max_age: float, history_size: int) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is TelemetryFuser.__create_key, "Use create() method"
+
+        self.__max_age_ms = max_age * 1000
+        self.__is_interpolating = history_size > 1
+        # Boot time and values of each sample, oldest first
+        self.__attitudes: "collections.deque[tuple[int, tuple[float, ...]]]" = collections.deque(
+            maxlen=history_size
+        )
+        self.__positions: "collections.deque[tuple[int, tuple[float, ...]]]" = collections.deque(
+            maxlen=history_size
+        )
+        # Boot time of the last interpolated output
+        self.__last_time = -1
+        self.__stale_count = 0
+
+    def update(self, message: object) -> "tuple[True, TelemetryData] | tuple[False, None]":
+        """
+        Adds the message to the history of its type and fuses it with the other type.
+
+        message: ATTITUDE or LOCAL_POSITION_NED message, other types are ignored.
+
+        Returns the fused telemetry.
+        Fails if the other type has not been received or is older than the maximum age,
+        or if the interpolated time has not advanced.
+        """
+        message_type = message.get_type()
+        if message_type == "ATTITUDE":
+            history = self.__attitudes
+            values = (
+                message.roll,
+                message.pitch,
+                message.yaw,
+                message.rollspeed,
+                message.pitchspeed,
+                message.yawspeed,
+            )
+        elif message_type == "LOCAL_POSITION_NED":
+            history = self.__positions
+            values = (message.x, message.y, message.z, message.vx, message.vy, message.vz)
+        else:
+            return False, None
+
+        if len(history) > 0 and message.time_boot_ms < history[-1][0]:
+            self.__attitudes.clear()
+            self.__positions.clear()
+            self.__last_time = -1
+
+        history.append((message.time_boot_ms, values))
+        if len(self.__attitudes) == 0 or len(self.__positions) == 0:
+            return False, None
+
+        if self.__is_interpolating:
+            return self.__fuse_interpolated()
+
+        return self.__fuse_latest()
+
+    def __fuse_latest(self) -> "tuple[True, TelemetryData] | tuple[False, None]":
+        """
+        Pairs the latest attitude and position.
+        """
+        attitude_time, attitude_values = self.__attitudes[-1]
+        position_time, position_values = self.__positions[-1]
+        if abs(attitude_time - position_time) > self.__max_age_ms:
+            self.__stale_count += 1
+            return False, None
+
+        return True, TelemetryData(
+            max(attitude_time, position_time), *position_values, *attitude_values
+        )
+
+    def __fuse_interpolated(self) -> "tuple[True, TelemetryData] | tuple[False, None]":
+        """
+        Interpolates attitude and position to the latest time both have reached.
+        """
+        time_ms = min(self.__attitudes[-1][0], self.__positions[-1][0])
+        if time_ms <= self.__last_time:
+            return False, None
+
+        position_values = self.__interpolate(self.__positions, time_ms, 0)
+        attitude_values = self.__interpolate(self.__attitudes, time_ms, self.__ANGLE_COUNT)
+        if position_values is None or attitude_values is None:
+            self.__stale_count += 1
+            return False, None
+
+        self.__last_time = time_ms
+        return True, TelemetryData(time_ms, *position_values, *attitude_values)
+
+    def __interpolate(
+        self,
+        history: "collections.deque[tuple[int, tuple[float, ...]]]",
+        time_ms: int,
+        angle_count: int,
+    ) -> "tuple[float, ...] | None":
+        """
+        Values of the history at the time, no later than its latest sample.
+
+        angle_count: Number of leading values that are angles in radians.
+
+        Returns None if there is no sample at or before the time,
+        or the samples around it are further apart than the maximum age.
+        """
+        later = None
+        for earlier in reversed(history):
+            if earlier[0] <= time_ms:
+                break
+
+            later = earlier
+        else:
+            return None
+
+        earlier_time, earlier_values = earlier
+        if earlier_time == time_ms:
+            return earlier_values
+
+        later_time, later_values = later
+        if later_time - earlier_time > self.__max_age_ms:
+            return None
+
+        fraction = (time_ms - earlier_time) / (later_time - earlier_time)
+        values = []
+        for i, (start, end) in enumerate(zip(earlier_values, later_values)):
+            if i < angle_count:
+                # Shortest arc, wrapped back into [-pi, pi]
+                values.append(
+                    math.remainder(
+                        start + fraction * math.remainder(end - start, math.tau), math.tau
+                    )
+                )
+            else:
+                values.append(start + fraction * (end - start))
+
+        return tuple(values)
+
+    def get_stale_count(self) -> int:
+        """
+        Returns the number of updates not fused because the samples were too far apart.
+        """
+        return self.__stale_count
 
 
 # =================================================================================================
@@ -79,71 +397,63 @@ class Telemetry:
         cls,
         connection: mavutil.mavfile,
         local_logger: logger.Logger,
+        max_age: float = 0.5,
+        mode: str = LATEST,
     ) -> "tuple[True, Telemetry] | tuple[False, None]":
         """
         Falliable create (instantiation) method to create a Telemetry object.
+
+        max_age: Maximum time in seconds between the attitude and position that are fused.
+        mode: Fusion mode, one of FUSION_MODES.
         """
-        return True, cls(cls.__private_key, connection, local_logger)
+        result, fuser = TelemetryFuser.create(max_age, mode)
+        if not result:
+            local_logger.error(f"Invalid fusion settings: {max_age} s, {mode}", True)
+            return False, None
+
+        return True, cls(cls.__private_key, connection, local_logger, fuser)
 
     def __init__(
         self,
         key: object,
         connection: mavutil.mavfile,
         local_logger: logger.Logger,
+        fuser: TelemetryFuser,
     ) -> None:
         assert key is Telemetry.__private_key, "Use create() method"
 
         self.connection = connection
         self.logger = local_logger
+        self.fuser = fuser
         self.read_timeout = 1.0
 
     def run(
         self,
     ) -> "tuple[True, TelemetryData] | tuple[False, None]":
         """
-        Receive LOCAL_POSITION_NED and ATTITUDE messages from the drone,
-        combining them together to form a single TelemetryData object.
+        Receive LOCAL_POSITION_NED and ATTITUDE messages from the drone until either update
+        pairs with the latest of the other, combining them together to form a single
+        TelemetryData object.
         """
-        start = time.time()
-        end = start + self.read_timeout
-        position_msg = None
-        attitude_msg = None
-
-        while time.time() < end:
+        end = time.time() + self.read_timeout
+        while True:
             remaining = end - time.time()
+            if remaining <= 0.0:
+                break
+
             msg = self.connection.recv_match(
                 type=["LOCAL_POSITION_NED", "ATTITUDE"], blocking=True, timeout=remaining
             )
             if msg is None:
                 continue
 
-            if position_msg is None and msg.get_type() == "LOCAL_POSITION_NED":
-                position_msg = msg
-                self.logger.info("Received LOCAL_POSITION_NED", True)
-            if attitude_msg is None and msg.get_type() == "ATTITUDE":
-                attitude_msg = msg
-                self.logger.info("Received ATTITUDE", True)
-
-            if position_msg is not None and attitude_msg is not None:
-                telemetry_data = TelemetryData(
-                    time_since_boot=max(attitude_msg.time_boot_ms, position_msg.time_boot_ms),
-                    x=position_msg.x,
-                    y=position_msg.y,
-                    z=position_msg.z,
-                    x_velocity=position_msg.vx,
-                    y_velocity=position_msg.vy,
-                    z_velocity=position_msg.vz,
-                    roll=attitude_msg.roll,
-                    pitch=attitude_msg.pitch,
-                    yaw=attitude_msg.yaw,
-                    roll_speed=attitude_msg.rollspeed,
-                    pitch_speed=attitude_msg.pitchspeed,
-                    yaw_speed=attitude_msg.yawspeed,
-                )
-                self.logger.info("Created TelemetryData", True)
+            result, telemetry_data = self.fuser.update(msg)
+            if result:
                 return True, telemetry_data
 
-        self.logger.error("Timeout: Did not receive both messages within 1 second", True)
+        self.logger.error(
+            f"Timeout: Did not receive a fresh pair within {self.read_timeout} seconds", True
+        )
         return False, None
 
 
@@ -0,0 +1,284 @@
+"""
+Telemetry history in shared memory, with windowed queries.
+"""
+
+import ctypes
+import math
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from . import telemetry
+
+
+# Row of each field in the history and column in query results
+FIELD_INDEX = {name: i for i, name in enumerate(telemetry.TelemetryData.FIELDS)}
+
+
+def to_row(telemetry_data: telemetry.TelemetryData) -> np.ndarray:
+    """
+    telemetry_data: Telemetry to convert.
+
+    Returns the fields in FIELDS order as a float64 row, with None as NaN.
+    """
+    values = telemetry_data.to_tuple()
+    if None in values:
+        values = [np.nan if value is None else value for value in values]
+
+    return np.array(values, dtype=np.float64)
+
+
+def from_row(row: np.ndarray) -> telemetry.TelemetryData:
+    """
+    row: Fields in FIELDS order, such as from to_row() or a query, with NaN as None.
+
+    Returns the TelemetryData of the row.
+    """
+    time_since_boot, *values = row.tolist()
+    values = [None if math.isnan(value) else value for value in values]
+    if math.isnan(time_since_boot):
+        return telemetry.TelemetryData(None, *values)
+
+    return telemetry.TelemetryData(int(time_since_boot), *values)
+
+
+class WindowStatistics:
+    """
+    Statistics of each field over a window, arrays in FIELDS order.
+    Fields that are None (NaN) are left out, and are NaN if the field has no values.
+    """
+
+    def __init__(
+        self,
+        count: np.ndarray,
+        mean: np.ndarray,
+        variance: np.ndarray,
+        minimum: np.ndarray,
+        maximum: np.ndarray,
+    ) -> None:
+        # Number of values of each field
+        self.count = count
+        self.mean = mean
+        # Population variance
+        self.variance = variance
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def __str__(self) -> str:
+        return ", ".join(
+            f"{name}: {self.mean[i]:.3f} (var {self.variance[i]:.3f}, "
+            f"{self.minimum[i]:.3f} to {self.maximum[i]:.3f})"
+            for name, i in FIELD_INDEX.items()
+        )
+
+
+class TelemetryHistory:
+    """
+    Ring buffer of the latest telemetry, one preallocated float64 row per field in shared memory
+    so that queries are vectorized over a field. None is stored as NaN.
+
+    One process appends through the history returned by create(), and any number of processes
+    query through readers from get_reader(), which map the memory read only.
+    Like a queue, the history is passed to workers when they are started.
+
+    A sequence lock keeps queries consistent without blocking the writer: the sequence is odd
+    while a row is written, and a query retries if the sequence changed while it read.
+    Queries copy only the rows of their window.
+    """
+
+    __create_key = object()
+
+    # Sequence lock and total number of appends
+    __HEADER_LENGTH = 2
+
+    @classmethod
+    def create(cls, capacity: int) -> "tuple[True, TelemetryHistory] | tuple[False, None]":
+        """
+        Creates a history and its shared memory.
+
+        capacity: Number of telemetry kept, must be greater than 0 .
+
+        Returns the writer of the TelemetryHistory.
+        """
+        if capacity <= 0:
+            return False, None
+
+        # Written under the sequence lock instead of a lock
+        header = mp.RawArray(ctypes.c_int64, cls.__HEADER_LENGTH)
+        data = mp.RawArray(ctypes.c_double, len(telemetry.TelemetryData.FIELDS) * capacity)
+
+        return True, TelemetryHistory(cls.__create_key, header, data, capacity, True)
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        header: "ctypes.Array[ctypes.c_int64]",
+        data: "ctypes.Array[ctypes.c_double]",
+        capacity: int,
+        is_writer: bool,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is TelemetryHistory.__create_key, "Use create() method"
+
+        self.__shared_header = header
+        self.__shared_data = data
+        self.__capacity = capacity
+        self.__is_writer = is_writer
+        self.__map()
+
+        if is_writer:
+            self.__data[:] = np.nan
+
+    def __map(self) -> None:
+        """
+        Maps the header and data arrays onto the shared memory.
+        """
+        self.__header = np.frombuffer(self.__shared_header, dtype=np.int64)
+        self.__data = np.frombuffer(self.__shared_data, dtype=np.float64).reshape(
+            len(telemetry.TelemetryData.FIELDS), self.__capacity
+        )
+        if not self.__is_writer:
+            self.__data.flags.writeable = False
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # Arrays are mapped again onto the shared memory in the other process
+        del state["_TelemetryHistory__header"]
+        del state["_TelemetryHistory__data"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__map()
+
+    def get_reader(self) -> "TelemetryHistory":
+        """
+        Returns a read only history of the same shared memory.
+        """
+        return TelemetryHistory(
+            TelemetryHistory.__create_key,
+            self.__shared_header,
+            self.__shared_data,
+            self.__capacity,
+            False,
+        )
+
+    def append(self, telemetry_data: telemetry.TelemetryData) -> bool:
+        """
+        Adds telemetry, replacing the oldest if full. Only one process may append.
+
+        telemetry_data: Telemetry to add.
+
+        Returns whether it was added, which fails on readers.
+        """
+        if not self.__is_writer:
+            return False
+
+        header = self.__header
+        count = int(header[1])
+        header[0] += 1
+        self.__data[:, count % self.__capacity] = to_row(telemetry_data)
+        header[1] = count + 1
+        header[0] += 1
+
+        return True
+
+    def __read(self, window_size: int | None) -> np.ndarray:
+        """
+        Copies the latest rows consistently.
+
+        window_size: Number of latest telemetry, None for all.
+
+        Returns the window, one row per field and one column per telemetry, oldest first.
+        """
+        header = self.__header
+        while True:
+            sequence = int(header[0])
+            if sequence % 2 == 1:
+                # Let the writer finish
+                time.sleep(0)
+                continue
+
+            count = int(header[1])
+            available = min(count, self.__capacity)
+            if window_size is not None:
+                available = min(available, max(window_size, 0))
+
+            indices = np.arange(count - available, count) % self.__capacity
+            window = self.__data[:, indices]
+            if int(header[0]) == sequence:
+                return window
+
+    def get_count(self) -> int:
+        """
+        Returns the number of telemetry kept.
+        """
+        return min(int(self.__header[1]), self.__capacity)
+
+    def get_capacity(self) -> int:
+        """
+        Returns the maximum number of telemetry kept.
+        """
+        return self.__capacity
+
+    def get_last(self, count: int) -> np.ndarray:
+        """
+        count: Number of latest telemetry.
+
+        Returns up to count rows in FIELDS order, oldest first.
+        Convert a row with from_row() .
+        """
+        return self.__read(count).T
+
+    def get_time_range(self, start: int, end: int) -> np.ndarray:
+        """
+        start: First time since boot in ms, inclusive.
+        end: Last time since boot in ms, inclusive.
+
+        Returns the rows in FIELDS order with a time since boot in the range, oldest first.
+        """
+        window = self.__read(None)
+        times = window[FIELD_INDEX["time_since_boot"]]
+        return window[:, (times >= start) & (times <= end)].T
+
+    def get_statistics(self, count: int | None = None) -> WindowStatistics:
+        """
+        count: Number of latest telemetry, None for all.
+
+        Returns the statistics of each field over the window.
+        """
+        return self.__get_window_statistics(self.__read(count))
+
+    def get_time_range_statistics(self, start: int, end: int) -> WindowStatistics:
+        """
+        start: First time since boot in ms, inclusive.
+        end: Last time since boot in ms, inclusive.
+
+        Returns the statistics of each field over the telemetry with a time since boot in the range.
+        """
+        return self.__get_window_statistics(self.get_time_range(start, end).T)
+
+    @staticmethod
+    def __get_window_statistics(window: np.ndarray) -> WindowStatistics:
+        """
+        window: One row per field and one column per telemetry.
+
+        Returns the statistics of each field over the window.
+        """
+        is_value = ~np.isnan(window)
+        value_count = is_value.sum(axis=1)
+
+        # Fields without values divide by 0 into NaN
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(is_value, window, 0.0).sum(axis=1) / value_count
+            deviation = np.where(is_value, window - mean[:, np.newaxis], 0.0)
+            variance = (deviation * deviation).sum(axis=1) / value_count
+
+        has_values = value_count > 0
+        minimum = np.where(has_values, np.fmin.reduce(window, axis=1, initial=np.inf), np.nan)
+        maximum = np.where(has_values, np.fmax.reduce(window, axis=1, initial=-np.inf), np.nan)
+
+        return WindowStatistics(value_count, mean, variance, minimum, maximum)
@@ -10,14 +10,20 @@ from pymavlink import mavutil
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
 from . import telemetry
+from . import telemetry_history
 from ..common.modules.logger import logger
 
 
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
+# Log one in this many sent samples, formatting every sample slows down the loop
+SENT_LOG_PERIOD = 10
+
+
 def telemetry_worker(
     connection: mavutil.mavfile,
+    history: telemetry_history.TelemetryHistory,
     output_queue: queue_proxy_wrapper.QueueProxyWrapper,
     controller: worker_controller.WorkerController,
 ) -> None:
@@ -25,6 +31,7 @@ def telemetry_worker(
     Worker process.
 
     connection: MAVLink connetcion to drone
+    history: history to append TelemetryData to, only one worker may append
     output_queue: queue to send TelemetryData
     controller: worker controller for pause/exit requests
     """
@@ -49,22 +56,37 @@ def telemetry_worker(
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
     # Instantiate class object (telemetry.Telemetry)
-    result, telemetry_object = telemetry.Telemetry.create(connection, local_logger)
+    # Interpolate so that command acts on attitude and position from the same time
+    result, telemetry_object = telemetry.Telemetry.create(
+        connection, local_logger, mode=telemetry.INTERPOLATE
+    )
     if not result:
         local_logger.error("Failed to create telemetry", True)
         return
     local_logger.info("Telemetry created", True)
 
+    sent_count = 0
+
     # Main loop: do work.
     while not controller.is_exit_requested():
         controller.check_pause()
         result, telemetry_data = telemetry_object.run()
         if result and telemetry_data is not None:
+            # Appended first so that it is in the history once a consumer receives it
+            history.append(telemetry_data)
             output_queue.queue.put(telemetry_data)
-            local_logger.info(f"Sent telemetry data: {telemetry_data}", True)
+            if sent_count % SENT_LOG_PERIOD == 0:
+                local_logger.info(f"Sent telemetry data: {telemetry_data}", True)
+            sent_count += 1
         else:
             local_logger.warning("Telemetry timeout", True)
 
+    local_logger.info(
+        f"Updates not fused because the samples were too far apart: "
+        f"{telemetry_object.fuser.get_stale_count()}",
+        True,
+    )
+
 
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
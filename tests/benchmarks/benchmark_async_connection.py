@@ -0,0 +1,138 @@
+"""
+Benchmark the time from a drone sending a message until it is received,
+blocking in recv_match() and awaiting a subscription of the asyncio connection.
+To run:
+```
+python -m tests.benchmarks.benchmark_async_connection
+```
+"""
+
+import asyncio
+import statistics
+import threading
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.mavlink_async import async_connection
+
+
+BASE_PORT = 14610
+SEND_PERIOD = 0.01  # seconds
+MESSAGE_COUNT = 200
+# Other subscriptions on the same event loop, like heartbeat monitoring and command output
+OTHER_SUBSCRIPTION_COUNT = 2
+
+
+def send_attitudes(port: int, base: float, stop: threading.Event) -> None:
+    """
+    Mocked drone that sends its send time since the base in the roll of every attitude,
+    and a heartbeat in between.
+    """
+    connection = mavutil.mavlink_connection(
+        f"udpout:127.0.0.1:{port}", source_system=1, source_component=0
+    )
+    while not stop.is_set():
+        connection.mav.attitude_send(0, time.perf_counter() - base, 0, 0, 0, 0, 0)
+        connection.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_QUADROTOR, 0, 0, 0, 0)
+        time.sleep(SEND_PERIOD)
+
+    connection.close()
+
+
+def measure_recv_match(port: int, base: float) -> "list[float]":
+    """
+    Returns the latencies in seconds of recv_match().
+    """
+    connection = mavutil.mavlink_connection(f"udpin:127.0.0.1:{port}")
+    latencies = []
+    while len(latencies) < MESSAGE_COUNT:
+        message = connection.recv_match(type="ATTITUDE", blocking=True, timeout=1.0)
+        if message is not None:
+            latencies.append(time.perf_counter() - base - message.roll)
+
+    connection.close()
+    return latencies
+
+
+async def measure_subscription(
+    port: int, base: float, local_logger: logger.Logger
+) -> "list[float]":
+    """
+    Returns the latencies in seconds of the asyncio subscription.
+    """
+    result, connection = await async_connection.AsyncMavlinkConnection.create(
+        f"udpin:127.0.0.1:{port}", local_logger
+    )
+    assert result
+    assert connection is not None
+
+    async def drain(subscription: async_connection.Subscription) -> None:
+        async for _ in subscription:
+            pass
+
+    others = [
+        asyncio.create_task(drain(connection.subscribe("HEARTBEAT")))
+        for _ in range(0, OTHER_SUBSCRIPTION_COUNT)
+    ]
+
+    latencies = []
+    async for message in connection.subscribe("ATTITUDE"):
+        latencies.append(time.perf_counter() - base - message.roll)
+        if len(latencies) == MESSAGE_COUNT:
+            break
+
+    await connection.close()
+    await asyncio.gather(*others)
+    return latencies
+
+
+def run(name: str, port: int, measure: "(int, float) -> list[float]") -> None:  # type: ignore
+    """
+    Runs the drone while measuring and prints the latencies.
+    """
+    base = time.perf_counter()
+    stop = threading.Event()
+    drone = threading.Thread(target=send_attitudes, args=(port, base, stop))
+    drone.start()
+    latencies = measure(port, base)
+    stop.set()
+    drone.join()
+
+    latencies.sort()
+    print(
+        f"{name:>12}: median {statistics.median(latencies) * 1e6:>7.1f} us, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:>7.1f} us, "
+        f"max {latencies[-1] * 1e6:>7.1f} us"
+    )
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, local_logger = logger.Logger.create("benchmark_async_connection", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    run("recv_match", BASE_PORT, measure_recv_match)
+    run(
+        "subscribe",
+        BASE_PORT + 1,
+        lambda port, base: asyncio.run(measure_subscription(port, base, local_logger)),
+    )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,118 @@
+"""
+Benchmark routing frames by message ID against parsing every frame and filtering by type,
+on a busy link where only HEARTBEAT, ATTITUDE and LOCAL_POSITION_NED are used. To run:
+```
+python -m tests.benchmarks.benchmark_frame_router
+```
+"""
+
+import timeit
+
+from pymavlink import mavutil
+
+from modules.mavlink_hub import frame_router
+
+
+STREAM_REPEATS = 200
+CHUNK_SIZE = 4096
+REPEATS = 5
+USED_TYPES = ["HEARTBEAT", "ATTITUDE", "LOCAL_POSITION_NED"]
+
+
+def make_stream(mav: mavutil.mavlink.MAVLink) -> bytes:
+    """
+    Mix of the messages an autopilot streams, most of which are not used.
+    """
+    frames = [
+        mav.heartbeat_encode(6, 8, 0, 0, 0),
+        mav.attitude_encode(1, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0),
+        mav.local_position_ned_encode(1, 1.0, 2.0, 3.0, 0.1, 0.2, 0.3),
+        mav.sys_status_encode(0, 0, 0, 500, 12000, 100, 90, 0, 0, 0, 0, 0, 0),
+        mav.system_time_encode(0, 0),
+        mav.gps_raw_int_encode(0, 3, 0, 0, 0, 0, 0, 0, 0, 10),
+        mav.global_position_int_encode(1, 0, 0, 0, 0, 0, 0, 0, 0),
+        mav.vfr_hud_encode(0.0, 0.0, 0, 0, 0.0, 0.0),
+        mav.servo_output_raw_encode(0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+        mav.rc_channels_encode(0, 8, *([1500] * 18), 255),
+        mav.scaled_imu_encode(0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+        mav.raw_imu_encode(0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+    ]
+    return b"".join(frame.pack(mav) for frame in frames) * STREAM_REPEATS
+
+
+def chunks(stream: bytes) -> "list[bytes]":
+    """
+    Stream split as it is received from the connection.
+    """
+    return [stream[i : i + CHUNK_SIZE] for i in range(0, len(stream), CHUNK_SIZE)]
+
+
+def parse_and_filter(data: "list[bytes]") -> int:
+    """
+    Decodes every frame and compares its type, as recv_match() does.
+
+    Returns the number of used messages.
+    """
+    mav = mavutil.mavlink.MAVLink(None)
+    mav.robust_parsing = True
+    count = 0
+    for chunk in data:
+        messages = mav.parse_buffer(chunk)
+        if messages is None:
+            continue
+
+        for message in messages:
+            if message.get_type() in USED_TYPES:
+                count += 1
+
+    return count
+
+
+def route(data: "list[bytes]") -> int:
+    """
+    Decodes only the frames of the used message IDs.
+
+    Returns the number of used messages.
+    """
+    router = frame_router.FrameRouter(mavutil.mavlink.MAVLink(None))
+    messages = []
+    router.set_routes(
+        {
+            getattr(mavutil.mavlink, f"MAVLINK_MSG_ID_{name}"): [messages.append]
+            for name in USED_TYPES
+        }
+    )
+    for chunk in data:
+        router.feed(chunk)
+
+    return len(messages)
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    data = chunks(make_stream(mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)))
+    frame_count = 12 * STREAM_REPEATS
+
+    expected = parse_and_filter(data)
+    if route(data) != expected:
+        print("Routed message count does not match")
+        return -1
+
+    for name, function in [("Parse and filter", parse_and_filter), ("Route", route)]:
+        elapsed = min(timeit.repeat(lambda f=function: f(data), number=1, repeat=REPEATS))
+        print(
+            f"{name:>16}: {elapsed * 1000:.2f} ms, "
+            f"{elapsed / frame_count * 1e6:.2f} us per frame, {expected} used messages"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,75 @@
+"""
+Benchmark batched queue operations at different batch sizes. To run:
+```
+python -m tests.benchmarks.benchmark_queue_batching
+```
+"""
+
+import multiprocessing as mp
+import time
+
+from tests.benchmarks import benchmark_queue_transport
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_queue
+
+
+MESSAGES = 20_000
+BATCH_SIZES = [1, 8, 64]
+QUEUE_MAX_SIZE = 128
+
+
+def batch_producer(
+    count: int, batch_size: int, output_queue: queue_proxy_wrapper.QueueProxyWrapper
+) -> None:
+    """
+    Puts count payloads in batches followed by the sentinel (None).
+    """
+    for start in range(0, count, batch_size):
+        stop = min(start + batch_size, count)
+        output_queue.put_many(
+            [benchmark_queue_transport.make_payload(i) for i in range(start, stop)]
+        )
+
+    output_queue.queue.put(None)
+
+
+def measure_throughput(wrapper: queue_proxy_wrapper.QueueProxyWrapper, batch_size: int) -> float:
+    """
+    Returns messages per second from a producer process to this process.
+    """
+    worker = mp.Process(target=batch_producer, args=(MESSAGES, batch_size, wrapper))
+    start = time.perf_counter()
+    worker.start()
+    done = False
+    while not done:
+        done = None in wrapper.get_many(batch_size)
+
+    elapsed = time.perf_counter() - start
+    worker.join()
+
+    return MESSAGES / elapsed
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    mp_manager = queue_proxy_wrapper.create_manager()
+
+    for name, wrapper_type in [
+        ("Manager queue", queue_proxy_wrapper.QueueProxyWrapper),
+        ("Shared memory", shared_memory_queue.SharedMemoryQueueWrapper),
+    ]:
+        for batch_size in BATCH_SIZES:
+            throughput = measure_throughput(wrapper_type(mp_manager, QUEUE_MAX_SIZE), batch_size)
+            print(f"{name:>14}, batch {batch_size:>2}: {throughput:>9.0f} msg/s")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,142 @@
+"""
+Benchmark the manager queue against the shared memory ring buffer. To run:
+```
+python -m tests.benchmarks.benchmark_queue_transport
+```
+"""
+
+import multiprocessing as mp
+import multiprocessing.managers
+import statistics
+import time
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_queue
+
+
+THROUGHPUT_MESSAGES = 20_000
+LATENCY_MESSAGES = 2_000
+QUEUE_MAX_SIZE = 10
+
+
+def make_payload(index: int) -> dict:
+    """
+    Same fields as a pickled TelemetryData instance dictionary.
+    """
+    return {
+        "time_since_boot": index,
+        "x": 1.0,
+        "y": 2.0,
+        "z": 3.0,
+        "x_velocity": 0.1,
+        "y_velocity": 0.2,
+        "z_velocity": 0.3,
+        "roll": 0.01,
+        "pitch": 0.02,
+        "yaw": 0.03,
+        "roll_speed": 0.001,
+        "pitch_speed": 0.002,
+        "yaw_speed": 0.003,
+    }
+
+
+def producer(count: int, output_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+    """
+    Puts count payloads followed by the sentinel (None).
+    """
+    for i in range(count):
+        output_queue.queue.put(make_payload(i))
+
+    output_queue.queue.put(None)
+
+
+def echo(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+) -> None:
+    """
+    Echoes items until the sentinel (None).
+    """
+    while True:
+        item = input_queue.queue.get()
+        output_queue.queue.put(item)
+        if item is None:
+            return
+
+
+def measure_throughput(wrapper: queue_proxy_wrapper.QueueProxyWrapper) -> float:
+    """
+    Returns messages per second from a producer process to this process.
+    """
+    worker = mp.Process(target=producer, args=(THROUGHPUT_MESSAGES, wrapper))
+    start = time.perf_counter()
+    worker.start()
+    while wrapper.queue.get() is not None:
+        pass
+
+    elapsed = time.perf_counter() - start
+    worker.join()
+
+    return THROUGHPUT_MESSAGES / elapsed
+
+
+def measure_latency(
+    request_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    response_queue: queue_proxy_wrapper.QueueProxyWrapper,
+) -> "tuple[float, float]":
+    """
+    Returns the median and 99th percentile one way latency in seconds,
+    taken as half of the round trip through an echo process.
+    """
+    worker = mp.Process(target=echo, args=(request_queue, response_queue))
+    worker.start()
+
+    latencies = []
+    for i in range(LATENCY_MESSAGES):
+        payload = make_payload(i)
+        start = time.perf_counter()
+        request_queue.queue.put(payload)
+        response_queue.queue.get()
+        latencies.append((time.perf_counter() - start) / 2)
+
+    request_queue.queue.put(None)
+    response_queue.queue.get()
+    worker.join()
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return statistics.median(latencies), percentiles[98]
+
+
+def run(name: str, wrapper_type: type, mp_manager: multiprocessing.managers.SyncManager) -> None:
+    """
+    Runs and prints all measurements for a queue type.
+    """
+    throughput = measure_throughput(wrapper_type(mp_manager, QUEUE_MAX_SIZE))
+    median, p99 = measure_latency(
+        wrapper_type(mp_manager, QUEUE_MAX_SIZE),
+        wrapper_type(mp_manager, QUEUE_MAX_SIZE),
+    )
+    print(
+        f"{name:>14}: {throughput:>9.0f} msg/s, "
+        f"latency p50 {median * 1e6:>7.1f} us, p99 {p99 * 1e6:>7.1f} us"
+    )
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    mp_manager = queue_proxy_wrapper.create_manager()
+
+    run("Manager queue", queue_proxy_wrapper.QueueProxyWrapper, mp_manager)
+    run("Shared memory", shared_memory_queue.SharedMemoryQueueWrapper, mp_manager)
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
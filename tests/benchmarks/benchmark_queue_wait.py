@@ -0,0 +1,109 @@
+"""
+Benchmark the main loop idle CPU and wake up latency of busy polling against wait_any. To run:
+```
+python -m tests.benchmarks.benchmark_queue_wait
+```
+"""
+
+import multiprocessing as mp
+import statistics
+import time
+
+from utilities.workers import queue_notifier
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_wait
+
+
+IDLE_TIME = 1.0  # seconds
+SAMPLES = 200
+PUT_PERIOD = 0.005  # seconds
+
+
+def timestamp_producer(count: int, output_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+    """
+    Puts the time of putting periodically, followed by the sentinel (None).
+    """
+    for _ in range(count):
+        time.sleep(PUT_PERIOD)
+        output_queue.queue.put(time.perf_counter())
+
+    output_queue.queue.put(None)
+
+
+def poll(queues: "list[queue_proxy_wrapper.QueueProxyWrapper]", timeout: float) -> list:
+    """
+    Busy polls the queues as the main loop did, returns the items of the first non empty one.
+    """
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        for wrapper in queues:
+            if not wrapper.queue.empty():
+                return wrapper.get_many(SAMPLES, 0.0)
+
+    return []
+
+
+def wait(queues: "list[queue_proxy_wrapper.QueueProxyWrapper]", timeout: float) -> list:
+    """
+    Blocks on the queues, returns the items of the first non empty one.
+    """
+    _, ready_queues = queue_wait.wait_any(queues, timeout)
+    if len(ready_queues) == 0:
+        return []
+
+    return ready_queues[0].get_many(SAMPLES, 0.0)
+
+
+def measure(queues: "list[queue_proxy_wrapper.QueueProxyWrapper]", read: "(...) -> list") -> "tuple[float, float, float]":  # type: ignore
+    """
+    Returns the fraction of a core used while idle, and the median and 99th percentile
+    latency in seconds from a put in another process until main has the item.
+    """
+    start = time.process_time()
+    read(queues, IDLE_TIME)
+    idle_cpu = (time.process_time() - start) / IDLE_TIME
+
+    worker = mp.Process(target=timestamp_producer, args=(SAMPLES, queues[-1]))
+    worker.start()
+    latencies = []
+    done = False
+    while not done:
+        for item in read(queues, IDLE_TIME):
+            if item is None:
+                done = True
+                break
+
+            latencies.append(time.perf_counter() - item)
+
+    worker.join()
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return idle_cpu, statistics.median(latencies), percentiles[98]
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    mp_manager = queue_proxy_wrapper.create_manager()
+    notifier = queue_notifier.QueueNotifier()
+    queues = [
+        queue_proxy_wrapper.QueueProxyWrapper(mp_manager, notifier=notifier) for _ in range(2)
+    ]
+
+    for name, read in [("Busy polling", poll), ("Wait any", wait)]:
+        idle_cpu, median, p99 = measure(queues, read)
+        print(
+            f"{name:>12}: idle CPU {idle_cpu * 100:5.1f} %, "
+            f"latency p50 {median * 1e6:7.0f} us, p99 {p99 * 1e6:7.0f} us"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
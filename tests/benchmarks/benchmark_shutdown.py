@@ -0,0 +1,115 @@
+"""
+Benchmark stopping a four stage pipeline with fill and drain against closing the queues. To run:
+```
+python -m tests.benchmarks.benchmark_shutdown
+```
+"""
+
+import multiprocessing as mp
+import multiprocessing.managers
+import time
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+QUEUE_MAX_SIZE = 10
+RUN_TIME = 0.5  # seconds
+JOIN_TIMEOUT = 5.0  # seconds
+REPEATS = 3
+
+
+def source(
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Puts numbers as fast as possible.
+    """
+    i = 0
+    while not controller.is_exit_requested():
+        output_queue.queue.put(i)
+        i += 1
+
+
+def relay(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Passes items on until the sentinel (None).
+    """
+    while not controller.is_exit_requested():
+        item = input_queue.queue.get()
+        if item is None:
+            break
+
+        output_queue.queue.put(item)
+
+
+def sink(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Discards items until the sentinel (None).
+    """
+    while not controller.is_exit_requested():
+        if input_queue.queue.get() is None:
+            break
+
+
+def measure_stop(mp_manager: multiprocessing.managers.SyncManager, is_close: bool) -> float:
+    """
+    Returns the seconds from the exit request until all workers have been joined.
+    """
+    controller = worker_controller.WorkerController()
+    queues = [queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE) for _ in range(3)]
+    workers = [
+        mp.Process(target=source, args=(queues[0], controller)),
+        mp.Process(target=relay, args=(queues[0], queues[1], controller)),
+        mp.Process(target=relay, args=(queues[1], queues[2], controller)),
+        mp.Process(target=sink, args=(queues[2], controller)),
+    ]
+    for worker in workers:
+        worker.start()
+
+    time.sleep(RUN_TIME)
+
+    start = time.perf_counter()
+    controller.request_exit()
+    for wrapper in queues:
+        if is_close:
+            wrapper.close()
+        else:
+            wrapper.fill_and_drain_queue()
+
+    for worker in workers:
+        worker.join(JOIN_TIMEOUT)
+        if worker.is_alive():
+            worker.kill()
+            worker.join()
+
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    mp_manager = queue_proxy_wrapper.create_manager()
+
+    for name, is_close in [("Fill and drain", False), ("Close", True)]:
+        elapsed = min(measure_stop(mp_manager, is_close) for _ in range(REPEATS))
+        print(f"{name:>14}: {elapsed * 1000:.1f} ms")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
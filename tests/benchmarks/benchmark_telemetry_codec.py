@@ -0,0 +1,115 @@
+"""
+Benchmark the TelemetryData binary encoding against pickling the instance dictionary. To run:
+```
+python -m tests.benchmarks.benchmark_telemetry_codec
+```
+"""
+
+import multiprocessing as mp
+import multiprocessing.managers
+import pickle
+import time
+import timeit
+
+from modules.telemetry import telemetry
+from utilities.workers import queue_proxy_wrapper
+
+
+CODEC_NUMBER = 10_000
+CODEC_REPEATS = 25
+QUEUE_MESSAGES = 20_000
+QUEUE_MAX_SIZE = 10
+QUEUE_REPEATS = 3
+
+
+class DictTelemetryData(telemetry.TelemetryData):
+    """
+    TelemetryData pickled as a whole instance dictionary, as before the binary encoding.
+    """
+
+    __reduce_ex__ = object.__reduce_ex__
+
+
+def make_telemetry_data(telemetry_type: type, index: int) -> telemetry.TelemetryData:
+    """
+    Telemetry with every field set.
+    """
+    return telemetry_type(
+        index, 1.0, 2.0, 3.0, 0.1, 0.2, 0.3, 0.01, 0.02, 0.03, 0.001, 0.002, 0.003
+    )
+
+
+def producer(
+    telemetry_type: type, count: int, output_queue: queue_proxy_wrapper.QueueProxyWrapper
+) -> None:
+    """
+    Puts count telemetry data followed by the sentinel (None).
+    """
+    for i in range(count):
+        output_queue.queue.put(make_telemetry_data(telemetry_type, i))
+
+    output_queue.queue.put(None)
+
+
+def measure_codec(telemetry_type: type) -> "tuple[int, float, float]":
+    """
+    Returns the pickled size in bytes and the best encode and decode times in seconds.
+    """
+    telemetry_data = make_telemetry_data(telemetry_type, 0)
+    data = pickle.dumps(telemetry_data)
+
+    encode = timeit.repeat(
+        lambda: pickle.dumps(telemetry_data), number=CODEC_NUMBER, repeat=CODEC_REPEATS
+    )
+    decode = timeit.repeat(lambda: pickle.loads(data), number=CODEC_NUMBER, repeat=CODEC_REPEATS)
+
+    return len(data), min(encode) / CODEC_NUMBER, min(decode) / CODEC_NUMBER
+
+
+def measure_queue(telemetry_type: type, mp_manager: multiprocessing.managers.SyncManager) -> float:
+    """
+    Returns the best messages per second through a manager queue from a producer process.
+    """
+    best = 0.0
+    for _ in range(QUEUE_REPEATS):
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE)
+        worker = mp.Process(target=producer, args=(telemetry_type, QUEUE_MESSAGES, wrapper))
+        start = time.perf_counter()
+        worker.start()
+        while wrapper.queue.get() is not None:
+            pass
+
+        elapsed = time.perf_counter() - start
+        worker.join()
+        best = max(best, QUEUE_MESSAGES / elapsed)
+
+    return best
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    mp_manager = queue_proxy_wrapper.create_manager()
+
+    for name, telemetry_type in [
+        ("Dictionary", DictTelemetryData),
+        ("Binary", telemetry.TelemetryData),
+        ("Compact", telemetry.CompactTelemetryData),
+    ]:
+        size, encode, decode = measure_codec(telemetry_type)
+        throughput = measure_queue(telemetry_type, mp_manager)
+        print(
+            f"{name:>10}: {size:>3} bytes, encode {encode * 1e6:.2f} us, "
+            f"decode {decode * 1e6:.2f} us, queue {throughput:.0f} msg/s"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
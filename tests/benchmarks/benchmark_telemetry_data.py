@@ -0,0 +1,110 @@
+"""
+Benchmark the memory and formatting of TelemetryData against the instance dictionary
+and multi line string it used before. To run:
+```
+python -m tests.benchmarks.benchmark_telemetry_data
+```
+"""
+
+import timeit
+import tracemalloc
+
+from modules.telemetry import telemetry
+
+
+INSTANCES = 100_000
+FORMAT_NUMBER = 10_000
+FORMAT_REPEATS = 25
+VALUES = (1234, 1.0, -2.0, 3.5, 0.1, 0.2, -0.3, 0.01, -0.02, 3.1, 0.001, 0.002, -0.003)
+
+
+# pylint: disable-next=too-few-public-methods,too-many-instance-attributes
+class DictTelemetryData:
+    """
+    TelemetryData with an instance dictionary and multi line string, as before the slots.
+    """
+
+    def __init__(self, *values: "int | float") -> None:
+        (
+            self.time_since_boot,
+            self.x,
+            self.y,
+            self.z,
+            self.x_velocity,
+            self.y_velocity,
+            self.z_velocity,
+            self.roll,
+            self.pitch,
+            self.yaw,
+            self.roll_speed,
+            self.pitch_speed,
+            self.yaw_speed,
+        ) = values
+
+    def __str__(self) -> str:
+        return f"""{{
+            time_since_boot: {self.time_since_boot},
+            x: {self.x},
+            y: {self.y},
+            z: {self.z},
+            x_velocity: {self.x_velocity},
+            y_velocity: {self.y_velocity},
+            z_velocity: {self.z_velocity},
+            roll: {self.roll},
+            pitch: {self.pitch},
+            yaw: {self.yaw},
+            roll_speed: {self.roll_speed},
+            pitch_speed: {self.pitch_speed},
+            yaw_speed: {self.yaw_speed}
+        }}"""
+
+
+def measure_memory(telemetry_type: type) -> float:
+    """
+    Returns the bytes allocated per instance, excluding the shared field values.
+    """
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    instances = [telemetry_type(*VALUES) for _ in range(0, INSTANCES)]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Exclude the list holding the instances
+    return (end - start) / len(instances) - 8
+
+
+def measure_format(telemetry_type: type) -> float:
+    """
+    Returns the best time in seconds to format an instance as a log message.
+    """
+    telemetry_data = telemetry_type(*VALUES)
+    elapsed = timeit.repeat(
+        lambda: f"Sent telemetry data: {telemetry_data}",
+        number=FORMAT_NUMBER,
+        repeat=FORMAT_REPEATS,
+    )
+
+    return min(elapsed) / FORMAT_NUMBER
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    for name, telemetry_type in [
+        ("Dictionary", DictTelemetryData),
+        ("Slots", telemetry.TelemetryData),
+    ]:
+        memory = measure_memory(telemetry_type)
+        format_time = measure_format(telemetry_type)
+        print(f"{name:>10}: {memory:.0f} bytes, format {format_time * 1e6:.2f} us")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,83 @@
+"""
+Benchmark the shared memory telemetry history against a list of TelemetryData
+for appending and windowed statistics. To run:
+```
+python -m tests.benchmarks.benchmark_telemetry_history
+```
+"""
+
+import collections
+import statistics
+import timeit
+
+from modules.telemetry import telemetry
+from modules.telemetry import telemetry_history
+
+
+CAPACITY = 1000
+WINDOW = 500
+NUMBER = 100
+REPEATS = 10
+
+
+def make_telemetry_data(index: int) -> telemetry.TelemetryData:
+    """
+    Telemetry with every field set.
+    """
+    return telemetry.TelemetryData(index, *([index * 0.001] * 12))
+
+
+def list_statistics(
+    history: "collections.deque[telemetry.TelemetryData]",
+) -> "list[tuple[float, float, float, float]]":
+    """
+    Mean, variance, minimum and maximum of each field over the window, one field at a time.
+    """
+    window = list(history)[-WINDOW:]
+    results = []
+    for name in telemetry.TelemetryData.FIELDS:
+        values = [getattr(telemetry_data, name) for telemetry_data in window]
+        results.append(
+            (statistics.fmean(values), statistics.pvariance(values), min(values), max(values))
+        )
+
+    return results
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, history = telemetry_history.TelemetryHistory.create(CAPACITY)
+    if not result:
+        print("Failed to create history")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert history is not None
+
+    samples = collections.deque(maxlen=CAPACITY)
+    for i in range(0, CAPACITY):
+        history.append(make_telemetry_data(i))
+        samples.append(make_telemetry_data(i))
+
+    reader = history.get_reader()
+    telemetry_data = make_telemetry_data(0)
+    for name, function in [
+        ("List append", lambda: samples.append(telemetry_data)),
+        ("History append", lambda: history.append(telemetry_data)),
+        ("List statistics", lambda: list_statistics(samples)),
+        ("History statistics", lambda: reader.get_statistics(WINDOW)),
+    ]:
+        elapsed = min(timeit.repeat(function, number=NUMBER, repeat=REPEATS)) / NUMBER
+        print(f"{name:>18}: {elapsed * 1e6:.2f} us")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
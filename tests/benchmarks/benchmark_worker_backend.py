@@ -0,0 +1,277 @@
+"""
+Benchmark memory and CPU of a pipeline shaped like bootcamp_main for each mix of worker backends.
+To run:
+```
+python -m tests.benchmarks.benchmark_worker_backend
+```
+"""
+
+import multiprocessing as mp
+import os
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_wait
+from utilities.workers import worker_backend
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+HEARTBEAT_PERIOD = 0.01  # seconds
+TELEMETRY_PERIOD = 0.01  # seconds
+RUN_TIME = 2.0  # seconds
+JOIN_TIMEOUT = 1.0  # seconds
+
+# Backends of the heartbeat sender, telemetry and command stages, and whether the queues are local
+MIXES = [
+    (
+        "All processes",
+        worker_backend.PROCESS,
+        worker_backend.PROCESS,
+        worker_backend.PROCESS,
+        False,
+    ),
+    (
+        "Heartbeat thread",
+        worker_backend.THREAD,
+        worker_backend.PROCESS,
+        worker_backend.PROCESS,
+        False,
+    ),
+    ("All threads", worker_backend.THREAD, worker_backend.THREAD, worker_backend.THREAD, True),
+    ("All asyncio", worker_backend.ASYNCIO, worker_backend.ASYNCIO, worker_backend.ASYNCIO, True),
+]
+
+
+def heartbeat_sender(controller: worker_controller.WorkerController) -> None:
+    """
+    Mostly sleeps, like the heartbeat sender.
+    """
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        controller.wait_for_exit(HEARTBEAT_PERIOD)
+
+
+async def async_heartbeat_sender(controller: worker_controller.WorkerController) -> None:
+    """
+    Same as heartbeat_sender() for the asyncio backend.
+    """
+    while not controller.is_exit_requested():
+        await controller.async_check_pause()
+        await controller.async_wait_for_exit(HEARTBEAT_PERIOD)
+
+
+def telemetry(
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Produces telemetry periodically, like the telemetry worker.
+    """
+    i = 0
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        output_queue.queue.put({"time": i, "position": (float(i), 0.0, 0.0)})
+        i += 1
+        controller.wait_for_exit(TELEMETRY_PERIOD)
+
+
+async def async_telemetry(
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Same as telemetry() for the asyncio backend.
+    """
+    i = 0
+    while not controller.is_exit_requested():
+        await controller.async_check_pause()
+        output_queue.queue.put({"time": i, "position": (float(i), 0.0, 0.0)})
+        i += 1
+        await controller.async_wait_for_exit(TELEMETRY_PERIOD)
+
+
+def command(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Turns telemetry into commands, like the command worker.
+    """
+    while not controller.is_exit_requested():
+        result, telemetry_data = queue_wait.get_or_exit(input_queue, controller)
+        if not result or telemetry_data is None:
+            break
+
+        output_queue.queue.put(f"Moved to {telemetry_data['position']}")
+
+
+async def async_command(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Same as command() for the asyncio backend.
+    """
+    while not controller.is_exit_requested():
+        result, telemetry_data = await queue_wait.async_get_or_exit(input_queue, controller)
+        if not result or telemetry_data is None:
+            break
+
+        output_queue.queue.put(f"Moved to {telemetry_data['position']}")
+
+
+def read_memory(pid: int) -> int:
+    """
+    Returns the proportional set size of the process in kB,
+    which splits pages shared after fork between the processes sharing them.
+    """
+    with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as file:
+        for line in file:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+
+    return 0
+
+
+def create_manager(
+    target: "(...) -> object",  # type: ignore
+    input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    controller: worker_controller.WorkerController,
+    backend: str,
+    local_logger: logger.Logger,
+) -> worker_manager.WorkerManager:
+    """
+    Creates a single worker with the backend.
+    Benchmarks run without pytest, so this stands in for the create_manager fixture of the unit tests.
+    """
+    result, properties = worker_manager.WorkerProperties.create(
+        1, target, (), input_queues, output_queues, controller, local_logger
+    )
+    assert result
+    assert properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(properties, local_logger, backend=backend)
+    assert result
+    assert manager is not None
+
+    return manager
+
+
+def measure(
+    backends: "tuple[str, str, str]", is_local: bool, local_logger: logger.Logger
+) -> "tuple[float, int, int, int]":
+    """
+    Runs the pipeline.
+
+    Returns the CPU usage in percent of a single CPU, the total memory in kB,
+    the number of processes and the number of commands received.
+    """
+    heartbeat_backend, telemetry_backend, command_backend = backends
+    mp_manager = None
+    if is_local:
+        telemetry_queue = queue_proxy_wrapper.LocalQueueWrapper()
+        command_queue = queue_proxy_wrapper.LocalQueueWrapper()
+    else:
+        mp_manager = queue_proxy_wrapper.create_manager()
+        telemetry_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager)
+        command_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager)
+
+    controller = worker_controller.WorkerController()
+    is_async = heartbeat_backend == worker_backend.ASYNCIO
+    managers = [
+        create_manager(
+            async_heartbeat_sender if is_async else heartbeat_sender,
+            [],
+            [],
+            controller,
+            heartbeat_backend,
+            local_logger,
+        ),
+        create_manager(
+            async_telemetry if is_async else telemetry,
+            [],
+            [telemetry_queue],
+            controller,
+            telemetry_backend,
+            local_logger,
+        ),
+        create_manager(
+            async_command if is_async else command,
+            [telemetry_queue],
+            [command_queue],
+            controller,
+            command_backend,
+            local_logger,
+        ),
+    ]
+
+    start_times = os.times()
+    start = time.perf_counter()
+    for manager in managers:
+        manager.start_workers()
+
+    command_count = 0
+    memory = 0
+    while time.perf_counter() - start < RUN_TIME:
+        result, _ = queue_wait.get_or_exit(command_queue, controller, RUN_TIME / 10)
+        if result:
+            command_count += 1
+
+        # Measured once everything is running
+        if memory == 0 and time.perf_counter() - start > RUN_TIME / 2:
+            pids = [os.getpid()] + [process.pid for process in mp.active_children()]
+            memory = sum(read_memory(pid) for pid in pids)
+            process_count = len(pids)
+
+    controller.request_exit()
+    telemetry_queue.close()
+    command_queue.close()
+    for manager in managers:
+        manager.join_workers(JOIN_TIMEOUT)
+
+    if mp_manager is not None:
+        mp_manager.shutdown()
+
+    elapsed = time.perf_counter() - start
+    end_times = os.times()
+    cpu_time = sum(end_times[:4]) - sum(start_times[:4])
+
+    return cpu_time / elapsed * 100, memory, process_count, command_count
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, local_logger = logger.Logger.create("benchmark_worker_backend", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    print(f"{'Mix':>16}: CPU, memory (PSS), processes, commands")
+    for name, heartbeat_backend, telemetry_backend, command_backend, is_local in MIXES:
+        cpu, memory, process_count, command_count = measure(
+            (heartbeat_backend, telemetry_backend, command_backend), is_local, local_logger
+        )
+        print(
+            f"{name:>16}: {cpu:>5.1f} %, {memory / 1024:>6.1f} MB, "
+            f"{process_count}, {command_count}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,120 @@
+"""
+Benchmark the per iteration cost of checking the worker controller in an empty worker loop. To run:
+```
+python -m tests.benchmarks.benchmark_worker_controller
+```
+"""
+
+import multiprocessing as mp
+import time
+
+from utilities.workers import worker_controller
+
+
+RUN_TIME = 1.0  # seconds
+REPEATS = 3
+
+
+class QueueWorkerController:
+    """
+    Controller checks as before the flag word: exit is a queue and pause is a semaphore.
+    """
+
+    def __init__(self) -> None:
+        self.__pause = mp.BoundedSemaphore(1)
+        self.__exit_queue = mp.Queue(1)
+
+    def check_pause(self) -> None:
+        """
+        Acquires and releases the pause semaphore.
+        """
+        self.__pause.acquire()
+        self.__pause.release()
+
+    def request_exit(self) -> None:
+        """
+        Puts into the exit queue.
+        """
+        self.__exit_queue.put(None)
+
+    def is_exit_requested(self) -> bool:
+        """
+        Checks whether the exit queue is empty.
+        """
+        return not self.__exit_queue.empty()
+
+
+class EventWorkerController(QueueWorkerController):
+    """
+    Controller checks with exit as an event.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.__exit = mp.Event()
+
+    def request_exit(self) -> None:
+        """
+        Sets the exit event.
+        """
+        self.__exit.set()
+
+    def is_exit_requested(self) -> bool:
+        """
+        Checks whether the exit event is set.
+        """
+        return self.__exit.is_set()
+
+
+def empty_worker(
+    controller: worker_controller.WorkerController, iterations: "mp.sharedctypes.Synchronized"
+) -> None:
+    """
+    Counts iterations of a worker loop that does nothing else.
+    """
+    count = 0
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        count += 1
+
+    iterations.value = count
+
+
+def measure(controller_type: type) -> float:
+    """
+    Returns the best iterations per second of a worker process.
+    """
+    best = 0.0
+    for _ in range(REPEATS):
+        controller = controller_type()
+        iterations = mp.Value("q", 0)
+        worker = mp.Process(target=empty_worker, args=(controller, iterations))
+        worker.start()
+        time.sleep(RUN_TIME)
+        controller.request_exit()
+        worker.join()
+        best = max(best, iterations.value / RUN_TIME)
+
+    return best
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    for name, controller_type in [
+        ("Queue and semaphore", QueueWorkerController),
+        ("Event and semaphore", EventWorkerController),
+        ("Flag word", worker_controller.WorkerController),
+    ]:
+        print(f"{name:>19}: {measure(controller_type):>11.0f} iterations/s")
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -0,0 +1,124 @@
+"""
+Benchmark the time from starting a telemetry worker until its first telemetry for each
+start method. To run:
+```
+python -m tests.benchmarks.benchmark_worker_start
+```
+"""
+
+import multiprocessing as mp
+import multiprocessing.context
+import statistics
+import threading
+import time
+
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.telemetry import telemetry
+from utilities.workers import worker_context
+
+
+DRONE_PORT = 14600
+SEND_PERIOD = 0.001  # seconds
+REPEATS = 5
+
+
+def first_telemetry_worker(connection_string: str, output_queue: mp.Queue) -> None:
+    """
+    Connects to the drone and exits after putting the first telemetry.
+    Connects by itself, since a connection cannot be passed to spawned workers.
+    """
+    connection = mavutil.mavlink_connection(connection_string)
+    result, local_logger = logger.Logger.create("benchmark_worker_start", False)
+    assert result
+    assert local_logger is not None
+
+    result, telemetry_object = telemetry.Telemetry.create(connection, local_logger)
+    assert result
+    assert telemetry_object is not None
+
+    while True:
+        result, telemetry_data = telemetry_object.run()
+        if result:
+            output_queue.put(telemetry_data)
+            return
+
+
+def send_telemetry(port: int, stop: threading.Event) -> None:
+    """
+    Mocked drone that sends telemetry as fast as the worker could need it.
+    """
+    connection = mavutil.mavlink_connection(
+        f"udpout:localhost:{port}", source_system=1, source_component=0
+    )
+    while not stop.is_set():
+        now = int(time.monotonic() * 1000) % 2**32
+        connection.mav.attitude_send(now, 0, 0, 0, 0, 0, 0)
+        connection.mav.local_position_ned_send(now, 0, 0, 0, 0, 0, 0)
+        time.sleep(SEND_PERIOD)
+
+
+def measure_start(context: multiprocessing.context.BaseContext, port: int) -> float:
+    """
+    Returns the seconds from starting the worker until its first telemetry.
+    """
+    output_queue = context.Queue()
+    stop = threading.Event()
+    drone = threading.Thread(target=send_telemetry, args=(port, stop))
+    drone.start()
+
+    start = time.perf_counter()
+    worker = context.Process(
+        target=first_telemetry_worker, args=(f"udpin:localhost:{port}", output_queue)
+    )
+    worker.start()
+    output_queue.get()
+    elapsed = time.perf_counter() - start
+
+    worker.join()
+    stop.set()
+    drone.join()
+    return elapsed
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    result, local_logger = logger.Logger.create("benchmark_worker_start", False)
+    if not result:
+        print("ERROR: Failed to create logger")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert local_logger is not None
+
+    port = DRONE_PORT
+    print(f"{'Start method':>12}: first start, later starts (median)")
+    for start_method in ["fork", "forkserver", "spawn"]:
+        result, context = worker_context.set_start_method(start_method, local_logger)
+        if not result:
+            print(f"{start_method:>12}: not supported")
+            continue
+
+        # The first forkserver start includes starting the server
+        times = []
+        for _ in range(REPEATS):
+            times.append(measure_start(context, port))
+            port += 1
+
+        print(
+            f"{start_method:>12}: {times[0] * 1000:>6.1f} ms, "
+            f"{statistics.median(times[1:]) * 1000:>6.1f} ms"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
+
+    print("Done!")
@@ -16,7 +16,9 @@ from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
 from modules.telemetry import telemetry
+from modules.telemetry import telemetry_history
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_wait
 from utilities.workers import worker_controller
 
 
@@ -37,6 +39,7 @@ TURNING_SPEED = 5  # deg/s
 # Add your own constants here
 TELEMETRY_MAX_QUEUE = 10
 COMMAND_MAX_QUEUE = 10
+HISTORY_CAPACITY = 64
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
 # =================================================================================================
@@ -62,9 +65,9 @@ def stop(
     """
     Stop the workers.
     """
-    telemetry_queue.fill_and_drain_queue()
-    output_queue.fill_and_drain_queue()
     controller.request_exit()
+    telemetry_queue.close()
+    output_queue.close()
 
 
 def read_queue(
@@ -77,23 +80,28 @@ def read_queue(
     """
     if controller is None or output_queue is None:
         return
-    while not controller.is_exit_requested():
-        if not output_queue.queue.empty():
-            cmd_action = output_queue.queue.get()
-            main_logger.info(cmd_action, True)
+    while True:
+        result, cmd_action = queue_wait.get_or_exit(output_queue, controller)
+        if not result or cmd_action is None:
+            break
+
+        main_logger.info(cmd_action, True)
 
 
 def put_queue(
     telemetry_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    history: telemetry_history.TelemetryHistory,
     controller: worker_controller.WorkerController,
     positions: list,
 ) -> None:
     """
-    Place mocked inputs into the input queue periodically with period TELEMETRY_PERIOD.
+    Place mocked inputs into the history and input queue periodically with period TELEMETRY_PERIOD.
     """
     for telemetry_data in positions:
         if controller.is_exit_requested():
             break
+        # Like the telemetry worker, append before sending
+        history.append(telemetry_data)
         telemetry_queue.queue.put(telemetry_data)
         time.sleep(TELEMETRY_PERIOD)
 
@@ -147,12 +155,21 @@ def main() -> int:
     controller = worker_controller.WorkerController()
 
     # Create a multiprocess manager for synchronized queues
-    mp_manager = mp.Manager()
+    mp_manager = queue_proxy_wrapper.create_manager()
 
     # Create your queues
     telemetry_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, TELEMETRY_MAX_QUEUE)
     output_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, COMMAND_MAX_QUEUE)
 
+    # Create the history, which the telemetry worker would append to
+    result, history = telemetry_history.TelemetryHistory.create(HISTORY_CAPACITY)
+    if not result:
+        main_logger.error("Failed to create telemetry history")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert history is not None
+
     # Test cases, DO NOT EDIT!
     path = [
         # Test singular points
@@ -243,7 +260,7 @@ def main() -> int:
     ).start()
 
     # Put items into input queue
-    threading.Thread(target=put_queue, args=(telemetry_queue, controller, path)).start()
+    threading.Thread(target=put_queue, args=(telemetry_queue, history, controller, path)).start()
 
     # Read the main queue (worker outputs)
     threading.Thread(target=read_queue, args=(output_queue, controller, main_logger)).start()
@@ -251,6 +268,7 @@ def main() -> int:
     command_worker.command_worker(
         connection,
         TARGET,
+        history.get_reader(),
         telemetry_queue,
         output_queue,
         controller,
@@ -13,6 +13,7 @@ from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
 from modules.heartbeat import heartbeat_receiver_worker
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_wait
 from utilities.workers import worker_controller
 
 
@@ -30,7 +31,6 @@ ERROR_TOLERANCE = 1e-2
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
 QUEUE_MAX = 10
-QUEUE_READER_TIMEOUT = 1.0
 
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -57,7 +57,7 @@ def stop(
     Stop the workers.
     """
     controller.request_exit()
-    output_queue.fill_and_drain_queue()
+    output_queue.close()
 
 
 def read_queue(
@@ -68,10 +68,12 @@ def read_queue(
     """
     Read and print the output queue.
     """
-    while not controller.is_exit_requested():
-        if not output_queue.queue.empty():
-            status = output_queue.queue.get(timeout=QUEUE_READER_TIMEOUT)
-            main_logger.info(f"Heartbeat status: {status}")
+    while True:
+        result, status = queue_wait.get_or_exit(output_queue, controller)
+        if not result or status is None:
+            break
+
+        main_logger.info(f"Heartbeat status: {status}")
 
 
 # =================================================================================================
@@ -123,7 +125,7 @@ def main() -> int:
     controller = worker_controller.WorkerController()
 
     # Create a multiprocess manager for synchronized queues
-    mp_manager = mp.Manager()
+    mp_manager = queue_proxy_wrapper.create_manager()
 
     # Create your queues
     output_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX)
@@ -11,8 +11,10 @@ from pymavlink import mavutil
 from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
+from modules.telemetry import telemetry_history
 from modules.telemetry import telemetry_worker
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_wait
 from utilities.workers import worker_controller
 
 
@@ -29,7 +31,7 @@ NUM_FAILS = 3
 # =================================================================================================
 # Add your own constants here
 MAX_QUEUE = 10
-READER_TIMEOUT = 1.0
+HISTORY_CAPACITY = 64
 
 # =================================================================================================
 #                            ↑ BOOTCAMPERS MODIFY ABOVE THIS COMMENT ↑
@@ -56,7 +58,7 @@ def stop(
     Stop the workers.
     """
     controller.request_exit()
-    output_queue.fill_and_drain_queue()
+    output_queue.close()
 
 
 def read_queue(
@@ -68,10 +70,12 @@ def read_queue(
     Read and print the output queue.
     """
     #  Add logic to read from your worker's output queue and print it using the logger
-    while not controller.is_exit_requested():
-        if not output_queue.queue.empty():
-            telemetry_data = output_queue.queue.get(timeout=READER_TIMEOUT)
-            main_logger.info(f"Received telemetry data: {telemetry_data}")
+    while True:
+        result, telemetry_data = queue_wait.get_or_exit(output_queue, controller)
+        if not result or telemetry_data is None:
+            break
+
+        main_logger.info(f"Received telemetry data: {telemetry_data}")
 
 
 # =================================================================================================
@@ -123,11 +127,20 @@ def main() -> int:
     controller = worker_controller.WorkerController()
 
     # Create a multiprocess manager for synchronized queues
-    mp_manager = mp.Manager()
+    mp_manager = queue_proxy_wrapper.create_manager()
 
     # Create your queues
     output_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, MAX_QUEUE)
 
+    # Create the history the worker appends to
+    result, history = telemetry_history.TelemetryHistory.create(HISTORY_CAPACITY)
+    if not result:
+        main_logger.error("Failed to create telemetry history")
+        return -1
+
+    # Get Pylance to stop complaining
+    assert history is not None
+
     # Just set a timer to stop the worker after a while, since the worker infinite loops
     threading.Timer(
         TELEMETRY_PERIOD * NUM_TRIALS * 2 + NUM_FAILS, stop, (controller, output_queue)
@@ -139,6 +152,7 @@ def main() -> int:
     telemetry_worker.telemetry_worker(
         # Put your own arguments here
         connection=connection,
+        history=history,
         output_queue=output_queue,
         controller=controller,
     )
@@ -0,0 +1,66 @@
+"""
+Fixtures shared by the unit tests.
+"""
+
+import multiprocessing.context
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_backend
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+# Fixtures use other fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture()
+def local_logger(request: pytest.FixtureRequest) -> logger.Logger:  # type: ignore
+    """
+    Logger named after the test module.
+    """
+    result, test_logger = logger.Logger.create(request.module.__name__.rpartition(".")[2], False)
+    assert result
+    yield test_logger  # type: ignore
+
+
+@pytest.fixture()
+def create_manager(
+    local_logger: logger.Logger,
+) -> "(...) -> tuple[bool, worker_manager.WorkerManager | None]":  # type: ignore
+    """
+    Creates the workers of a stage with the test logger, call start_workers() to start them.
+    """
+
+    def create(
+        target: "(...) -> object",  # type: ignore
+        controller: worker_controller.WorkerController,
+        count: int = 1,
+        work_arguments: tuple = (),
+        input_queues: list | None = None,
+        output_queues: list | None = None,
+        backend: str = worker_backend.PROCESS,
+        context: multiprocessing.context.BaseContext | None = None,
+        liveness_timeout: float = 0.0,
+        kill_hung_workers: bool = False,
+    ) -> "tuple[bool, worker_manager.WorkerManager | None]":
+        result, properties = worker_manager.WorkerProperties.create(
+            count,
+            target,
+            work_arguments,
+            [] if input_queues is None else input_queues,
+            [] if output_queues is None else output_queues,
+            controller,
+            local_logger,
+            liveness_timeout,
+            kill_hung_workers,
+        )
+        assert result
+        assert properties is not None
+
+        return worker_manager.WorkerManager.create(properties, local_logger, context, backend)
+
+    return create
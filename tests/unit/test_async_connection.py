@@ -0,0 +1,227 @@
+"""
+Test the asyncio MAVLink connection against local servers.
+"""
+
+import asyncio
+
+import pytest
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.mavlink_async import async_connection
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+HOST = "127.0.0.1"
+TIMEOUT = 1.0  # seconds
+
+
+class _Buffer:
+    """
+    File like object collecting encoded frames.
+    """
+
+    def __init__(self) -> None:
+        self.data = b""
+
+    def write(self, data: bytes) -> None:
+        """
+        Appends the frame.
+        """
+        self.data += data
+
+
+def encode_drone_messages() -> bytes:
+    """
+    Returns a heartbeat, two attitudes and a local position, as a drone would send them.
+    """
+    buffer = _Buffer()
+    drone = mavutil.mavlink.MAVLink(buffer, 1, 1)
+    drone.heartbeat_send(mavutil.mavlink.MAV_TYPE_QUADROTOR, 0, 0, 0, 0)
+    drone.attitude_send(1, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0)
+    drone.local_position_ned_send(2, 1.0, 2.0, 3.0, 0.0, 0.0, 0.0)
+    drone.attitude_send(3, 0.4, 0.5, 0.6, 0.0, 0.0, 0.0)
+    return buffer.data
+
+
+async def run_tcp(local_logger: logger.Logger) -> "tuple[list[float], list[str], bytes]":
+    """
+    Connects to a drone server that sends its messages split across writes,
+    then sends a heartbeat back.
+
+    Returns the attitude rolls, the types of all messages and the data the server received.
+    """
+    received = asyncio.get_running_loop().create_future()
+
+    async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        data = encode_drone_messages()
+        # Split inside a frame
+        writer.write(data[:7])
+        await writer.drain()
+        await asyncio.sleep(0.01)
+        writer.write(data[7:])
+        await writer.drain()
+        received.set_result(await reader.read(1024))
+        writer.close()
+
+    server = await asyncio.start_server(serve, HOST, 0)
+    port = server.sockets[0].getsockname()[1]
+
+    result, connection = await async_connection.AsyncMavlinkConnection.create(
+        f"tcp:{HOST}:{port}", local_logger
+    )
+    assert result
+    assert connection is not None
+
+    attitudes = connection.subscribe("ATTITUDE")
+    everything = connection.subscribe()
+
+    rolls = []
+    async for message in attitudes:
+        rolls.append(message.roll)
+        if len(rolls) == 2:
+            break
+
+    connection.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_GCS, 0, 0, 0, 0)
+    server_data = await asyncio.wait_for(received, TIMEOUT)
+
+    await connection.close()
+    types = [message.get_type() async for message in everything]
+
+    server.close()
+    await server.wait_closed()
+
+    return rolls, types, server_data
+
+
+async def run_udp(local_logger: logger.Logger) -> "tuple[list[str], list[str]]":
+    """
+    Exchanges messages between a UDP_OUT drone and a UDP_IN ground station.
+
+    Returns the types received by the ground station and by the drone.
+    """
+    result, ground = await async_connection.AsyncMavlinkConnection.create(
+        f"udpin:{HOST}:14580", local_logger
+    )
+    assert result
+    assert ground is not None
+
+    result, drone = await async_connection.AsyncMavlinkConnection.create(
+        f"udpout:{HOST}:14580", local_logger, 1, 1
+    )
+    assert result
+    assert drone is not None
+
+    ground_heartbeats = ground.subscribe("HEARTBEAT")
+    drone_heartbeats = drone.subscribe("HEARTBEAT")
+
+    drone.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_QUADROTOR, 0, 0, 0, 0)
+    ground_message = await asyncio.wait_for(anext(ground_heartbeats), TIMEOUT)
+    # Replies go to the drone now that the ground station heard from it
+    ground.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_GCS, 0, 0, 0, 0)
+    drone_message = await asyncio.wait_for(anext(drone_heartbeats), TIMEOUT)
+
+    await drone.close()
+    await ground.close()
+
+    return [ground_message.get_type()], [drone_message.get_type()]
+
+
+async def run_closed_subscription(local_logger: logger.Logger) -> "tuple[list, int]":
+    """
+    Closes a full subscription directly, then keeps receiving messages of its type.
+
+    Returns the messages iterated from the closed subscription and its dropped count.
+    """
+    result, ground = await async_connection.AsyncMavlinkConnection.create(
+        f"udpin:{HOST}:14581", local_logger
+    )
+    assert result
+    assert ground is not None
+
+    result, drone = await async_connection.AsyncMavlinkConnection.create(
+        f"udpout:{HOST}:14581", local_logger, 1, 1
+    )
+    assert result
+    assert drone is not None
+
+    closed = ground.subscribe("HEARTBEAT", maxsize=1)
+    heartbeats = ground.subscribe("HEARTBEAT")
+    closed.close()
+
+    for _ in range(0, 2):
+        drone.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_QUADROTOR, 0, 0, 0, 0)
+        await asyncio.wait_for(anext(heartbeats), TIMEOUT)
+
+    async def iterate() -> list:
+        return [message async for message in closed]
+
+    messages = await asyncio.wait_for(iterate(), TIMEOUT)
+
+    await drone.close()
+    await ground.close()
+
+    return messages, closed.dropped_count
+
+
+class TestAsyncMavlinkConnection:
+    """
+    Messages are parsed as they arrive and delivered to matching subscriptions.
+    """
+
+    def test_tcp(self, local_logger: logger.Logger) -> None:
+        """
+        Frames split across reads are parsed, and sends reach the server.
+        """
+        # Run
+        rolls, types, server_data = asyncio.run(run_tcp(local_logger))
+
+        # Test
+        assert rolls == pytest.approx([0.1, 0.4])
+        assert types == ["HEARTBEAT", "ATTITUDE", "LOCAL_POSITION_NED", "ATTITUDE"]
+        parser = mavutil.mavlink.MAVLink(None)
+        (message,) = parser.parse_buffer(server_data)
+        assert message.get_type() == "HEARTBEAT"
+        assert message.type == mavutil.mavlink.MAV_TYPE_GCS
+
+    def test_udp(self, local_logger: logger.Logger) -> None:
+        """
+        The listening side replies to the last sender.
+        """
+        # Run
+        ground_types, drone_types = asyncio.run(run_udp(local_logger))
+
+        # Test
+        assert ground_types == ["HEARTBEAT"]
+        assert drone_types == ["HEARTBEAT"]
+
+    def test_closed_subscription(self, local_logger: logger.Logger) -> None:
+        """
+        A subscription closed directly ends its iteration while messages of its type arrive.
+        """
+        # Run
+        messages, dropped_count = asyncio.run(run_closed_subscription(local_logger))
+
+        # Test
+        assert messages == []
+        assert dropped_count == 0
+
+    @pytest.mark.parametrize(
+        "connection_string", ["serial:/dev/ttyUSB0", "tcp:localhost", "udpin::14580"]
+    )
+    def test_invalid(self, local_logger: logger.Logger, connection_string: str) -> None:
+        """
+        Unsupported connection strings are rejected.
+        """
+        # Run
+        result, connection = asyncio.run(
+            async_connection.AsyncMavlinkConnection.create(connection_string, local_logger)
+        )
+
+        # Test
+        assert not result
+        assert connection is None
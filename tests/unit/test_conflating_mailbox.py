@@ -0,0 +1,91 @@
+"""
+Test the latest value mailbox.
+"""
+
+import queue
+
+import pytest
+
+from utilities.workers import conflating_mailbox
+from utilities.workers import queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def mailbox() -> conflating_mailbox.ConflatingMailbox:  # type: ignore
+    """
+    Empty mailbox in this process.
+    """
+    yield conflating_mailbox.ConflatingMailbox()  # type: ignore
+
+
+class TestConflatingMailbox:
+    """
+    Mailbox conflation and bookkeeping.
+    """
+
+    def test_keeps_newest(self, mailbox: conflating_mailbox.ConflatingMailbox) -> None:
+        """
+        Only the newest item is read, older unread items are counted as overwritten.
+        """
+        # Setup
+        expected = "third"
+
+        # Run
+        mailbox.put("first")
+        mailbox.put("second")
+        mailbox.put("third")
+        actual = mailbox.get_nowait()
+
+        # Test
+        assert actual == expected
+        assert mailbox.sequence() == 3
+        assert mailbox.overwritten_count() == 2
+
+    def test_changed_flag(self, mailbox: conflating_mailbox.ConflatingMailbox) -> None:
+        """
+        Reading clears the changed flag until the next put.
+        """
+        # Setup
+        mailbox.put(1)
+
+        # Run
+        changed_before_read = mailbox.is_changed()
+        mailbox.get()
+        changed_after_read = mailbox.is_changed()
+
+        # Test
+        assert changed_before_read
+        assert not changed_after_read
+        assert mailbox.peek() == (1, 1)
+        with pytest.raises(queue.Empty):
+            mailbox.get(timeout=0.01)
+
+        # Item was read so it was not overwritten
+        mailbox.put(2)
+        assert mailbox.overwritten_count() == 0
+
+
+def test_wrapper_through_manager() -> None:
+    """
+    Mailbox works as a queue through the manager.
+    """
+    # Setup
+    mp_manager = queue_proxy_wrapper.create_manager()
+    wrapper = conflating_mailbox.ConflatingMailboxWrapper(mp_manager)
+
+    # Run
+    wrapper.put_many([1, 2, 3])
+    batch = wrapper.get_many(10, 1.0)
+
+    # Test
+    assert batch == [3]
+    assert wrapper.maxsize == 1
+    assert wrapper.queue.empty()
+    assert wrapper.queue.overwritten_count() == 2
+
+    mp_manager.shutdown()
@@ -0,0 +1,158 @@
+"""
+Test routing raw MAVLink frames by message ID.
+"""
+
+import pytest
+from pymavlink import mavutil
+
+from modules.mavlink_hub import frame_router
+
+
+# Test functions use test fixture signature names
+# pylint: disable=redefined-outer-name
+
+
+def create_mav(version: int = 2) -> mavutil.mavlink.MAVLink:
+    """
+    Parser and encoder of the MAVLink version.
+    """
+    mav = mavutil.mavlink.MAVLink(None, srcSystem=1, srcComponent=1)
+    if version == 1:
+        mav.WIRE_PROTOCOL_VERSION = "1.0"
+        # pylint: disable-next=protected-access
+        mav._mavlink_version = 1
+    return mav
+
+
+def encode_frames(mav: mavutil.mavlink.MAVLink) -> "tuple[bytes, bytes, bytes]":
+    """
+    Heartbeat, system time and attitude frames.
+    """
+    return (
+        mav.heartbeat_encode(6, 8, 0, 0, 0).pack(mav),
+        mav.system_time_encode(0, 0).pack(mav),
+        mav.attitude_encode(1, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0).pack(mav),
+    )
+
+
+@pytest.fixture()
+def router() -> frame_router.FrameRouter:  # type: ignore
+    """
+    Router without routes.
+    """
+    router = frame_router.FrameRouter(create_mav())
+    yield router  # type: ignore
+
+
+class TestFrameRouter:
+    """
+    Only frames with handlers are decoded and routed.
+    """
+
+    @pytest.mark.parametrize("version", [1, 2])
+    def test_route(self, router: frame_router.FrameRouter, version: int) -> None:
+        """
+        Frames are routed by message ID and frames without handlers are skipped.
+        """
+        # Setup
+        messages = []
+        router.set_routes(
+            {
+                mavutil.mavlink.MAVLINK_MSG_ID_HEARTBEAT: [messages.append],
+                mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE: [messages.append, messages.append],
+            }
+        )
+
+        # Run
+        call_count = router.feed(b"".join(encode_frames(create_mav(version))))
+
+        # Test
+        assert call_count == 3
+        assert [message.get_type() for message in messages] == [
+            "HEARTBEAT",
+            "ATTITUDE",
+            "ATTITUDE",
+        ]
+        assert router.get_decoded_count() == 2
+        assert router.get_skipped_count() == 1
+        assert router.get_bad_count() == 0
+
+    def test_catch_all(self, router: frame_router.FrameRouter) -> None:
+        """
+        Catch all handlers receive every message.
+        """
+        # Setup
+        messages = []
+        attitudes = []
+        router.set_routes(
+            {mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE: [attitudes.append]}, [messages.append]
+        )
+
+        # Run
+        call_count = router.feed(b"".join(encode_frames(create_mav())))
+
+        # Test
+        assert call_count == 4
+        assert len(messages) == 3
+        assert len(attitudes) == 1
+        assert router.get_skipped_count() == 0
+
+    def test_split_frame(self, router: frame_router.FrameRouter) -> None:
+        """
+        Incomplete frames are kept until the rest arrives.
+        """
+        # Setup
+        messages = []
+        router.set_routes({mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE: [messages.append]})
+        _, _, attitude = encode_frames(create_mav())
+
+        # Run
+        first_count = router.feed(attitude[:4])
+        second_count = router.feed(attitude[4:-1])
+        third_count = router.feed(attitude[-1:])
+
+        # Test
+        assert (first_count, second_count, third_count) == (0, 0, 1)
+        assert messages[0].roll == pytest.approx(0.1)
+
+    def test_resynchronize(self, router: frame_router.FrameRouter) -> None:
+        """
+        Garbage and corrupted frames are passed over up to the next frame.
+        """
+        # Setup
+        messages = []
+        router.set_routes({mavutil.mavlink.MAVLINK_MSG_ID_HEARTBEAT: [messages.append]})
+        heartbeat, _, _ = encode_frames(create_mav())
+        corrupted = bytearray(heartbeat)
+        corrupted[-1] ^= 0xFF
+
+        # Run
+        call_count = router.feed(b"\x00\x01\x02" + bytes(corrupted) + heartbeat)
+
+        # Test
+        assert call_count == 1
+        assert len(messages) == 1
+        assert router.get_bad_count() == 1
+
+    def test_signed_frame(self, router: frame_router.FrameRouter) -> None:
+        """
+        The signature is part of the length of a signed frame.
+        """
+        # Setup
+        messages = []
+        router.set_routes({mavutil.mavlink.MAVLINK_MSG_ID_SYSTEM_TIME: [messages.append]})
+        mav = create_mav()
+        heartbeat, system_time, _ = encode_frames(mav)
+        signed_heartbeat = bytearray(heartbeat)
+        signed_heartbeat[2] |= frame_router.SIGNED_FLAG
+
+        # Run
+        call_count = router.feed(
+            bytes(signed_heartbeat) + bytes(frame_router.SIGNATURE_LENGTH) + system_time
+        )
+
+        # Test
+        assert call_count == 1
+        assert messages[0].get_type() == "SYSTEM_TIME"
+        assert router.get_skipped_count() == 1
+        assert router.get_bad_count() == 0
@@ -0,0 +1,209 @@
+"""
+Test routing messages through the MAVLink hub.
+"""
+
+import multiprocessing as mp
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from modules.common.modules.logger import logger
+from modules.mavlink_hub import mavlink_hub
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+HUB_CONNECTION_STRING = "udpin:127.0.0.1:14561"
+DRONE_CONNECTION_STRING = "udpout:127.0.0.1:14561"
+TIMEOUT = 1.0  # seconds
+
+
+@pytest.fixture()
+def hub(local_logger: logger.Logger) -> mavlink_hub.MavlinkHub:  # type: ignore
+    """
+    Hub listening for a drone, the tests start it after subscribing.
+    """
+    result, test_hub = mavlink_hub.MavlinkHub.create(HUB_CONNECTION_STRING, local_logger)
+    assert result
+    assert test_hub is not None
+    yield test_hub  # type: ignore
+    test_hub.stop()
+
+
+@pytest.fixture()
+def drone_connection() -> mavutil.mavfile:  # type: ignore
+    """
+    Connection of a drone sending to the hub, sends only arrive once the hub is started.
+    """
+    connection = mavutil.mavlink_connection(DRONE_CONNECTION_STRING)
+    yield connection  # type: ignore
+    connection.close()
+
+
+def run_until_read(hub: mavlink_hub.MavlinkHub, frame_count: int) -> int:
+    """
+    Runs the hub until the number of frames have been routed or skipped.
+
+    Returns the number of messages put into channels.
+    """
+    put_count = 0
+    deadline = time.monotonic() + TIMEOUT
+    while sum(hub.get_frame_counts()[:2]) < frame_count and time.monotonic() < deadline:
+        _, count = hub.run()
+        put_count += count
+
+    return put_count
+
+
+def run_hub(hub: mavlink_hub.MavlinkHub, frame_count: int) -> None:
+    """
+    Connects and runs the hub in a worker process until the number of frames have been read.
+    """
+    result, local_logger = logger.Logger.create("test_mavlink_hub_worker", False)
+    assert result
+    assert local_logger is not None
+
+    assert hub.start(local_logger)
+    run_until_read(hub, frame_count)
+    hub.stop()
+
+
+class TestMavlinkHub:
+    """
+    Each message is read once and delivered to every subscriber of its type.
+    """
+
+    def test_route_by_type(
+        self,
+        local_logger: logger.Logger,
+        hub: mavlink_hub.MavlinkHub,
+        drone_connection: mavutil.mavfile,
+    ) -> None:
+        """
+        Subscribers only see their types, shared types reach every subscriber,
+        and other types are skipped.
+        """
+        # Setup
+        result, heartbeat_connection = hub.subscribe(["HEARTBEAT"])
+        assert result
+        assert heartbeat_connection is not None
+
+        result, telemetry_connection = hub.subscribe(["ATTITUDE", "HEARTBEAT"])
+        assert result
+        assert telemetry_connection is not None
+
+        assert hub.start(local_logger)
+
+        # Run
+        drone_connection.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_QUADROTOR, 0, 0, 0, 0)
+        drone_connection.mav.system_time_send(0, 0)
+        drone_connection.mav.attitude_send(1, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0)
+        put_count = run_until_read(hub, 3)
+
+        # Test
+        assert put_count == 3
+        assert hub.get_frame_counts() == (2, 1, 0)
+        assert heartbeat_connection.recv_match(blocking=True, timeout=TIMEOUT).get_type() == (
+            "HEARTBEAT"
+        )
+        assert heartbeat_connection.recv_match(blocking=False) is None
+        attitude = telemetry_connection.recv_match(type="ATTITUDE", blocking=True, timeout=TIMEOUT)
+        assert attitude is not None
+        assert attitude.roll == pytest.approx(0.1)
+
+    def test_send_through_hub(
+        self,
+        local_logger: logger.Logger,
+        hub: mavlink_hub.MavlinkHub,
+        drone_connection: mavutil.mavfile,
+    ) -> None:
+        """
+        Sends from a subscriber are written to the connection by the hub.
+        """
+        # Setup
+        result, sender_connection = hub.subscribe([])
+        assert result
+        assert sender_connection is not None
+
+        assert hub.start(local_logger)
+
+        # The hub learns the address of the drone from its first message
+        drone_connection.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_QUADROTOR, 0, 0, 0, 0)
+        run_until_read(hub, 1)
+
+        # Run
+        sender_connection.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_GCS, 0, 0, 0, 0)
+        message = drone_connection.recv_match(type="HEARTBEAT", blocking=True, timeout=TIMEOUT)
+        hub.stop()
+
+        # Test
+        assert message is not None
+        assert message.type == mavutil.mavlink.MAV_TYPE_GCS
+        assert sender_connection.recv_match(blocking=True, timeout=TIMEOUT) is None
+
+    def test_start_in_spawned_worker(
+        self, local_logger: logger.Logger, drone_connection: mavutil.mavfile
+    ) -> None:
+        """
+        The hub can be passed to a worker started with any start method,
+        since it only connects in the worker.
+        """
+        # Setup
+        start_method = mp.get_start_method()
+        mp.set_start_method("spawn", True)
+        try:
+            result, hub = mavlink_hub.MavlinkHub.create(HUB_CONNECTION_STRING, local_logger)
+            assert result
+            assert hub is not None
+
+            result, telemetry_connection = hub.subscribe(["ATTITUDE"])
+            assert result
+            assert telemetry_connection is not None
+
+            process = mp.Process(target=run_hub, args=(hub, 1))
+
+            # Run
+            process.start()
+            attitude = None
+            deadline = time.monotonic() + 10.0
+            while attitude is None and time.monotonic() < deadline:
+                drone_connection.mav.attitude_send(1, 0.1, 0.2, 0.3, 0.0, 0.0, 0.0)
+                attitude = telemetry_connection.recv_match(blocking=True, timeout=0.1)
+
+            process.join(10.0)
+        finally:
+            mp.set_start_method(start_method, True)
+
+        # Test
+        assert attitude is not None
+        assert process.exitcode == 0
+
+    def test_connect_invalid(self, local_logger: logger.Logger) -> None:
+        """
+        Starting fails if the connection cannot be opened.
+        """
+        # Setup
+        result, hub = mavlink_hub.MavlinkHub.create("udpin:256.0.0.1:14561", local_logger)
+        assert result
+        assert hub is not None
+
+        # Run
+        result = hub.start(local_logger)
+
+        # Test
+        assert not result
+
+    def test_unknown_type(self, hub: mavlink_hub.MavlinkHub) -> None:
+        """
+        Subscribing to a message type that does not exist fails.
+        """
+        # Run
+        result, connection = hub.subscribe(["NOT_A_MESSAGE"])
+
+        # Test
+        assert not result
+        assert connection is None
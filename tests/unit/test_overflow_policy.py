@@ -0,0 +1,128 @@
+"""
+Test queue overflow policies.
+"""
+
+import multiprocessing.managers
+import time
+
+import pytest
+
+from utilities.workers import overflow_policy
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_queue
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+MAX_SIZE = 2
+WRAPPER_TYPES = [
+    queue_proxy_wrapper.QueueProxyWrapper,
+    shared_memory_queue.SharedMemoryQueueWrapper,
+]
+
+
+@pytest.fixture()
+def mp_manager() -> multiprocessing.managers.SyncManager:  # type: ignore
+    """
+    Manager hosting queues.
+    """
+    manager = queue_proxy_wrapper.create_manager()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.mark.parametrize("wrapper_type", WRAPPER_TYPES)
+def test_drop_newest(wrapper_type: type, mp_manager: multiprocessing.managers.SyncManager) -> None:
+    """
+    Items put into a full queue are discarded and counted.
+    """
+    # Setup
+    wrapper = wrapper_type(
+        mp_manager, MAX_SIZE, overflow=overflow_policy.OverflowPolicy.DROP_NEWEST
+    )
+
+    # Run
+    for i in range(4):
+        wrapper.queue.put(i)
+
+    put_count = wrapper.put_many([4, 5])
+    items = wrapper.get_many(MAX_SIZE + 1, 0.0)
+
+    # Test
+    assert put_count == 2
+    assert items == [0, 1]
+    assert wrapper.get_dropped_count() == 4
+
+
+@pytest.mark.parametrize("wrapper_type", WRAPPER_TYPES)
+def test_drop_oldest(wrapper_type: type, mp_manager: multiprocessing.managers.SyncManager) -> None:
+    """
+    Oldest items are discarded to make space and counted.
+    """
+    # Setup
+    wrapper = wrapper_type(
+        mp_manager, MAX_SIZE, overflow=overflow_policy.OverflowPolicy.DROP_OLDEST
+    )
+
+    # Run
+    for i in range(3):
+        wrapper.queue.put(i)
+
+    wrapper.put_many([3, 4])
+    items = wrapper.get_many(MAX_SIZE + 1, 0.0)
+
+    # Test
+    assert items == [3, 4]
+    assert wrapper.get_dropped_count() == 3
+
+
+@pytest.mark.parametrize("wrapper_type", WRAPPER_TYPES)
+def test_block_then_drop(
+    wrapper_type: type, mp_manager: multiprocessing.managers.SyncManager
+) -> None:
+    """
+    Waits up to the overflow timeout before discarding.
+    """
+    # Setup
+    timeout = 0.05
+    wrapper = wrapper_type(
+        mp_manager,
+        MAX_SIZE,
+        overflow=overflow_policy.OverflowPolicy.BLOCK_THEN_DROP,
+        overflow_timeout=timeout,
+    )
+    wrapper.put_many([0, 1])
+
+    # Run
+    start = time.perf_counter()
+    wrapper.queue.put(2)
+    elapsed = time.perf_counter() - start
+
+    # Test
+    assert elapsed >= timeout
+    assert wrapper.get_dropped_count() == 1
+    assert wrapper.get_many(MAX_SIZE + 1, 0.0) == [0, 1]
+
+
+def test_drop_oldest_statistics(mp_manager: multiprocessing.managers.SyncManager) -> None:
+    """
+    Evicted items are not counted as queued.
+    """
+    # Setup
+    wrapper = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager, MAX_SIZE, True, overflow_policy.OverflowPolicy.DROP_OLDEST
+    )
+
+    # Run
+    wrapper.put_many([0, 1, 2, 3, 4])
+    result, statistics = wrapper.get_statistics()
+
+    # Test
+    assert result
+    assert statistics is not None
+    assert statistics.evicted_count == 3
+    assert statistics.high_water_depth == MAX_SIZE
+    assert wrapper.get_many(MAX_SIZE, 0.0) == [3, 4]
@@ -0,0 +1,199 @@
+"""
+Test building pipelines from the configuration.
+"""
+
+import multiprocessing.shared_memory
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import pipeline_builder
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_wait
+from utilities.workers import shared_memory_queue
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+JOIN_TIMEOUT = 1.0  # seconds
+
+
+def produce_worker(
+    count: int,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Puts numbers up to the count, then waits for exit.
+    """
+    for i in range(0, count):
+        output_queue.queue.put(i)
+
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        controller.wait_for_exit(queue_wait.EXIT_CHECK_PERIOD)
+
+
+def double_worker(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Doubles numbers until exit.
+    """
+    while not controller.is_exit_requested():
+        result, item = queue_wait.get_or_exit(input_queue, controller)
+        if not result or item is None:
+            break
+
+        output_queue.queue.put(item * 2)
+
+
+def get_worker(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    items: list,
+    controller: worker_controller.WorkerController,  # pylint: disable=unused-argument
+) -> None:
+    """
+    Blocks on a queue that is not part of the pipeline, then keeps the item.
+    """
+    items.append(input_queue.queue.get())
+
+
+STAGE_TARGETS = {
+    "produce": (produce_worker, (5,)),
+    "double": (double_worker, ()),
+}
+
+
+def create_config(
+    backend: str = "thread", transport: str = "local", maxsize: int = 10, count: int = 2
+) -> dict:
+    """
+    Configuration of a producer feeding doubling workers, with the consumer listed first.
+    """
+    return {
+        "queues": {
+            "numbers": {"transport": transport, "maxsize": maxsize},
+            "doubled": {"transport": transport, "maxsize": maxsize},
+        },
+        "stages": {
+            "double": {
+                "count": count,
+                "backend": backend,
+                "inputs": ["numbers"],
+                "outputs": ["doubled"],
+            },
+            "produce": {"backend": backend, "outputs": ["numbers"]},
+        },
+    }
+
+
+class TestPipeline:
+    """
+    Stage order, queue sizing and running a pipeline.
+    """
+
+    @pytest.mark.parametrize(
+        "backend, transport",
+        [("thread", "local"), ("process", "manager"), ("process", "shared_memory")],
+    )
+    def test_run(self, local_logger: logger.Logger, backend: str, transport: str) -> None:
+        """
+        Producers start first, and main reads the queue that no stage reads.
+        """
+        # Setup
+        result, pipeline = pipeline_builder.Pipeline.create(
+            create_config(backend, transport), STAGE_TARGETS, local_logger
+        )
+        assert result
+        assert pipeline is not None
+
+        # Run
+        pipeline.start()
+        main_queues = pipeline.get_main_queues()
+        doubled = [main_queues["doubled"].queue.get(timeout=JOIN_TIMEOUT) for _ in range(0, 5)]
+        is_clean = pipeline.stop(JOIN_TIMEOUT)
+
+        # Test
+        assert pipeline.get_stage_names() == ["produce", "double"]
+        assert list(main_queues) == ["doubled"]
+        assert sorted(doubled) == [0, 2, 4, 6, 8]
+        assert is_clean
+        assert pipeline.get_controller().is_exit_requested()
+
+    def test_stop_frees_external_queues(self, local_logger: logger.Logger) -> None:
+        """
+        Queues created outside the pipeline are closed on stop, waking workers blocked on them,
+        then their shared memory is freed.
+        """
+        # Setup
+        external_queue = shared_memory_queue.SharedMemoryQueueWrapper(None)
+        name = external_queue.queue._SharedMemoryRingBuffer__shared_memory.name
+        items = []
+        config = create_config()
+        config["stages"]["get"] = {"backend": "thread"}
+        stage_targets = {**STAGE_TARGETS, "get": (get_worker, (external_queue, items))}
+        result, pipeline = pipeline_builder.Pipeline.create(
+            config, stage_targets, local_logger, [external_queue]
+        )
+        assert result
+        assert pipeline is not None
+
+        # Run
+        pipeline.start()
+        is_clean = pipeline.stop(JOIN_TIMEOUT)
+
+        # Test
+        assert is_clean
+        assert items == [None]
+        with pytest.raises(FileNotFoundError):
+            multiprocessing.shared_memory.SharedMemory(name)
+
+    @pytest.mark.parametrize(
+        "config",
+        [
+            # Smaller than the consumer count
+            create_config(maxsize=1, count=2),
+            # Unknown transport
+            create_config(transport="pigeon"),
+            # Local queues cannot reach processes
+            create_config(backend="process", transport="local"),
+            # Process stages started with fork cannot be restarted from the supervisor thread
+            {
+                "start_method": "fork",
+                "queues": {"numbers": {"transport": "manager"}},
+                "stages": {"produce": {"backend": "process", "outputs": ["numbers"]}},
+            },
+            # Cycle
+            {
+                "queues": {"a": {}, "b": {}},
+                "stages": {
+                    "produce": {"backend": "thread", "inputs": ["b"], "outputs": ["a"]},
+                    "double": {"backend": "thread", "inputs": ["a"], "outputs": ["b"]},
+                },
+            },
+            # Unknown queue
+            {"stages": {"produce": {"outputs": ["numbers"]}}},
+            # Unknown overflow policy
+            {
+                "queues": {"numbers": {"overflow": "explode"}},
+                "stages": {"produce": {"outputs": ["numbers"]}},
+            },
+        ],
+    )
+    def test_invalid(self, local_logger: logger.Logger, config: dict) -> None:
+        """
+        Invalid graphs are rejected before anything is created.
+        """
+        # Run
+        result, pipeline = pipeline_builder.Pipeline.create(config, STAGE_TARGETS, local_logger)
+
+        # Test
+        assert not result
+        assert pipeline is None
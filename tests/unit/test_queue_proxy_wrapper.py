@@ -0,0 +1,164 @@
+"""
+Test the queue proxy wrapper and its batched operations.
+"""
+
+import threading
+import time
+
+import pytest
+
+from utilities.workers import conflating_mailbox
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import shared_memory_queue
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+MAX_SIZE = 4
+
+
+@pytest.fixture()
+def batch_queue() -> queue_proxy_wrapper.BatchQueue:  # type: ignore
+    """
+    Bounded batch queue in this process.
+    """
+    yield queue_proxy_wrapper.BatchQueue(MAX_SIZE)  # type: ignore
+
+
+class TestBatchQueue:
+    """
+    Batched operations on the queue hosted by the manager.
+    """
+
+    def test_put_many_partial(self, batch_queue: queue_proxy_wrapper.BatchQueue) -> None:
+        """
+        Stops at the timeout once the queue is full.
+        """
+        # Setup
+        items = list(range(MAX_SIZE + 2))
+        expected = MAX_SIZE
+
+        # Run
+        actual = batch_queue.put_many(items, 0.01)
+
+        # Test
+        assert actual == expected
+        assert batch_queue.qsize() == MAX_SIZE
+
+    def test_get_many_limit(self, batch_queue: queue_proxy_wrapper.BatchQueue) -> None:
+        """
+        Returns at most max_items, in order.
+        """
+        # Setup
+        batch_queue.put_many([1, 2, 3])
+
+        # Run
+        first = batch_queue.get_many(2, 0.0)
+        second = batch_queue.get_many(2, 0.0)
+        third = batch_queue.get_many(2, 0.0)
+
+        # Test
+        assert first == [1, 2]
+        assert second == [3]
+        assert third == []
+
+
+@pytest.mark.parametrize(
+    "wrapper_type",
+    [queue_proxy_wrapper.QueueProxyWrapper, shared_memory_queue.SharedMemoryQueueWrapper],
+)
+def test_wrapper_batches(wrapper_type: type) -> None:
+    """
+    Both transports move batches and interoperate with single item operations.
+    """
+    # Setup
+    mp_manager = queue_proxy_wrapper.create_manager()
+    wrapper = wrapper_type(mp_manager, MAX_SIZE)
+
+    # Run
+    put_count = wrapper.put_many(["a", "b", "c"], 1.0)
+    wrapper.queue.put("d")
+    batch = wrapper.get_many(MAX_SIZE, 1.0)
+    empty_batch = wrapper.get_many(MAX_SIZE, 0.01)
+
+    # Test
+    assert put_count == 3
+    assert batch == ["a", "b", "c", "d"]
+    assert empty_batch == []
+    assert wrapper.queue.empty()
+
+    mp_manager.shutdown()
+
+
+@pytest.mark.parametrize(
+    "wrapper_type",
+    [
+        queue_proxy_wrapper.QueueProxyWrapper,
+        shared_memory_queue.SharedMemoryQueueWrapper,
+        conflating_mailbox.ConflatingMailboxWrapper,
+    ],
+)
+def test_close_wakes_getters(wrapper_type: type) -> None:
+    """
+    Closing wakes every blocked getter with the sentinel, and later puts are discarded.
+    """
+    # Setup
+    mp_manager = queue_proxy_wrapper.create_manager()
+    wrapper = wrapper_type(mp_manager)
+    results = []
+    getters = [
+        threading.Thread(target=lambda: results.append(wrapper.queue.get())) for _ in range(3)
+    ]
+    for getter in getters:
+        getter.start()
+
+    # Run
+    time.sleep(0.05)
+    start = time.perf_counter()
+    wrapper.close()
+    for getter in getters:
+        getter.join(1.0)
+
+    elapsed = time.perf_counter() - start
+    wrapper.queue.put("discarded")
+
+    # Test
+    assert results == [None, None, None]
+    assert elapsed < 0.5
+    assert wrapper.queue.get() is None
+    assert wrapper.get_many(MAX_SIZE, 0.0) == [None]
+
+    mp_manager.shutdown()
+
+
+@pytest.mark.parametrize(
+    "wrapper_type",
+    [queue_proxy_wrapper.QueueProxyWrapper, shared_memory_queue.SharedMemoryQueueWrapper],
+)
+def test_close_wakes_putters(wrapper_type: type) -> None:
+    """
+    Closing wakes every putter blocked on a full queue.
+    """
+    # Setup
+    mp_manager = queue_proxy_wrapper.create_manager()
+    wrapper = wrapper_type(mp_manager, 1)
+    wrapper.queue.put("first")
+    putters = [threading.Thread(target=wrapper.queue.put, args=(i,)) for i in range(3)]
+    for putter in putters:
+        putter.start()
+
+    # Run
+    time.sleep(0.05)
+    wrapper.close()
+    for putter in putters:
+        putter.join(1.0)
+
+    # Test
+    assert not any(putter.is_alive() for putter in putters)
+    assert wrapper.queue.is_closed()
+    assert wrapper.queue.qsize() == 0
+
+    mp_manager.shutdown()
@@ -0,0 +1,162 @@
+"""
+Test queue instrumentation.
+"""
+
+import multiprocessing as mp
+import queue
+import threading
+import time
+
+import pytest
+
+from utilities.workers import conflating_mailbox
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_statistics
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def instrumented_queue() -> queue_statistics.InstrumentedQueue:  # type: ignore
+    """
+    Instrumented batch queue in this process.
+    """
+    yield queue_statistics.InstrumentedQueue(queue_proxy_wrapper.BatchQueue(4))  # type: ignore
+
+
+class TestInstrumentedQueue:
+    """
+    Statistics recorded by the instrumented queue.
+    """
+
+    def test_counts(self, instrumented_queue: queue_statistics.InstrumentedQueue) -> None:
+        """
+        Items and sentinels are counted and unwrapped on the way out.
+        """
+        # Setup
+        expected = [1, 2, None]
+
+        # Run
+        instrumented_queue.put(1)
+        instrumented_queue.put_many([2, None])
+        first = instrumented_queue.get()
+        rest = instrumented_queue.get_many(10)
+        statistics = instrumented_queue.get_statistics()
+
+        # Test
+        assert [first] + rest == expected
+        assert statistics.put_count == 3
+        assert statistics.get_count == 3
+        assert statistics.sentinel_put_count == 1
+        assert statistics.sentinel_get_count == 1
+        assert statistics.depth == 0
+        assert statistics.high_water_depth == 3
+        assert sum(statistics.residence_histogram) == 3
+
+    def test_timeout_recorded(self, instrumented_queue: queue_statistics.InstrumentedQueue) -> None:
+        """
+        Time blocked on an empty queue is recorded even when the get times out.
+        """
+        # Setup
+        timeout = 0.05
+
+        # Run
+        with pytest.raises(queue.Empty):
+            instrumented_queue.get(True, timeout)
+
+        statistics = instrumented_queue.get_statistics()
+
+        # Test
+        assert statistics.get_count == 0
+        assert statistics.get_blocked_max >= timeout
+        assert sum(statistics.get_blocked_histogram) == 1
+
+    def test_blocked_put(self) -> None:
+        """
+        Time a producer spent blocked on a full queue is recorded as put blocked time,
+        and excluded from the time items spent in the queue after their put.
+        """
+        # Setup
+        blocked_time = 0.2
+        instrumented_queue = queue_statistics.InstrumentedQueue(
+            queue_proxy_wrapper.BatchQueue(1), 1
+        )
+        instrumented_queue.put(1)
+        producer = threading.Thread(target=instrumented_queue.put, args=(2,))
+
+        # Run
+        producer.start()
+        time.sleep(blocked_time)
+        instrumented_queue.get()
+        instrumented_queue.get()
+        producer.join()
+        statistics = instrumented_queue.get_statistics()
+
+        # Test
+        assert statistics.put_blocked_max >= blocked_time * 0.9
+        assert statistics.residence_max >= blocked_time * 0.9
+        # Only the first item waited in the queue, for the blocked time
+        assert statistics.get_queued_mean() == pytest.approx(blocked_time / 2, abs=0.05)
+
+    def test_mailbox_overwrites_evicted(self) -> None:
+        """
+        Puts replacing the unread item of a mailbox are evicted, keeping the depth at most 1 .
+        """
+        # Setup
+        put_count = 50
+        instrumented_queue = queue_statistics.InstrumentedQueue(
+            conflating_mailbox.ConflatingMailbox(), 1, True
+        )
+
+        # Run
+        for i in range(0, put_count):
+            instrumented_queue.put(i)
+
+        item = instrumented_queue.get()
+        statistics = instrumented_queue.get_statistics()
+
+        # Test
+        assert item == put_count - 1
+        assert statistics.high_water_depth == 1
+        assert statistics.evicted_count == put_count - 1
+        assert statistics.depth == 0
+
+    def test_passthrough(self, instrumented_queue: queue_statistics.InstrumentedQueue) -> None:
+        """
+        Queue methods not instrumented are passed through to the underlying queue.
+        """
+        # Run
+        maxsize = instrumented_queue.maxsize
+
+        # Test
+        assert maxsize == 4
+
+
+def test_wrapper_statistics() -> None:
+    """
+    Only instrumented wrappers provide statistics, which are shared across processes.
+    """
+    # Setup
+    mp_manager = queue_proxy_wrapper.create_manager()
+    plain = queue_proxy_wrapper.QueueProxyWrapper(mp_manager)
+    instrumented = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 0, True)
+
+    # Run
+    worker = mp.Process(target=instrumented.queue.put, args=("item",))
+    worker.start()
+    worker.join()
+    plain_result, _ = plain.get_statistics()
+    result, statistics = instrumented.get_statistics()
+
+    # Test
+    assert not plain_result
+    assert result
+    assert statistics is not None
+    assert statistics.put_count == 1
+    assert statistics.depth == 1
+    assert instrumented.queue.get() == "item"
+
+    mp_manager.shutdown()
@@ -0,0 +1,282 @@
+"""
+Test waiting on several queues at once.
+"""
+
+import asyncio
+import multiprocessing.managers
+import threading
+import time
+
+import pytest
+
+from utilities.workers import conflating_mailbox
+from utilities.workers import queue_notifier
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_wait
+from utilities.workers import shared_memory_queue
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def mp_manager() -> multiprocessing.managers.SyncManager:  # type: ignore
+    """
+    Manager hosting queues.
+    """
+    manager = queue_proxy_wrapper.create_manager()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture()
+def notified_queues(
+    mp_manager: multiprocessing.managers.SyncManager,
+) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":  # type: ignore
+    """
+    One queue of each transport sharing a notifier.
+    """
+    notifier = queue_notifier.QueueNotifier()
+    yield [  # type: ignore
+        queue_proxy_wrapper.QueueProxyWrapper(mp_manager, notifier=notifier),
+        shared_memory_queue.SharedMemoryQueueWrapper(mp_manager, notifier=notifier),
+        conflating_mailbox.ConflatingMailboxWrapper(mp_manager, notifier=notifier),
+    ]
+
+
+class TestWaitAny:
+    """
+    Waking on puts, timeouts, exit and close.
+    """
+
+    @pytest.mark.parametrize("index", [0, 1, 2])
+    def test_wakes_on_put(
+        self, notified_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]", index: int
+    ) -> None:
+        """
+        Returns the queue that was put into.
+        """
+        # Setup
+        timer = threading.Timer(0.05, notified_queues[index].queue.put, args=("item",))
+
+        # Run
+        timer.start()
+        result, ready_queues = queue_wait.wait_any(notified_queues, 5.0)
+
+        # Test
+        assert result
+        assert ready_queues == [notified_queues[index]]
+
+    def test_timeout(self, notified_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]") -> None:
+        """
+        Returns no queues once the timeout expires.
+        """
+        # Run
+        result, ready_queues = queue_wait.wait_any(notified_queues, 0.05)
+
+        # Test
+        assert result
+        assert ready_queues == []
+
+    def test_exit(self, notified_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]") -> None:
+        """
+        Returns no queues once exit is requested.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        timer = threading.Timer(0.05, controller.request_exit)
+
+        # Run
+        timer.start()
+        start = time.perf_counter()
+        result, ready_queues = queue_wait.wait_any(notified_queues, None, controller)
+        elapsed = time.perf_counter() - start
+
+        # Test
+        assert result
+        assert ready_queues == []
+        assert elapsed < 1.0
+
+    def test_close(self, notified_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]") -> None:
+        """
+        A closed queue is ready, since a get returns the sentinel without blocking.
+        """
+        # Setup
+        timer = threading.Timer(0.05, notified_queues[0].close)
+
+        # Run
+        timer.start()
+        result, ready_queues = queue_wait.wait_any(notified_queues)
+
+        # Test
+        assert result
+        assert ready_queues == [notified_queues[0]]
+        assert notified_queues[0].queue.get() is None
+
+
+def test_requires_shared_notifier(mp_manager: multiprocessing.managers.SyncManager) -> None:
+    """
+    Fails for queues without a single shared notifier.
+    """
+    # Setup
+    plain = queue_proxy_wrapper.QueueProxyWrapper(mp_manager)
+    first = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager, notifier=queue_notifier.QueueNotifier()
+    )
+    second = queue_proxy_wrapper.QueueProxyWrapper(
+        mp_manager, notifier=queue_notifier.QueueNotifier()
+    )
+
+    # Run
+    plain_result, _ = queue_wait.wait_any([plain], 0.0)
+    mixed_result, _ = queue_wait.wait_any([first, second], 0.0)
+
+    # Test
+    assert not plain_result
+    assert not mixed_result
+
+
+class TestGetOrExit:
+    """
+    Exit aware blocking get.
+    """
+
+    def test_item(self, mp_manager: multiprocessing.managers.SyncManager) -> None:
+        """
+        Returns an item that arrives while waiting.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(mp_manager)
+        timer = threading.Timer(0.1, wrapper.queue.put, args=("item",))
+
+        # Run
+        timer.start()
+        result, item = queue_wait.get_or_exit(wrapper, controller)
+
+        # Test
+        assert result
+        assert item == "item"
+
+    def test_exit(self, mp_manager: multiprocessing.managers.SyncManager) -> None:
+        """
+        Fails soon after exit is requested.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(mp_manager)
+        timer = threading.Timer(0.05, controller.request_exit)
+
+        # Run
+        timer.start()
+        start = time.perf_counter()
+        result, item = queue_wait.get_or_exit(wrapper, controller)
+        elapsed = time.perf_counter() - start
+
+        # Test
+        assert not result
+        assert item is None
+        assert elapsed < 0.05 + 4 * queue_wait.EXIT_CHECK_PERIOD
+
+    def test_timeout(self, mp_manager: multiprocessing.managers.SyncManager) -> None:
+        """
+        Fails once the timeout expires.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        wrapper = queue_proxy_wrapper.QueueProxyWrapper(mp_manager)
+
+        # Run
+        result, _ = queue_wait.get_or_exit(wrapper, controller, 0.1)
+
+        # Test
+        assert not result
+
+    @pytest.mark.parametrize("index", [0, 1, 2])
+    def test_notified_exit(
+        self, notified_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]", index: int
+    ) -> None:
+        """
+        Fails right away once exit is requested if the controller notifies the queue.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        wrapper = notified_queues[index]
+        controller.add_notifier(wrapper.get_notifier())
+        timer = threading.Timer(0.05, controller.request_exit)
+
+        # Run
+        timer.start()
+        start = time.perf_counter()
+        result, _ = queue_wait.get_or_exit(wrapper, controller)
+        elapsed = time.perf_counter() - start
+
+        # Test
+        assert not result
+        assert elapsed < 0.05 + queue_wait.EXIT_CHECK_PERIOD / 2
+
+    def test_notified_item(
+        self, notified_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]"
+    ) -> None:
+        """
+        Returns an item that arrives while waiting on the notifier.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        wrapper = notified_queues[0]
+        controller.add_notifier(wrapper.get_notifier())
+        timer = threading.Timer(0.05, wrapper.queue.put, args=("item",))
+
+        # Run
+        timer.start()
+        result, item = queue_wait.get_or_exit(wrapper, controller, 5.0)
+
+        # Test
+        assert result
+        assert item == "item"
+
+
+class TestAsyncGetOrExit:
+    """
+    Cancelling an asyncio get.
+    """
+
+    @pytest.mark.parametrize("is_notified", [False, True])
+    def test_cancel_keeps_order(
+        self, notified_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]", is_notified: bool
+    ) -> None:
+        """
+        Items put after the task is cancelled are left in the queue in order.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        wrapper = notified_queues[0]
+        if is_notified:
+            controller.add_notifier(wrapper.get_notifier())
+
+        async def cancel_while_waiting() -> bool:
+            task = asyncio.create_task(queue_wait.async_get_or_exit(wrapper, controller))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+            # The waiting thread may still be running, but does not take these
+            wrapper.queue.put("first")
+            wrapper.queue.put("second")
+            await asyncio.sleep(4 * queue_wait.EXIT_CHECK_PERIOD)
+            return task.cancelled()
+
+        # Run
+        is_cancelled = asyncio.run(cancel_while_waiting())
+        controller.request_exit()
+
+        # Test
+        assert is_cancelled
+        assert wrapper.queue.get(True, 1.0) == "first"
+        assert wrapper.queue.get(True, 1.0) == "second"
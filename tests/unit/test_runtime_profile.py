@@ -0,0 +1,88 @@
+"""
+Test applying runtime profiles in workers.
+"""
+
+import gc
+import multiprocessing as mp
+import os
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import runtime_profile
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+def report_worker(report_queue: mp.Queue, controller: worker_controller.WorkerController) -> None:
+    """
+    Reports the settings of its process after the first loop iteration.
+    """
+    controller.check_pause()
+    report_queue.put((os.nice(0), gc.get_threshold()[2], gc.get_freeze_count()))
+
+
+class TestRuntimeProfile:
+    """
+    Settings in the worker process and validation.
+    """
+
+    def test_applied_in_worker(self, local_logger: logger.Logger) -> None:
+        """
+        The worker runs with the profile, main keeps its settings.
+        """
+        # Setup
+        result, profile = runtime_profile.RuntimeProfile.create(
+            local_logger, os.sched_getaffinity(0), 3, True, True
+        )
+        assert result
+        assert profile is not None
+
+        report_queue = mp.Queue()
+        controller = worker_controller.WorkerController()
+        result, properties = worker_manager.WorkerProperties.create(
+            1, report_worker, (report_queue,), [], [], controller, local_logger, profile=profile
+        )
+        assert result
+        assert properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(properties, local_logger)
+        assert result
+        assert manager is not None
+
+        # Run
+        manager.start_workers()
+        nice, threshold_2, freeze_count = report_queue.get(timeout=5.0)
+        manager.join_workers(1.0)
+
+        # Test
+        assert nice == os.nice(0) + 3
+        assert threshold_2 > gc.get_threshold()[2]
+        assert freeze_count > 0
+
+    @pytest.mark.parametrize(
+        "cpu_affinity, nice",
+        [
+            (set(), 0),
+            ({os.cpu_count() + 1}, 0),
+            (None, 20),
+            (None, -21),
+        ],
+    )
+    def test_invalid(
+        self, local_logger: logger.Logger, cpu_affinity: "set[int] | None", nice: int
+    ) -> None:
+        """
+        Invalid settings are rejected in main instead of failing in the worker.
+        """
+        # Run
+        result, profile = runtime_profile.RuntimeProfile.create(local_logger, cpu_affinity, nice)
+
+        # Test
+        assert not result
+        assert profile is None
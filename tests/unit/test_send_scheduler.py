@@ -0,0 +1,189 @@
+"""
+Test prioritizing and rate limiting sends.
+"""
+
+import threading
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from modules.mavlink_hub import send_scheduler
+
+
+TIMEOUT = 0.2  # seconds
+
+
+def command_long_arguments(command: int) -> "tuple":
+    """
+    Positional arguments of command_long_send() for the command.
+    """
+    return (1, 0, command, 0, 0, 0, 0, 0, 0, 0, 0)
+
+
+def take_names(scheduler: send_scheduler.SendScheduler, count: int) -> "list[str]":
+    """
+    Takes sends and records them.
+
+    Returns the names of the sends taken before the timeout.
+    """
+    names = []
+    for _ in range(0, count):
+        result, send = scheduler.get(TIMEOUT)
+        if not result:
+            break
+
+        priority, name, _, _, put_time = send
+        scheduler.record(priority, put_time)
+        names.append(name)
+
+    return names
+
+
+class TestSendScheduler:
+    """
+    Heartbeats before safety commands before routine sends, within the rate limits.
+    """
+
+    @pytest.mark.parametrize(
+        "name, args, kwargs, priority",
+        [
+            ("heartbeat_send", (6, 8, 0, 0, 0), {}, send_scheduler.HEARTBEAT),
+            (
+                "command_long_send",
+                command_long_arguments(mavutil.mavlink.MAV_CMD_NAV_LAND),
+                {},
+                send_scheduler.SAFETY,
+            ),
+            (
+                "command_long_send",
+                (1, 0),
+                {"command": mavutil.mavlink.MAV_CMD_NAV_RETURN_TO_LAUNCH},
+                send_scheduler.SAFETY,
+            ),
+            (
+                "command_long_send",
+                command_long_arguments(mavutil.mavlink.MAV_CMD_CONDITION_YAW),
+                {},
+                send_scheduler.ROUTINE,
+            ),
+            ("set_mode_send", (1, 0, 0), {}, send_scheduler.ROUTINE),
+        ],
+    )
+    def test_classify(self, name: str, args: "tuple", kwargs: "dict", priority: int) -> None:
+        """
+        Heartbeats and safety commands are recognized, everything else is routine.
+        """
+        # Run
+        result = send_scheduler.classify(name, args, kwargs)
+
+        # Test
+        assert result == priority
+
+    def test_priority_order(self) -> None:
+        """
+        A heartbeat put after a burst of commands is written first.
+        """
+        # Setup
+        result, scheduler = send_scheduler.SendScheduler.create(16)
+        assert result
+        assert scheduler is not None
+
+        for _ in range(0, 10):
+            scheduler.put(
+                "command_long_send",
+                command_long_arguments(mavutil.mavlink.MAV_CMD_CONDITION_YAW),
+                {},
+            )
+
+        scheduler.put(
+            "command_long_send", command_long_arguments(mavutil.mavlink.MAV_CMD_NAV_LAND), {}
+        )
+        scheduler.put("heartbeat_send", (6, 8, 0, 0, 0), {})
+
+        # Run
+        names = take_names(scheduler, 12)
+        statistics = scheduler.get_statistics()
+
+        # Test
+        assert names[0] == "heartbeat_send"
+        assert len(names) == 12
+        assert statistics["heartbeat"].sent_count == 1
+        assert statistics["safety"].sent_count == 1
+        assert statistics["routine"].sent_count == 10
+        assert statistics["routine"].latency_max >= statistics["routine"].latency_total / 10
+
+    def test_rate_limit(self) -> None:
+        """
+        Routine sends beyond the burst wait for the rate, heartbeats are not held back.
+        """
+        # Setup
+        result, scheduler = send_scheduler.SendScheduler.create(
+            16, {send_scheduler.ROUTINE: (1.0, 2)}
+        )
+        assert result
+        assert scheduler is not None
+
+        for _ in range(0, 3):
+            scheduler.put("set_mode_send", (1, 0, 0), {})
+
+        # Run
+        start = time.perf_counter()
+        burst_names = take_names(scheduler, 3)
+        scheduler.put("heartbeat_send", (6, 8, 0, 0, 0), {})
+        heartbeat_names = take_names(scheduler, 1)
+        elapsed = time.perf_counter() - start
+
+        # Test
+        assert burst_names == ["set_mode_send", "set_mode_send"]
+        assert heartbeat_names == ["heartbeat_send"]
+        assert elapsed < 1.0
+        assert scheduler.get_statistics()["routine"].limited_count >= 1
+
+    def test_close(self) -> None:
+        """
+        Closing wakes a sender blocked on a full queue,
+        and polling the closed queues neither returns sends nor spends the rate.
+        """
+        # Setup
+        result, scheduler = send_scheduler.SendScheduler.create(
+            1, {send_scheduler.ROUTINE: (1.0, 1)}
+        )
+        assert result
+        assert scheduler is not None
+
+        scheduler.put("set_mode_send", (1, 0, 0), {})
+        sender = threading.Thread(target=scheduler.put, args=("set_mode_send", (1, 0, 0), {}))
+        sender.start()
+        time.sleep(0.05)
+
+        # Run
+        scheduler.close()
+        sender.join(TIMEOUT)
+        result, _ = scheduler.get(TIMEOUT)
+
+        # Test
+        assert not sender.is_alive()
+        assert not result
+        assert scheduler.get_statistics()["routine"].limited_count == 0
+
+    @pytest.mark.parametrize(
+        "maxsize, rate_limits",
+        [
+            (0, None),
+            (16, {send_scheduler.ROUTINE: (1.0, 0)}),
+            (16, {5: (1.0, 1)}),
+        ],
+    )
+    def test_invalid(
+        self, maxsize: int, rate_limits: "dict[int, tuple[float, int]] | None"
+    ) -> None:
+        """
+        Invalid sizes and rate limits are rejected.
+        """
+        # Run
+        result, scheduler = send_scheduler.SendScheduler.create(maxsize, rate_limits)
+
+        # Test
+        assert not result
+        assert scheduler is None
@@ -0,0 +1,184 @@
+"""
+Test the shared memory ring buffer queue.
+"""
+
+import multiprocessing as mp
+import queue
+
+import pytest
+
+from utilities.workers import shared_memory_queue
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+SLOT_COUNT = 3
+SLOT_SIZE = 256
+
+
+def put_batch(
+    output_queue: shared_memory_queue.SharedMemoryRingBuffer,
+    items: list,
+) -> None:
+    """
+    Puts all items in a single batch.
+    """
+    output_queue.put_many(items)
+
+
+def echo(
+    input_queue: shared_memory_queue.SharedMemoryRingBuffer,
+    output_queue: shared_memory_queue.SharedMemoryRingBuffer,
+) -> None:
+    """
+    Echoes items until the sentinel (None).
+    """
+    while True:
+        item = input_queue.get()
+        output_queue.put(item)
+        if item is None:
+            return
+
+
+@pytest.fixture()
+def ring_buffer() -> shared_memory_queue.SharedMemoryRingBuffer:  # type: ignore
+    """
+    Small ring buffer.
+    """
+    buffer = shared_memory_queue.SharedMemoryRingBuffer(SLOT_COUNT, SLOT_SIZE)
+    yield buffer  # type: ignore
+    buffer.unlink()
+
+
+class TestSharedMemoryRingBuffer:
+    """
+    Ring buffer in a single process.
+    """
+
+    def test_fifo_order(self, ring_buffer: shared_memory_queue.SharedMemoryRingBuffer) -> None:
+        """
+        Items come out in the order they went in, across wraparound.
+        """
+        # Setup
+        expected = [1, "two", {"three": 3.0}, None, (5,)]
+
+        # Run
+        actual = []
+        for item in expected:
+            ring_buffer.put(item)
+            actual.append(ring_buffer.get())
+
+        # Test
+        assert actual == expected
+
+    def test_full_and_empty(self, ring_buffer: shared_memory_queue.SharedMemoryRingBuffer) -> None:
+        """
+        Raises the standard queue exceptions when full or empty.
+        """
+        # Setup
+        assert ring_buffer.empty()
+
+        # Run
+        for i in range(SLOT_COUNT):
+            ring_buffer.put(i)
+
+        # Test
+        assert ring_buffer.full()
+        assert ring_buffer.qsize() == SLOT_COUNT
+        with pytest.raises(queue.Full):
+            ring_buffer.put_nowait(SLOT_COUNT)
+
+        for _ in range(SLOT_COUNT):
+            ring_buffer.get_nowait()
+
+        with pytest.raises(queue.Empty):
+            ring_buffer.get(timeout=0.01)
+
+    def test_item_too_large(self, ring_buffer: shared_memory_queue.SharedMemoryRingBuffer) -> None:
+        """
+        Items larger than a slot are rejected without consuming a slot.
+        """
+        with pytest.raises(ValueError):
+            ring_buffer.put(b"x" * SLOT_SIZE)
+
+        assert ring_buffer.empty()
+
+
+def test_wrapper_across_processes() -> None:
+    """
+    Items round trip through a worker process.
+    """
+    # Setup
+    input_queue = shared_memory_queue.SharedMemoryQueueWrapper(None, SLOT_COUNT)
+    output_queue = shared_memory_queue.SharedMemoryQueueWrapper(None, SLOT_COUNT)
+    expected = list(range(10)) + [None]
+    worker = mp.Process(target=echo, args=(input_queue.queue, output_queue.queue))
+
+    # Run
+    worker.start()
+    actual = []
+    for item in expected:
+        input_queue.queue.put(item)
+        actual.append(output_queue.queue.get(timeout=5.0))
+    worker.join()
+
+    # Test
+    assert actual == expected
+
+
+def test_batch_larger_than_slot_count() -> None:
+    """
+    Batches larger than the ring buffer are published in runs as slots free up.
+    """
+    # Setup
+    wrapper = shared_memory_queue.SharedMemoryQueueWrapper(None, SLOT_COUNT)
+    expected = list(range(SLOT_COUNT * 4))
+    worker = mp.Process(target=put_batch, args=(wrapper.queue, expected))
+
+    # Run
+    worker.start()
+    actual = []
+    while len(actual) < len(expected):
+        actual += wrapper.get_many(SLOT_COUNT, 5.0)
+    worker.join()
+
+    # Test
+    assert actual == expected
+
+
+def test_unlink_in_other_process(ring_buffer: shared_memory_queue.SharedMemoryRingBuffer) -> None:
+    """
+    Only the creating process frees the shared memory, copies sent to workers do nothing.
+    """
+    # Setup
+    # Same state as after unpickling in a worker
+    worker_copy = shared_memory_queue.SharedMemoryRingBuffer.__new__(
+        shared_memory_queue.SharedMemoryRingBuffer
+    )
+    worker_copy.__setstate__(ring_buffer.__getstate__())
+
+    # Run
+    worker_copy.unlink()
+    ring_buffer.put("item")
+
+    # Test
+    assert ring_buffer.get() == "item"
+
+
+def test_sentinel_fills_default_slot_count() -> None:
+    """
+    The default slot count is the size, so filling with the sentinel fills every slot.
+    """
+    # Setup
+    wrapper = shared_memory_queue.SharedMemoryQueueWrapper(None)
+
+    # Run
+    wrapper.fill_queue_with_sentinel()
+
+    # Test
+    assert wrapper.maxsize > 0
+    assert wrapper.queue.full()
+    wrapper.unlink()
@@ -0,0 +1,176 @@
+"""
+Test the TelemetryData representation and conversions.
+"""
+
+import pickle
+
+import pytest
+
+from modules.telemetry import telemetry
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def telemetry_data() -> telemetry.TelemetryData:  # type: ignore
+    """
+    Telemetry with every field set.
+    """
+    data = telemetry.TelemetryData(
+        time_since_boot=1234,
+        x=1.0,
+        y=-2.0,
+        z=3.5,
+        x_velocity=0.1,
+        y_velocity=0.2,
+        z_velocity=-0.3,
+        roll=0.01,
+        pitch=-0.02,
+        yaw=3.1,
+        roll_speed=0.001,
+        pitch_speed=0.002,
+        yaw_speed=-0.003,
+    )
+    yield data  # type: ignore
+
+
+class TestTelemetryDataEncoding:
+    """
+    Binary encoding and pickling.
+    """
+
+    def test_round_trip(self, telemetry_data: telemetry.TelemetryData) -> None:
+        """
+        Decoding the encoding gives back every field.
+        """
+        # Run
+        actual = telemetry.TelemetryData.from_bytes(telemetry_data.to_bytes())
+
+        # Test
+        assert actual.to_tuple() == telemetry_data.to_tuple()
+
+    def test_none_fields(self) -> None:
+        """
+        Fields that are None stay None, 0 stays 0 .
+        """
+        # Setup
+        expected = telemetry.TelemetryData(time_since_boot=0, x=0.0, yaw=None)
+
+        # Run
+        actual = telemetry.TelemetryData.from_bytes(expected.to_bytes())
+
+        # Test
+        assert actual.to_tuple() == expected.to_tuple()
+        assert actual.time_since_boot == 0
+        assert actual.yaw is None
+
+    def test_pickle_uses_encoding(self, telemetry_data: telemetry.TelemetryData) -> None:
+        """
+        Pickling goes through the encoding and is smaller than the instance dictionary.
+        """
+        # Run
+        data = pickle.dumps(telemetry_data, pickle.HIGHEST_PROTOCOL)
+        actual = pickle.loads(data)
+
+        # Test
+        assert telemetry_data.to_bytes() in data
+        fields = dict(zip(telemetry.TelemetryData.FIELDS, telemetry_data.to_tuple()))
+        assert len(data) < len(pickle.dumps(fields, pickle.HIGHEST_PROTOCOL))
+        assert actual.to_tuple() == telemetry_data.to_tuple()
+
+    def test_float_time(self) -> None:
+        """
+        A float time since boot is encoded as an integer instead of failing in a queue put.
+        """
+        # Setup
+        expected = telemetry.TelemetryData(time_since_boot=1234.0, x=1.0)
+
+        # Run
+        actual = pickle.loads(pickle.dumps(expected))
+
+        # Test
+        assert actual.time_since_boot == 1234
+        assert isinstance(actual.time_since_boot, int)
+        assert actual.x == 1.0
+
+    def test_compact(self, telemetry_data: telemetry.TelemetryData) -> None:
+        """
+        The compact encoding keeps single precision and pickles smaller.
+        """
+        # Setup
+        compact = telemetry.CompactTelemetryData(*telemetry_data.to_tuple())
+
+        # Run
+        data = pickle.dumps(compact, pickle.HIGHEST_PROTOCOL)
+        actual = pickle.loads(data)
+
+        # Test
+        assert len(compact.to_bytes(True)) < len(telemetry_data.to_bytes())
+        assert len(data) < len(pickle.dumps(telemetry_data, pickle.HIGHEST_PROTOCOL))
+        assert type(actual) is telemetry.TelemetryData  # pylint: disable=unidiomatic-typecheck
+        assert actual.time_since_boot == 1234
+        assert actual.to_tuple()[1:] == pytest.approx(telemetry_data.to_tuple()[1:], rel=1e-6)
+
+    @pytest.mark.parametrize(
+        "time_since_boot, is_compact",
+        [(0, True), ((1 << 32) - 1, True), (1 << 32, False), (-1, False)],
+    )
+    def test_compact_time_range(self, time_since_boot: int, is_compact: bool) -> None:
+        """
+        Times that do not fit the compact unsigned 32 bit time use the full encoding.
+        """
+        # Setup
+        expected = telemetry.CompactTelemetryData(time_since_boot, x=1.0)
+
+        # Run
+        data = expected.to_bytes(True)
+        actual = pickle.loads(pickle.dumps(expected))
+
+        # Test
+        assert (len(data) < len(expected.to_bytes())) == is_compact
+        assert actual.time_since_boot == time_since_boot
+        assert actual.x == 1.0
+
+
+class TestTelemetryDataConversions:
+    """
+    Slots, representation, tuples and NumPy rows.
+    """
+
+    def test_slots(self, telemetry_data: telemetry.TelemetryData) -> None:
+        """
+        There is no instance dictionary.
+        """
+        # Test
+        assert not hasattr(telemetry_data, "__dict__")
+        with pytest.raises(AttributeError):
+            telemetry_data.altitude = 1.0  # pylint: disable=assigning-non-slot
+
+    def test_repr(self, telemetry_data: telemetry.TelemetryData) -> None:
+        """
+        The representation is a single line with every field.
+        """
+        # Run
+        actual = str(telemetry_data)
+
+        # Test
+        assert "\n" not in actual
+        assert actual.startswith("TelemetryData(time_since_boot=1234, x=1.0, ")
+        assert actual.endswith("yaw_speed=-0.003)")
+        assert actual == repr(telemetry_data)
+
+    def test_tuple_round_trip(self, telemetry_data: telemetry.TelemetryData) -> None:
+        """
+        Converting to a tuple and back gives back every field.
+        """
+        # Run
+        values = telemetry_data.to_tuple()
+        actual = telemetry.TelemetryData.from_tuple(values)
+
+        # Test
+        assert values[0] == 1234
+        assert len(values) == len(telemetry.TelemetryData.FIELDS)
+        assert actual.to_tuple() == values
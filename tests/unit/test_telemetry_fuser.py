@@ -0,0 +1,224 @@
+"""
+Test fusing attitude and position messages into telemetry.
+"""
+
+import math
+
+import pytest
+from pymavlink import mavutil
+
+from modules.telemetry import telemetry
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+MAX_AGE = 0.5  # seconds
+
+
+def attitude(
+    time_boot_ms: int, roll: float = 0.1, yaw: float = 0.3
+) -> mavutil.mavlink.MAVLink_attitude_message:
+    """
+    ATTITUDE message at the boot time.
+    """
+    return mavutil.mavlink.MAVLink_attitude_message(time_boot_ms, roll, 0.2, yaw, 0.0, 0.0, 0.0)
+
+
+def position(
+    time_boot_ms: int, x: float = 1.0
+) -> mavutil.mavlink.MAVLink_local_position_ned_message:
+    """
+    LOCAL_POSITION_NED message at the boot time.
+    """
+    return mavutil.mavlink.MAVLink_local_position_ned_message(
+        time_boot_ms, x, 2.0, 3.0, 0.0, 0.0, 0.0
+    )
+
+
+@pytest.fixture()
+def fuser() -> telemetry.TelemetryFuser:  # type: ignore
+    """
+    Fuser with the maximum age.
+    """
+    result, fuser = telemetry.TelemetryFuser.create(MAX_AGE)
+    assert result
+    assert fuser is not None
+
+    yield fuser  # type: ignore
+
+
+@pytest.fixture()
+def interpolating_fuser() -> telemetry.TelemetryFuser:  # type: ignore
+    """
+    Fuser interpolating with the maximum age.
+    """
+    result, fuser = telemetry.TelemetryFuser.create(MAX_AGE, telemetry.INTERPOLATE)
+    assert result
+    assert fuser is not None
+
+    yield fuser  # type: ignore
+
+
+class TestTelemetryFuser:
+    """
+    Latest attitude and position are fused whenever either updates.
+    """
+
+    @pytest.mark.parametrize(
+        "max_age, mode, history_size",
+        [(0.0, telemetry.LATEST, 8), (MAX_AGE, "nearest", 8), (MAX_AGE, telemetry.INTERPOLATE, 1)],
+    )
+    def test_create_invalid(self, max_age: float, mode: str, history_size: int) -> None:
+        """
+        The maximum age must be positive, the mode known and the history hold a pair.
+        """
+        # Run
+        result, fuser = telemetry.TelemetryFuser.create(max_age, mode, history_size)
+
+        # Test
+        assert not result
+        assert fuser is None
+
+    def test_fuse_every_update(self, fuser: telemetry.TelemetryFuser) -> None:
+        """
+        After both types are received, every update of either type is fused.
+        """
+        # Run
+        first = fuser.update(attitude(0))
+        second = fuser.update(position(100, x=1.0))
+        third = fuser.update(attitude(333, roll=0.5))
+        fourth = fuser.update(position(500, x=4.0))
+
+        # Test
+        assert first == (False, None)
+        assert second[0] and third[0] and fourth[0]
+        assert second[1].time_since_boot == 100
+        assert third[1].time_since_boot == 333
+        assert third[1].roll == pytest.approx(0.5)
+        assert third[1].x == pytest.approx(1.0)
+        assert fourth[1].roll == pytest.approx(0.5)
+        assert fourth[1].x == pytest.approx(4.0)
+
+    def test_stale_pair(self, fuser: telemetry.TelemetryFuser) -> None:
+        """
+        Messages further apart than the maximum age are not paired.
+        """
+        # Setup
+        fuser.update(position(0))
+
+        # Run
+        stale_result, stale_data = fuser.update(attitude(1000))
+        fresh_result, fresh_data = fuser.update(position(1200))
+
+        # Test
+        assert not stale_result
+        assert stale_data is None
+        assert fresh_result
+        assert fresh_data.time_since_boot == 1200
+        assert fuser.get_stale_count() == 1
+
+    def test_other_type(self, fuser: telemetry.TelemetryFuser) -> None:
+        """
+        Other message types are ignored.
+        """
+        # Setup
+        fuser.update(attitude(0))
+        fuser.update(position(0))
+
+        # Run
+        result, telemetry_data = fuser.update(mavutil.mavlink.MAVLink_system_time_message(0, 0))
+
+        # Test
+        assert not result
+        assert telemetry_data is None
+
+
+class TestTelemetryFuserInterpolate:
+    """
+    Attitude and position are interpolated to the latest time both streams have reached.
+    """
+
+    def test_interpolate(self, interpolating_fuser: telemetry.TelemetryFuser) -> None:
+        """
+        The stream that is ahead is interpolated to the time of the one behind.
+        """
+        # Setup
+        interpolating_fuser.update(position(0, x=0.0))
+        interpolating_fuser.update(attitude(0, roll=0.0))
+        interpolating_fuser.update(position(500, x=5.0))
+
+        # Run
+        result, telemetry_data = interpolating_fuser.update(attitude(333, roll=0.3))
+
+        # Test
+        assert result
+        assert telemetry_data.time_since_boot == 333
+        assert telemetry_data.x == pytest.approx(3.33)
+        assert telemetry_data.roll == pytest.approx(0.3)
+
+    def test_time_not_advanced(self, interpolating_fuser: telemetry.TelemetryFuser) -> None:
+        """
+        Updates of the stream that is ahead do not repeat the same output.
+        """
+        # Setup
+        interpolating_fuser.update(position(0))
+        first_result, _ = interpolating_fuser.update(attitude(0))
+
+        # Run
+        second_result, telemetry_data = interpolating_fuser.update(attitude(333))
+
+        # Test
+        assert first_result
+        assert not second_result
+        assert telemetry_data is None
+
+    def test_yaw_shortest_arc(self, interpolating_fuser: telemetry.TelemetryFuser) -> None:
+        """
+        Yaw is interpolated across the wrap at pi instead of the long way round.
+        """
+        # Setup
+        interpolating_fuser.update(attitude(0, yaw=math.pi - 0.1))
+        interpolating_fuser.update(attitude(200, yaw=-math.pi + 0.1))
+
+        # Run
+        result, telemetry_data = interpolating_fuser.update(position(100))
+
+        # Test
+        assert result
+        assert abs(telemetry_data.yaw) == pytest.approx(math.pi)
+
+    def test_samples_too_far_apart(self, interpolating_fuser: telemetry.TelemetryFuser) -> None:
+        """
+        Samples further apart than the maximum age are not interpolated.
+        """
+        # Setup
+        interpolating_fuser.update(attitude(0))
+        interpolating_fuser.update(attitude(1000))
+
+        # Run
+        result, telemetry_data = interpolating_fuser.update(position(500))
+
+        # Test
+        assert not result
+        assert telemetry_data is None
+        assert interpolating_fuser.get_stale_count() == 1
+
+    def test_restart(self, interpolating_fuser: telemetry.TelemetryFuser) -> None:
+        """
+        Boot time going backwards restarts both histories.
+        """
+        # Setup
+        interpolating_fuser.update(attitude(5000))
+        interpolating_fuser.update(position(5000))
+
+        # Run
+        restart_result, _ = interpolating_fuser.update(attitude(0))
+        result, telemetry_data = interpolating_fuser.update(position(0))
+
+        # Test
+        assert not restart_result
+        assert result
+        assert telemetry_data.time_since_boot == 0
@@ -0,0 +1,264 @@
+"""
+Test the shared memory telemetry history.
+"""
+
+import math
+import multiprocessing as mp
+
+import numpy as np
+import pytest
+
+from modules.telemetry import telemetry
+from modules.telemetry import telemetry_history
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+CAPACITY = 4
+APPEND_COUNT = 2000
+
+
+def make_telemetry_data(index: int) -> telemetry.TelemetryData:
+    """
+    Telemetry at index * 100 ms with every float field set to the index.
+    """
+    return telemetry.TelemetryData(index * 100, *([float(index)] * 12))
+
+
+def append_all(history: telemetry_history.TelemetryHistory, count: int) -> None:
+    """
+    Appends count telemetry.
+    """
+    for i in range(0, count):
+        history.append(make_telemetry_data(i))
+
+
+def read_last(
+    reader: telemetry_history.TelemetryHistory, output_queue: "mp.Queue[tuple[float, bool]]"
+) -> None:
+    """
+    Puts the latest x and whether appending through the reader succeeded.
+    """
+    output_queue.put((float(reader.get_last(1)[0, 1]), reader.append(make_telemetry_data(0))))
+
+
+@pytest.fixture()
+def history() -> telemetry_history.TelemetryHistory:  # type: ignore
+    """
+    Small history.
+    """
+    result, history = telemetry_history.TelemetryHistory.create(CAPACITY)
+    assert result
+    assert history is not None
+
+    yield history  # type: ignore
+
+
+class TestRowConversions:
+    """
+    Telemetry as NumPy rows.
+    """
+
+    def test_round_trip(self) -> None:
+        """
+        Converting to a row and back gives back every field.
+        """
+        # Setup
+        expected = make_telemetry_data(12)
+
+        # Run
+        row = telemetry_history.to_row(expected)
+        actual = telemetry_history.from_row(row)
+
+        # Test
+        assert row.dtype == np.float64
+        assert row.shape == (len(telemetry.TelemetryData.FIELDS),)
+        assert actual.to_tuple() == expected.to_tuple()
+        assert isinstance(actual.time_since_boot, int)
+
+    def test_none_fields(self) -> None:
+        """
+        None is NaN in a row.
+        """
+        # Setup
+        expected = telemetry.TelemetryData(x=0.0, yaw=1.0)
+
+        # Run
+        row = telemetry_history.to_row(expected)
+        actual = telemetry_history.from_row(row)
+
+        # Test
+        assert math.isnan(row[0])
+        assert row[1] == 0.0
+        assert actual.to_tuple() == expected.to_tuple()
+
+
+class TestTelemetryHistory:
+    """
+    Ring buffer and windowed queries in a single process.
+    """
+
+    def test_create_invalid(self) -> None:
+        """
+        The capacity must be positive.
+        """
+        # Run
+        result, history = telemetry_history.TelemetryHistory.create(0)
+
+        # Test
+        assert not result
+        assert history is None
+
+    def test_empty(self, history: telemetry_history.TelemetryHistory) -> None:
+        """
+        Queries of an empty history have no rows.
+        """
+        # Run
+        last = history.get_last(CAPACITY)
+        statistics = history.get_statistics()
+
+        # Test
+        assert last.shape == (0, len(telemetry.TelemetryData.FIELDS))
+        assert history.get_count() == 0
+        assert np.all(statistics.count == 0)
+        assert np.all(np.isnan(statistics.mean))
+        assert np.all(np.isnan(statistics.minimum))
+
+    def test_last_wraps(self, history: telemetry_history.TelemetryHistory) -> None:
+        """
+        The oldest telemetry is replaced when full, and rows stay oldest first.
+        """
+        # Setup
+        append_all(history, CAPACITY + 2)
+
+        # Run
+        last = history.get_last(3)
+        everything = history.get_last(CAPACITY * 2)
+
+        # Test
+        assert history.get_count() == CAPACITY
+        assert last[:, 0].tolist() == [300.0, 400.0, 500.0]
+        assert everything[:, 0].tolist() == [200.0, 300.0, 400.0, 500.0]
+        actual = telemetry_history.from_row(last[-1])
+        assert actual.to_tuple() == make_telemetry_data(5).to_tuple()
+
+    def test_time_range(self, history: telemetry_history.TelemetryHistory) -> None:
+        """
+        Only telemetry within the inclusive time range is returned.
+        """
+        # Setup
+        append_all(history, CAPACITY)
+
+        # Run
+        rows = history.get_time_range(100, 250)
+
+        # Test
+        assert rows[:, 0].tolist() == [100.0, 200.0]
+
+    def test_statistics(self, history: telemetry_history.TelemetryHistory) -> None:
+        """
+        Statistics are per field over the window, leaving out fields that are None.
+        """
+        # Setup
+        append_all(history, 3)
+        history.append(telemetry.TelemetryData(300, x=3.0))
+        x = telemetry_history.FIELD_INDEX["x"]
+        yaw = telemetry_history.FIELD_INDEX["yaw"]
+
+        # Run
+        statistics = history.get_statistics()
+        last_two = history.get_statistics(2)
+
+        # Test
+        assert statistics.count[x] == 4
+        assert statistics.mean[x] == pytest.approx(1.5)
+        assert statistics.variance[x] == pytest.approx(1.25)
+        assert statistics.minimum[x] == 0.0
+        assert statistics.maximum[x] == 3.0
+        assert statistics.count[yaw] == 3
+        assert statistics.maximum[yaw] == 2.0
+        assert last_two.mean[x] == pytest.approx(2.5)
+        assert last_two.count[yaw] == 1
+
+    def test_time_range_statistics(self, history: telemetry_history.TelemetryHistory) -> None:
+        """
+        Statistics are over the telemetry within the inclusive time range.
+        """
+        # Setup
+        append_all(history, CAPACITY)
+        x = telemetry_history.FIELD_INDEX["x"]
+
+        # Run
+        statistics = history.get_time_range_statistics(100, 250)
+        empty = history.get_time_range_statistics(600, 700)
+
+        # Test
+        assert statistics.count[x] == 2
+        assert statistics.mean[x] == pytest.approx(1.5)
+        assert statistics.minimum[x] == 1.0
+        assert statistics.maximum[x] == 2.0
+        assert empty.count[x] == 0
+        assert np.isnan(empty.mean[x])
+
+    def test_reader_read_only(self, history: telemetry_history.TelemetryHistory) -> None:
+        """
+        Readers see appends but cannot append or write.
+        """
+        # Setup
+        reader = history.get_reader()
+
+        # Run
+        history.append(make_telemetry_data(1))
+        result = reader.append(make_telemetry_data(2))
+        last = reader.get_last(CAPACITY)
+
+        # Test
+        assert not result
+        assert last[:, 0].tolist() == [100.0]
+
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_reader_across_processes(
+    history: telemetry_history.TelemetryHistory, start_method: str
+) -> None:
+    """
+    A reader passed to a worker process sees the shared history and stays read only.
+    """
+    # Setup
+    context = mp.get_context(start_method)
+    output_queue = context.Queue()
+    history.append(make_telemetry_data(7))
+    worker = context.Process(target=read_last, args=(history.get_reader(), output_queue))
+
+    # Run
+    worker.start()
+    actual = output_queue.get(timeout=10.0)
+    worker.join()
+
+    # Test
+    assert actual == (7.0, False)
+
+
+def test_consistent_while_appending(history: telemetry_history.TelemetryHistory) -> None:
+    """
+    Rows read while a worker process appends are never partially written.
+    """
+    # Setup
+    reader = history.get_reader()
+    worker = mp.Process(target=append_all, args=(history, APPEND_COUNT))
+
+    # Run
+    worker.start()
+    windows = []
+    while worker.is_alive():
+        windows.append(reader.get_last(CAPACITY))
+    worker.join()
+
+    # Test
+    for window in windows:
+        for row in window:
+            assert np.all(row[1:] == row[0] / 100)
+    assert reader.get_last(1)[0, 1] == APPEND_COUNT - 1
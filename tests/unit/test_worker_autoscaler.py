@@ -0,0 +1,146 @@
+"""
+Test scaling workers with their input queue depth.
+"""
+
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_wait
+from utilities.workers import worker_autoscaler
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+ITEM_TIME = 0.01  # seconds
+ITEM_COUNT = 100
+PERIOD = 0.05  # seconds
+IDLE_TIME = 0.2  # seconds
+
+
+def slow_worker(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Takes a while for every item.
+    """
+    while not controller.is_exit_requested():
+        result, item = queue_wait.get_or_exit(input_queue, controller)
+        if not result or item is None:
+            break
+
+        time.sleep(ITEM_TIME)
+
+
+@pytest.fixture()
+def input_queue() -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Instrumented input queue of the workers.
+    """
+    mp_manager = queue_proxy_wrapper.create_manager()
+    yield queue_proxy_wrapper.QueueProxyWrapper(mp_manager, instrumented=True)  # type: ignore
+    mp_manager.shutdown()
+
+
+def run_until(
+    autoscaler: worker_autoscaler.WorkerAutoscaler,
+    manager: worker_manager.WorkerManager,
+    count: int,
+    timeout: float,
+) -> bool:
+    """
+    Runs the autoscaler until the manager has the number of workers.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(autoscaler.update(time.monotonic()))
+        if manager.get_worker_count() == count:
+            return True
+
+    return False
+
+
+class TestWorkerAutoscaler:
+    """
+    Scaling up on backlog and down on idle.
+    """
+
+    def test_scale_up_and_down(
+        self,
+        local_logger: logger.Logger,
+        input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    ) -> None:
+        """
+        Workers are added while the queue backs up and retired once it stays empty.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        result, properties = worker_manager.WorkerProperties.create(
+            1, slow_worker, (), [input_queue], [], controller, local_logger
+        )
+        assert result
+        assert properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(properties, local_logger)
+        assert result
+        assert manager is not None
+
+        result, autoscaler = worker_autoscaler.WorkerAutoscaler.create(
+            manager,
+            1,
+            3,
+            local_logger,
+            scale_up_cooldown=PERIOD,
+            scale_down_idle_time=IDLE_TIME,
+            period=PERIOD,
+        )
+        assert result
+        assert autoscaler is not None
+
+        manager.start_workers()
+
+        # Run
+        input_queue.put_many(list(range(ITEM_COUNT)))
+        is_scaled_up = run_until(autoscaler, manager, 3, 2.0)
+        is_scaled_down = run_until(autoscaler, manager, 1, ITEM_COUNT * ITEM_TIME + 2.0)
+
+        # Test
+        assert is_scaled_up
+        assert is_scaled_down
+        assert input_queue.queue.qsize() == 0
+        # Retired workers exit on their own and are not counted as dead
+        assert manager.get_dead_worker_count() == 0
+
+        controller.request_exit()
+        assert manager.join_workers(1.0)
+
+    def test_no_input_queues(self, local_logger: logger.Logger) -> None:
+        """
+        Workers without input queues cannot be scaled.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        result, properties = worker_manager.WorkerProperties.create(
+            1, slow_worker, (), [], [], controller, local_logger
+        )
+        assert result
+        assert properties is not None
+
+        result, manager = worker_manager.WorkerManager.create(properties, local_logger)
+        assert result
+        assert manager is not None
+
+        # Run
+        result, autoscaler = worker_autoscaler.WorkerAutoscaler.create(manager, 1, 3, local_logger)
+
+        # Test
+        assert not result
+        assert autoscaler is None
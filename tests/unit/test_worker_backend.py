@@ -0,0 +1,234 @@
+"""
+Test thread and asyncio workers.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_wait
+from utilities.workers import worker_backend
+from utilities.workers import worker_controller
+from utilities.workers import worker_slot
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+JOIN_TIMEOUT = 1.0  # seconds
+
+
+def echo_worker(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Passes items on until exit.
+    """
+    while not controller.is_exit_requested():
+        result, item = queue_wait.get_or_exit(input_queue, controller)
+        if not result or item is None:
+            break
+
+        output_queue.queue.put(item)
+
+
+async def async_echo_worker(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Same as echo_worker() for the asyncio backend.
+    """
+    while not controller.is_exit_requested():
+        result, item = await queue_wait.async_get_or_exit(input_queue, controller)
+        if not result or item is None:
+            break
+
+        output_queue.queue.put(item)
+
+
+def crash_worker(controller: worker_controller.WorkerController) -> None:
+    """
+    Raises until exit is requested.
+    """
+    if not controller.is_exit_requested():
+        raise ValueError("Crashed")
+
+
+class TestWorkerBackend:
+    """
+    Workers in main with the same controller semantics as processes.
+    """
+
+    @pytest.mark.parametrize(
+        "target, backend",
+        [
+            (echo_worker, worker_backend.THREAD),
+            (async_echo_worker, worker_backend.ASYNCIO),
+        ],
+    )
+    def test_pipeline(
+        self,
+        create_manager: "(...) -> object",  # type: ignore
+        target: "(...) -> object",  # type: ignore
+        backend: str,
+    ) -> None:
+        """
+        Items pass through local queues and the workers exit on request.
+        """
+        # Setup
+        input_queue = queue_proxy_wrapper.LocalQueueWrapper()
+        output_queue = queue_proxy_wrapper.LocalQueueWrapper()
+        controller = worker_controller.WorkerController()
+        result, manager = create_manager(
+            target,
+            controller,
+            2,
+            input_queues=[input_queue],
+            output_queues=[output_queue],
+            backend=backend,
+        )
+        assert result
+        assert manager is not None
+
+        # Run
+        manager.start_workers()
+        items = [{"index": i} for i in range(0, 10)]
+        input_queue.put_many(items)
+        output_items = [output_queue.queue.get(timeout=JOIN_TIMEOUT) for _ in items]
+        controller.request_exit()
+        is_clean = manager.join_workers(JOIN_TIMEOUT)
+
+        # Test
+        # Passed by reference without serialization
+        assert sorted(id(item) for item in output_items) == sorted(id(item) for item in items)
+        assert is_clean
+
+    def test_crashed_thread_restarted(
+        self, create_manager: "(...) -> object"  # type: ignore
+    ) -> None:
+        """
+        A thread that raises counts as dead and is restarted.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        result, manager = create_manager(crash_worker, controller, backend=worker_backend.THREAD)
+        assert result
+        assert manager is not None
+
+        manager.start_workers()
+        deadline = time.monotonic() + JOIN_TIMEOUT
+        while manager.get_dead_worker_count() == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # Run
+        dead_worker_count = manager.get_dead_worker_count()
+        controller.request_exit()
+        is_restarted = manager.check_and_restart_dead_workers()
+
+        # Test
+        assert dead_worker_count == 1
+        assert is_restarted
+        assert manager.join_workers(JOIN_TIMEOUT)
+        assert manager.get_dead_worker_count() == 1
+
+    def test_close_releases_sentinel(self) -> None:
+        """
+        Closing an exited worker releases its sentinel, a running worker cannot be closed.
+        """
+        # Setup
+        release = threading.Event()
+        worker = worker_backend.ThreadWorker(worker_slot.WorkerSlot(), release.wait, ())
+        worker.start()
+
+        # Run
+        with pytest.raises(ValueError):
+            worker.close()
+
+        release.set()
+        worker.join(JOIN_TIMEOUT)
+        sentinel = worker.sentinel
+        worker.close()
+
+        # Test
+        with pytest.raises(OSError):
+            os.fstat(sentinel)
+
+    def test_base_is_abstract(self) -> None:
+        """
+        Workers in main must implement starting, joining and checking if alive.
+        """
+        # Run
+        with pytest.raises(TypeError):
+            # pylint: disable-next=abstract-class-instantiated
+            worker_backend.InProcessWorker("worker", worker_slot.WorkerSlot(), print, ())
+
+    def test_scale_down_retires_one_thread(
+        self, create_manager: "(...) -> object"  # type: ignore
+    ) -> None:
+        """
+        Retiring a thread does not affect the other threads.
+        """
+        # Setup
+        input_queue = queue_proxy_wrapper.LocalQueueWrapper()
+        output_queue = queue_proxy_wrapper.LocalQueueWrapper()
+        controller = worker_controller.WorkerController()
+        result, manager = create_manager(
+            echo_worker,
+            controller,
+            2,
+            input_queues=[input_queue],
+            output_queues=[output_queue],
+            backend=worker_backend.THREAD,
+        )
+        assert result
+        assert manager is not None
+
+        manager.start_workers()
+
+        # Run
+        manager.scale_to(1)
+        time.sleep(queue_wait.EXIT_CHECK_PERIOD * 2)
+        input_queue.queue.put("item")
+
+        # Test
+        assert output_queue.queue.get(timeout=JOIN_TIMEOUT) == "item"
+        assert manager.get_dead_worker_count() == 0
+        controller.request_exit()
+        assert manager.join_workers(JOIN_TIMEOUT)
+
+    @pytest.mark.parametrize(
+        "target, backend",
+        [
+            (echo_worker, worker_backend.ASYNCIO),
+            (async_echo_worker, worker_backend.THREAD),
+            (async_echo_worker, worker_backend.PROCESS),
+            (echo_worker, "fiber"),
+        ],
+    )
+    def test_invalid_backend(
+        self,
+        create_manager: "(...) -> object",  # type: ignore
+        target: "(...) -> object",  # type: ignore
+        backend: str,
+    ) -> None:
+        """
+        Only async workers run on the asyncio backend, and only there.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+
+        # Run
+        result, manager = create_manager(target, controller, backend=backend)
+
+        # Test
+        assert not result
+        assert manager is None
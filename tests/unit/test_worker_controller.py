@@ -0,0 +1,101 @@
+"""
+Test the worker controller.
+"""
+
+import threading
+import time
+
+import pytest
+
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+@pytest.fixture()
+def controller() -> worker_controller.WorkerController:  # type: ignore
+    """
+    New controller.
+    """
+    yield worker_controller.WorkerController()  # type: ignore
+
+
+class TestWorkerController:
+    """
+    Exit and pause requests.
+    """
+
+    def test_exit(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Exit requests are visible immediately and can be cleared.
+        """
+        # Run
+        before = controller.is_exit_requested()
+        controller.request_exit()
+        requested = controller.is_exit_requested()
+        controller.clear_exit()
+        cleared = controller.is_exit_requested()
+
+        # Test
+        assert not before
+        assert requested
+        assert not cleared
+
+    def test_pause_blocks_until_resume(
+        self, controller: worker_controller.WorkerController
+    ) -> None:
+        """
+        A paused worker continues only after resume.
+        """
+        # Setup
+        controller.request_pause()
+        worker = threading.Thread(target=controller.check_pause)
+        worker.start()
+
+        # Run
+        worker.join(0.05)
+        blocked = worker.is_alive()
+        controller.request_resume()
+        worker.join(1.0)
+
+        # Test
+        assert blocked
+        assert not worker.is_alive()
+
+    def test_exit_wakes_paused(self, controller: worker_controller.WorkerController) -> None:
+        """
+        A paused worker is released by an exit request.
+        """
+        # Setup
+        controller.request_pause()
+        worker = threading.Thread(target=controller.check_pause)
+        worker.start()
+
+        # Run
+        controller.request_exit()
+        worker.join(1.0)
+
+        # Test
+        assert not worker.is_alive()
+
+    def test_wait_for_exit(self, controller: worker_controller.WorkerController) -> None:
+        """
+        Waiting times out without a request and wakes up early with one.
+        """
+        # Setup
+        timer = threading.Timer(0.05, controller.request_exit)
+
+        # Run
+        timed_out = controller.wait_for_exit(0.01)
+        timer.start()
+        start = time.perf_counter()
+        requested = controller.wait_for_exit(5.0)
+        elapsed = time.perf_counter() - start
+
+        # Test
+        assert not timed_out
+        assert requested
+        assert elapsed < 1.0
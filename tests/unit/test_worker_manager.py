@@ -0,0 +1,177 @@
+"""
+Test joining workers and detecting hung workers.
+"""
+
+import signal
+import time
+
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+JOIN_TIMEOUT = 0.2  # seconds
+LIVENESS_TIMEOUT = 0.2  # seconds
+
+
+def cooperative_worker(controller: worker_controller.WorkerController) -> None:
+    """
+    Exits as soon as exit is requested.
+    """
+    while not controller.is_exit_requested():
+        time.sleep(0.001)
+
+
+def stuck_worker(controller: worker_controller.WorkerController) -> None:
+    """
+    Ignores exit requests and SIGTERM.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    while True:
+        controller.check_pause()
+        time.sleep(0.001)
+
+
+def hanging_worker(controller: worker_controller.WorkerController) -> None:
+    """
+    Runs a few loop iterations and then stops looping.
+    """
+    for _ in range(0, 10):
+        controller.check_pause()
+        time.sleep(0.001)
+
+    while True:
+        time.sleep(1)
+
+
+class TestJoinWorkers:
+    """
+    Bounded time join.
+    """
+
+    def test_cooperative(self, create_manager: "(...) -> object") -> None:  # type: ignore
+        """
+        Workers that exit on request are joined without escalation.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        result, manager = create_manager(cooperative_worker, controller, 2)
+        assert result
+        assert manager is not None
+
+        manager.start_workers()
+
+        # Run
+        controller.request_exit()
+        start = time.perf_counter()
+        is_clean = manager.join_workers(JOIN_TIMEOUT)
+        elapsed = time.perf_counter() - start
+
+        # Test
+        assert is_clean
+        assert elapsed < JOIN_TIMEOUT
+
+    def test_escalates_to_kill(self, create_manager: "(...) -> object") -> None:  # type: ignore
+        """
+        Workers that ignore exit and SIGTERM are killed.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        result, manager = create_manager(stuck_worker, controller, 2)
+        assert result
+        assert manager is not None
+
+        manager.start_workers()
+        time.sleep(0.1)
+
+        # Run
+        controller.request_exit()
+        is_clean = manager.join_workers(JOIN_TIMEOUT)
+
+        # Test
+        assert not is_clean
+        assert not any(worker.is_alive() for worker in manager._WorkerManager__workers)
+
+
+class TestCheckHungWorkers:
+    """
+    Liveness watchdog.
+    """
+
+    def test_busy_not_hung(self, create_manager: "(...) -> object") -> None:  # type: ignore
+        """
+        Workers that keep looping are not hung.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        result, manager = create_manager(
+            stuck_worker, controller, 2, liveness_timeout=LIVENESS_TIMEOUT, kill_hung_workers=True
+        )
+        assert result
+        assert manager is not None
+
+        manager.start_workers()
+        time.sleep(LIVENESS_TIMEOUT * 2)
+
+        # Run
+        hung_count = manager.check_hung_workers()
+
+        # Test
+        assert hung_count == 0
+        controller.request_exit()
+        manager.join_workers(0.0)
+
+    def test_hung_killed(self, create_manager: "(...) -> object") -> None:  # type: ignore
+        """
+        Workers that stop looping are found and killed.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        result, manager = create_manager(
+            hanging_worker, controller, 2, liveness_timeout=LIVENESS_TIMEOUT, kill_hung_workers=True
+        )
+        assert result
+        assert manager is not None
+
+        manager.start_workers()
+        time.sleep(0.1)
+        manager.check_hung_workers()
+        time.sleep(LIVENESS_TIMEOUT * 2)
+
+        # Run
+        hung_count = manager.check_hung_workers()
+
+        # Test
+        assert hung_count == 2
+        for worker in manager._WorkerManager__workers:
+            worker.join(JOIN_TIMEOUT)
+            assert not worker.is_alive()
+
+        controller.request_exit()
+
+    def test_paused_not_hung(self, create_manager: "(...) -> object") -> None:  # type: ignore
+        """
+        Workers blocked by a pause request are not hung.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        result, manager = create_manager(
+            stuck_worker, controller, 2, liveness_timeout=LIVENESS_TIMEOUT, kill_hung_workers=True
+        )
+        assert result
+        assert manager is not None
+
+        manager.start_workers()
+        controller.request_pause()
+        time.sleep(LIVENESS_TIMEOUT * 2)
+
+        # Run
+        hung_count = manager.check_hung_workers()
+
+        # Test
+        assert hung_count == 0
+        controller.request_exit()
+        manager.join_workers(0.0)
@@ -0,0 +1,172 @@
+"""
+Test restarting dead workers.
+"""
+
+import multiprocessing as mp
+import os
+import time
+
+import pytest
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_controller
+from utilities.workers import worker_supervisor
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+def crash_once_worker(
+    run_count: "mp.sharedctypes.Synchronized", controller: worker_controller.WorkerController
+) -> None:
+    """
+    Crashes on the first run, afterwards runs until exit.
+    """
+    with run_count.get_lock():
+        run_count.value += 1
+        is_first_run = run_count.value == 1
+
+    if is_first_run:
+        os._exit(1)
+
+    controller.wait_for_exit()
+
+
+def crash_worker(controller: worker_controller.WorkerController) -> None:
+    """
+    Always crashes.
+    """
+    if not controller.is_exit_requested():
+        os._exit(1)
+
+
+@pytest.fixture(autouse=True)
+def forkserver() -> None:  # type: ignore
+    """
+    Starts workers and creates their shared objects with forkserver,
+    since the supervisor thread cannot restart workers started with fork.
+    """
+    start_method = mp.get_start_method()
+    mp.set_start_method("forkserver", True)
+    yield
+    mp.set_start_method(start_method, True)
+
+
+class TestWorkerSupervisor:
+    """
+    Restarts, backoff and crash loops.
+    """
+
+    def test_restart(
+        self,
+        local_logger: logger.Logger,
+        create_manager: "(...) -> object",  # type: ignore
+    ) -> None:
+        """
+        A crashed worker is restarted within milliseconds.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        run_count = mp.Value("i", 0)
+        result, manager = create_manager(crash_once_worker, controller, work_arguments=(run_count,))
+        assert result
+        assert manager is not None
+
+        manager.start_workers()
+        result, supervisor = worker_supervisor.WorkerSupervisor.create(
+            [manager], local_logger, controller
+        )
+        assert result
+        assert supervisor is not None
+
+        # Run
+        supervisor.start()
+        deadline = time.monotonic() + 5.0
+        while run_count.value < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        supervisor.stop()
+        controller.request_exit()
+        manager.join_workers(1.0)
+        statistics = supervisor.get_statistics()["crash_once_worker"]
+
+        # Test
+        assert run_count.value == 2
+        assert statistics.restart_count == 1
+        assert statistics.downtime_max < 0.1
+        assert not statistics.is_crash_looping
+
+    def test_crash_loop(
+        self,
+        local_logger: logger.Logger,
+        create_manager: "(...) -> object",  # type: ignore
+    ) -> None:
+        """
+        Restarting stops once the crash loop limit is reached.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        result, manager = create_manager(crash_worker, controller)
+        assert result
+        assert manager is not None
+
+        manager.start_workers()
+        result, supervisor = worker_supervisor.WorkerSupervisor.create(
+            [manager], local_logger, controller, 0.001, 0.01, 3, 10.0
+        )
+        assert result
+        assert supervisor is not None
+
+        # Run
+        supervisor.start()
+        deadline = time.monotonic() + 5.0
+        while (
+            not supervisor.get_statistics()["crash_worker"].is_crash_looping
+            and time.monotonic() < deadline
+        ):
+            time.sleep(0.01)
+
+        supervisor.stop()
+        statistics = supervisor.get_statistics()["crash_worker"]
+
+        # Test
+        assert statistics.is_crash_looping
+        assert statistics.restart_count == 3
+
+    def test_create_invalid(self, local_logger: logger.Logger) -> None:
+        """
+        Fails without managers.
+        """
+        # Run
+        result, supervisor = worker_supervisor.WorkerSupervisor.create([], local_logger)
+
+        # Test
+        assert not result
+        assert supervisor is None
+
+    def test_create_fork(
+        self,
+        local_logger: logger.Logger,
+        create_manager: "(...) -> object",  # type: ignore
+    ) -> None:
+        """
+        Fails for workers started with fork, which cannot be done from the supervisor thread.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        result, manager = create_manager(crash_worker, controller, context=mp.get_context("fork"))
+        assert result
+        assert manager is not None
+
+        manager.start_workers()
+
+        # Run
+        result, supervisor = worker_supervisor.WorkerSupervisor.create([manager], local_logger)
+        controller.request_exit()
+        manager.join_workers(1.0)
+
+        # Test
+        assert not result
+        assert supervisor is None
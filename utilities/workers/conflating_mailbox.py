@@ -0,0 +1,221 @@
+"""
+Latest value mailbox.
+"""
+
+import multiprocessing.managers
+import queue
+import threading
+
+from utilities.workers import queue_notifier
+from utilities.workers import queue_proxy_wrapper
+
+
+class ConflatingMailbox:
+    """
+    Holds only the newest item, hosted in the manager process.
+    Putting never blocks and overwrites any item that has not been read yet.
+
+    Has the same interface as a queue proxy, where a get consumes the newest item
+    and the mailbox stays empty until the next put.
+
+    Once closed, every blocked or later get returns the sentinel (None)
+    and every put discards its item, so that workers can exit immediately.
+    """
+
+    def __init__(self) -> None:
+        self.__condition = threading.Condition()
+        self.__item = None
+        self.__sequence = 0  # Number of items put
+        self.__read_sequence = 0  # Sequence of the last item read
+        self.__overwritten_count = 0
+        self.__closed = False
+
+    # Same signature as a queue
+    # pylint: disable-next=unused-argument
+    def put(self, item: object, block: bool = True, timeout: float | None = None) -> None:
+        """
+        Replaces the held item.
+
+        item: Newest item.
+        block: Unused, kept for the same signature as a queue.
+        timeout: Unused, kept for the same signature as a queue.
+        """
+        with self.__condition:
+            if self.__closed:
+                return
+
+            if self.__sequence > self.__read_sequence:
+                self.__overwritten_count += 1
+
+            self.__item = item
+            self.__sequence += 1
+            self.__condition.notify_all()
+
+    def get(self, block: bool = True, timeout: float | None = None) -> object:
+        """
+        Returns the newest item if it has not been read yet.
+
+        block: Whether to wait for a new item.
+        timeout: Time waiting in seconds for a new item, None waits forever.
+
+        Raises queue.Empty if no new item was put.
+        Returns the sentinel (None) if closed.
+        """
+        with self.__condition:
+            if not self.__condition.wait_for(
+                lambda: self.__closed or self.__sequence > self.__read_sequence,
+                timeout if block else 0.0,
+            ):
+                raise queue.Empty
+
+            if self.__closed:
+                return None
+
+            self.__read_sequence = self.__sequence
+            return self.__item
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    # Same signature as a batch queue
+    # pylint: disable-next=unused-argument
+    def put_many(self, items: list, timeout: float | None = None) -> int:
+        """
+        Puts items in order, so only the last one is kept.
+
+        Returns the number of items put, which is all of them.
+        """
+        for item in items:
+            self.put(item)
+
+        return len(items)
+
+    def put_many_drop_oldest(self, items: list) -> int:
+        """
+        Puts items in order, every put already replaces the unread item.
+
+        Returns the number of unread items replaced.
+        """
+        with self.__condition:
+            overwritten_count = self.__overwritten_count
+            self.put_many(items)
+            return self.__overwritten_count - overwritten_count
+
+    def get_many(self, max_items: int, timeout: float | None = None) -> list:
+        """
+        Returns the newest item as a batch of at most 1, empty if the timeout expired.
+        """
+        if max_items <= 0:
+            return []
+
+        try:
+            return [self.get(True, timeout)]
+        except queue.Empty:
+            return []
+
+    def qsize(self) -> int:
+        """
+        Returns 1 if there is an unread item, otherwise 0 .
+        """
+        with self.__condition:
+            return int(self.__sequence > self.__read_sequence)
+
+    def empty(self) -> bool:
+        """
+        Returns whether there is no unread item.
+        Never empty if closed, since a get returns without blocking.
+        """
+        with self.__condition:
+            return not self.__closed and self.__sequence == self.__read_sequence
+
+    def full(self) -> bool:
+        """
+        Never full, a put always succeeds.
+        """
+        return False
+
+    def close(self) -> None:
+        """
+        Closes the mailbox and wakes every blocked getter.
+        """
+        with self.__condition:
+            self.__closed = True
+            self.__read_sequence = self.__sequence
+            self.__condition.notify_all()
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the mailbox is closed.
+        """
+        with self.__condition:
+            return self.__closed
+
+    def is_changed(self) -> bool:
+        """
+        Returns whether a new item was put since the last read.
+        """
+        return self.qsize() == 1
+
+    def sequence(self) -> int:
+        """
+        Returns the sequence number of the newest item, which is the number of items put.
+        """
+        with self.__condition:
+            return self.__sequence
+
+    def overwritten_count(self) -> int:
+        """
+        Returns the number of items replaced before they were read.
+        """
+        with self.__condition:
+            return self.__overwritten_count
+
+    def peek(self) -> "tuple[int, object]":
+        """
+        Returns the sequence number and the newest item without consuming it.
+        The item is None if nothing has been put yet.
+        """
+        with self.__condition:
+            return self.__sequence, self.__item
+
+
+# Manager must be started after this for the type to be available
+queue_proxy_wrapper.SyncManager.register("ConflatingMailbox", ConflatingMailbox)
+
+
+class ConflatingMailboxWrapper(queue_proxy_wrapper.QueueProxyWrapper):
+    """
+    Drop-in alternative to QueueProxyWrapper for consumers that only need the freshest item.
+    Slow consumers skip stale items instead of working through a backlog.
+
+    `maxsize` is always 1 , and puts never block, so there is no overflow policy.
+    Items replaced before they were read are reported as dropped.
+    """
+
+    def __init__(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        instrumented: bool = False,
+        notifier: queue_notifier.QueueNotifier | None = None,
+    ) -> None:
+        super().__init__(mp_manager, 1, instrumented, notifier=notifier)
+
+    def _create_queue(
+        self, mp_manager: multiprocessing.managers.SyncManager, maxsize: int
+    ) -> ConflatingMailbox:
+        return mp_manager.ConflatingMailbox()
+
+    def _is_conflating(self) -> bool:
+        return True
+
+    def get_dropped_count(self) -> int:
+        return self.queue.overwritten_count()
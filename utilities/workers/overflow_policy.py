@@ -0,0 +1,119 @@
+"""
+Queue overflow policies.
+"""
+
+import enum
+import multiprocessing as mp
+import queue
+
+
+class OverflowPolicy(enum.Enum):
+    """
+    What a put does when the queue is full.
+    """
+
+    # Wait for free space, same as a plain queue
+    BLOCK = 0
+    # Discard the item being put
+    DROP_NEWEST = 1
+    # Discard the oldest item in the queue to make space
+    DROP_OLDEST = 2
+    # Wait up to the overflow timeout, then discard the item being put
+    BLOCK_THEN_DROP = 3
+
+
+class OverflowQueue:
+    """
+    Wraps a queue with the same interface and applies an overflow policy to puts,
+    so that producers never stall on slow consumers.
+
+    Dropped items are counted in shared memory, so that the count can be read from any process.
+    Under a drop policy, puts never raise queue.Full .
+    """
+
+    def __init__(
+        self, underlying_queue: object, policy: OverflowPolicy, overflow_timeout: float = 0.0
+    ) -> None:
+        """
+        underlying_queue: Queue or queue proxy to wrap, must have put_many_drop_oldest().
+        policy: Overflow policy applied to every put.
+        overflow_timeout: Time waiting in seconds for free space before dropping,
+            only used by BLOCK_THEN_DROP.
+        """
+        self.__queue = underlying_queue
+        self.__policy = policy
+        self.__overflow_timeout = overflow_timeout
+        self.__dropped_count = mp.Value("q", 0)
+
+    def __getattr__(self, name: str) -> object:
+        # Pass through transport specific methods
+        # Private names are not passed through, which also keeps unpickling safe
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        return getattr(self.__queue, name)
+
+    def __record_dropped(self, count: int) -> None:
+        """
+        Adds to the dropped count.
+        """
+        if count <= 0:
+            return
+
+        with self.__dropped_count.get_lock():
+            self.__dropped_count.value += count
+
+    def put(self, item: object, block: bool = True, timeout: float | None = None) -> None:
+        """
+        Puts the item, applying the overflow policy if the queue is full.
+        `block` and `timeout` are only used by BLOCK.
+        """
+        if self.__policy == OverflowPolicy.BLOCK:
+            self.__queue.put(item, block, timeout)
+            return
+
+        if self.__policy == OverflowPolicy.DROP_OLDEST:
+            self.__record_dropped(self.__queue.put_many_drop_oldest([item]))
+            return
+
+        try:
+            if self.__policy == OverflowPolicy.DROP_NEWEST:
+                self.__queue.put(item, False)
+            else:
+                self.__queue.put(item, True, self.__overflow_timeout)
+        except queue.Full:
+            self.__record_dropped(1)
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def put_many(self, items: list, timeout: float | None = None) -> int:
+        """
+        Puts items in order, applying the overflow policy if the queue is full.
+        `timeout` is only used by BLOCK.
+
+        Returns the number of items put, dropped items of a drop policy count as put.
+        """
+        if self.__policy == OverflowPolicy.BLOCK:
+            return self.__queue.put_many(items, timeout)
+
+        if self.__policy == OverflowPolicy.DROP_OLDEST:
+            self.__record_dropped(self.__queue.put_many_drop_oldest(items))
+            return len(items)
+
+        if self.__policy == OverflowPolicy.DROP_NEWEST:
+            count = self.__queue.put_many(items, 0.0)
+        else:
+            count = self.__queue.put_many(items, self.__overflow_timeout)
+
+        self.__record_dropped(len(items) - count)
+        return len(items)
+
+    def get_dropped_count(self) -> int:
+        """
+        Returns the number of items dropped so far.
+        """
+        return self.__dropped_count.value
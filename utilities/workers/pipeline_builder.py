@@ -0,0 +1,588 @@
+"""
+Builds the queues and workers of a pipeline from a stage/queue graph in the configuration.
+"""
+
+import multiprocessing.context
+import multiprocessing.managers
+
+from modules.common.modules.logger import logger
+from utilities.workers import conflating_mailbox
+from utilities.workers import overflow_policy
+from utilities.workers import queue_notifier
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import runtime_profile
+from utilities.workers import shared_memory_queue
+from utilities.workers import worker_autoscaler
+from utilities.workers import worker_backend
+from utilities.workers import worker_context
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+from utilities.workers import worker_supervisor
+
+
+# Queue transports
+# Queue in the manager process
+MANAGER = "manager"
+# Ring buffer in shared memory
+SHARED_MEMORY = "shared_memory"
+# Mailbox in the manager process that only keeps the newest item, ignores size and overflow
+MAILBOX = "mailbox"
+# Queue in main, only between thread and asyncio workers and main
+LOCAL = "local"
+TRANSPORTS = [MANAGER, SHARED_MEMORY, MAILBOX, LOCAL]
+
+
+def create_queue(
+    mp_manager: multiprocessing.managers.SyncManager,
+    maxsize: int,
+    transport: str,
+    overflow: overflow_policy.OverflowPolicy,
+    overflow_timeout: float = 0.0,
+    instrumented: bool = False,
+    notifier: queue_notifier.QueueNotifier | None = None,
+) -> "tuple[True, queue_proxy_wrapper.QueueProxyWrapper] | tuple[False, None]":
+    """
+    Creates a queue with the chosen transport and overflow policy.
+    Fails if the transport is unknown.
+    """
+    if transport == MANAGER:
+        return True, queue_proxy_wrapper.QueueProxyWrapper(
+            mp_manager, maxsize, instrumented, overflow, overflow_timeout, notifier
+        )
+
+    if transport == SHARED_MEMORY:
+        return True, shared_memory_queue.SharedMemoryQueueWrapper(
+            mp_manager,
+            maxsize,
+            instrumented=instrumented,
+            overflow=overflow,
+            overflow_timeout=overflow_timeout,
+            notifier=notifier,
+        )
+
+    if transport == LOCAL:
+        return True, queue_proxy_wrapper.LocalQueueWrapper(
+            mp_manager, maxsize, instrumented, overflow, overflow_timeout, notifier
+        )
+
+    if transport == MAILBOX:
+        return True, conflating_mailbox.ConflatingMailboxWrapper(mp_manager, instrumented, notifier)
+
+    return False, None
+
+
+def set_start_method(
+    config: dict, local_logger: logger.Logger
+) -> "tuple[True, multiprocessing.context.BaseContext] | tuple[False, None]":
+    """
+    Sets the start method of the pipeline section of the configuration,
+    worker_context.DEFAULT_START_METHOD if it has none.
+    Pipeline.create() calls it, call it earlier if anything shared with the workers,
+    such as a work argument, is created before the pipeline.
+
+    config: Pipeline section of the configuration.
+    local_logger: Existing logger from process.
+
+    Returns the context.
+    """
+    start_method = str(config.get("start_method", worker_context.DEFAULT_START_METHOD))
+    return worker_context.set_start_method(start_method, local_logger)
+
+
+class _QueueConfig:
+    """
+    Queue section of the configuration.
+    """
+
+    def __init__(self, name: str, section: dict) -> None:
+        """
+        Raises KeyError, TypeError or ValueError if the section is invalid.
+        """
+        self.name = name
+        self.transport = str(section.get("transport", MANAGER))
+        self.maxsize = int(section.get("maxsize", 0))
+        self.overflow = overflow_policy.OverflowPolicy[
+            str(section.get("overflow", "block")).upper()
+        ]
+        self.overflow_timeout = float(section.get("overflow_timeout", 0.0))
+        # Filled in from the stages
+        self.producers: "list[_StageConfig]" = []
+        self.consumers: "list[_StageConfig]" = []
+
+
+class _StageConfig:
+    """
+    Stage section of the configuration.
+    """
+
+    def __init__(self, name: str, section: dict) -> None:
+        """
+        Raises KeyError, TypeError or ValueError if the section is invalid.
+        """
+        self.name = name
+        self.count = int(section.get("count", 1))
+        self.max_count = int(section.get("max_count", self.count))
+        self.backend = str(section.get("backend", worker_backend.PROCESS))
+        self.profile = section.get("profile")
+        self.inputs = [str(queue_name) for queue_name in section.get("inputs", [])]
+        self.outputs = [str(queue_name) for queue_name in section.get("outputs", [])]
+
+
+class Pipeline:  # pylint: disable=too-many-instance-attributes
+    """
+    Queues and workers described by the pipeline section of the configuration:
+
+    ```
+    pipeline:
+      start_method: forkserver  # forkserver or spawn, see worker_context.set_start_method()
+      instrument_queues: true
+      liveness_timeout: 5  # seconds
+      kill_hung_workers: true
+      queues:
+        <queue name>:
+          transport: manager  # manager, shared_memory, mailbox or local
+          maxsize: 10  # <= 0 for infinity
+          overflow: block  # block, drop_newest, drop_oldest or block_then_drop
+          overflow_timeout: 0.0  # seconds
+      profiles:
+        <profile name>:
+          cpus: null  # List of CPU numbers, null for any CPU
+          nice: 0
+          freeze_gc_after_init: true
+          suppress_full_gc: false
+      stages:
+        <stage name>:
+          count: 1
+          max_count: 1  # Autoscaled up to this count if greater than count
+          backend: process  # process, thread or asyncio
+          profile: <profile name>  # Optional, only for process
+          inputs: [<queue name>, ...]
+          outputs: [<queue name>, ...]
+    ```
+
+    Each worker is called with its work arguments from code, then its input queues,
+    its output queues and the controller.
+    Queues that no stage reads from are read by main and share a notifier,
+    see get_main_queues() . Every other queue has its own notifier. The controller notifies
+    all of them on requests, so that waits in queue_wait notice requests right away.
+
+    Dead workers are restarted and stages are scaled from the supervisor thread,
+    so worker processes cannot be started with fork, see worker_supervisor.WorkerSupervisor .
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        config: dict,
+        stage_targets: "dict[str, tuple[(...) -> object, tuple]]",  # type: ignore
+        local_logger: logger.Logger,
+        external_queues: "list[queue_proxy_wrapper.QueueProxyWrapper] | None" = None,
+    ) -> "tuple[True, Pipeline] | tuple[False, None]":
+        """
+        Creates the queues and workers, call start() to start the workers.
+
+        config: Pipeline section of the configuration.
+        stage_targets: Worker function and work arguments of each stage by stage name.
+        local_logger: Existing logger from process.
+        external_queues: Queues in work arguments that were created outside the pipeline,
+            closed along with the queues of the pipeline on stop().
+
+        Returns the Pipeline object.
+        """
+        try:
+            queue_configs = {
+                name: _QueueConfig(name, section)
+                for name, section in config.get("queues", {}).items()
+            }
+            stage_configs = {
+                name: _StageConfig(name, section)
+                for name, section in config.get("stages", {}).items()
+            }
+            profile_sections = dict(config.get("profiles", {}))
+            instrument_queues = bool(config.get("instrument_queues", False))
+            liveness_timeout = float(config.get("liveness_timeout", 0.0))
+            kill_hung_workers = bool(config.get("kill_hung_workers", False))
+        except (AttributeError, KeyError, TypeError, ValueError) as exception:
+            local_logger.error(f"Invalid pipeline configuration: {exception}", True)
+            return False, None
+
+        if not Pipeline.__validate(queue_configs, stage_configs, stage_targets, local_logger):
+            return False, None
+
+        result, stage_order = Pipeline.__sort_stages(stage_configs, local_logger)
+        if not result:
+            return False, None
+
+        # Before anything shared with the workers is created
+        result, context = set_start_method(config, local_logger)
+        if not result:
+            return False, None
+
+        # Get Pylance to stop complaining
+        assert context is not None
+
+        # The supervisor thread starts workers, and a fork from a thread copies the locks held
+        # by the other threads of main into the child, which deadlocks once the child takes one
+        backends = {stage_config.backend for stage_config in stage_configs.values()}
+        if context.get_start_method() == "fork" and worker_backend.PROCESS in backends:
+            local_logger.error(
+                "Process stages cannot be started with fork, use forkserver or spawn", True
+            )
+            return False, None
+
+        profiles = {}
+        for name, section in profile_sections.items():
+            try:
+                cpus = section.get("cpus")
+                result, profiles[name] = runtime_profile.RuntimeProfile.create(
+                    local_logger,
+                    None if cpus is None else set(cpus),
+                    int(section.get("nice", 0)),
+                    bool(section.get("freeze_gc_after_init", False)),
+                    bool(section.get("suppress_full_gc", False)),
+                )
+            except (AttributeError, TypeError, ValueError) as exception:
+                local_logger.error(f"Invalid runtime profile {name}: {exception}", True)
+                return False, None
+
+            if not result:
+                local_logger.error(f"Failed to create runtime profile {name}", True)
+                return False, None
+
+        for stage_config in stage_order:
+            if stage_config.profile is not None and stage_config.profile not in profiles:
+                local_logger.error(
+                    f"Stage {stage_config.name} has unknown profile: {stage_config.profile}", True
+                )
+                return False, None
+
+        # Anything that fails from here on releases the manager and queues
+        controller = worker_controller.WorkerController()
+        mp_manager = queue_proxy_wrapper.create_manager()
+
+        # Queues read by main share a notifier so that main can block on all of them at once
+        # Every notifier is woken by the controller, so that waiting workers notice requests
+        main_notifier = queue_notifier.QueueNotifier()
+        controller.add_notifier(main_notifier)
+        queues = {}
+        main_queues = {}
+        for name, queue_config in queue_configs.items():
+            is_read_by_main = len(queue_config.consumers) == 0
+            notifier = main_notifier
+            if not is_read_by_main:
+                notifier = queue_notifier.QueueNotifier()
+                controller.add_notifier(notifier)
+
+            _, queues[name] = create_queue(
+                mp_manager,
+                queue_config.maxsize,
+                queue_config.transport,
+                queue_config.overflow,
+                queue_config.overflow_timeout,
+                instrument_queues,
+                notifier,
+            )
+            if is_read_by_main:
+                main_queues[name] = queues[name]
+
+        managers = []
+        autoscalers = []
+        for stage_config in stage_order:
+            target, work_arguments = stage_targets[stage_config.name]
+            result, properties = worker_manager.WorkerProperties.create(
+                stage_config.count,
+                target,
+                work_arguments,
+                [queues[queue_name] for queue_name in stage_config.inputs],
+                [queues[queue_name] for queue_name in stage_config.outputs],
+                controller,
+                local_logger,
+                liveness_timeout,
+                kill_hung_workers,
+                profiles.get(stage_config.profile),
+            )
+            if not result:
+                local_logger.error(f"Failed to create {stage_config.name} properties", True)
+                Pipeline.__release_queues(list(queues.values()), mp_manager)
+                return False, None
+
+            # Get Pylance to stop complaining
+            assert properties is not None
+
+            result, manager = worker_manager.WorkerManager.create(
+                properties, local_logger, context, stage_config.backend
+            )
+            if not result:
+                local_logger.error(f"Failed to create {stage_config.name} manager", True)
+                Pipeline.__release_queues(list(queues.values()), mp_manager)
+                return False, None
+
+            # Get Pylance to stop complaining
+            assert manager is not None
+
+            managers.append(manager)
+
+            if stage_config.max_count > stage_config.count:
+                result, autoscaler = worker_autoscaler.WorkerAutoscaler.create(
+                    manager, stage_config.count, stage_config.max_count, local_logger
+                )
+                if not result:
+                    local_logger.error(f"Failed to create {stage_config.name} autoscaler", True)
+                    Pipeline.__release_queues(list(queues.values()), mp_manager)
+                    return False, None
+
+                autoscalers.append(autoscaler)
+
+        # Restart workers that die from a thread, without involving the main loop
+        result, supervisor = worker_supervisor.WorkerSupervisor.create(
+            managers, local_logger, controller, autoscalers=autoscalers
+        )
+        if not result:
+            local_logger.error("Failed to create worker supervisor", True)
+            Pipeline.__release_queues(list(queues.values()), mp_manager)
+            return False, None
+
+        return True, Pipeline(
+            cls.__create_key,
+            [stage_config.name for stage_config in stage_order],
+            managers,
+            queues,
+            main_queues,
+            controller,
+            mp_manager,
+            supervisor,
+            [] if external_queues is None else external_queues,
+            local_logger,
+        )
+
+    @staticmethod
+    def __validate(
+        queue_configs: "dict[str, _QueueConfig]",
+        stage_configs: "dict[str, _StageConfig]",
+        stage_targets: "dict[str, tuple[(...) -> object, tuple]]",  # type: ignore
+        local_logger: logger.Logger,
+    ) -> bool:
+        """
+        Checks that the stages and queues form a graph that can be built,
+        and records the producers and consumers of each queue.
+        """
+        if len(stage_configs) == 0:
+            local_logger.error("Pipeline has no stages", True)
+            return False
+
+        for name, queue_config in queue_configs.items():
+            if queue_config.transport not in TRANSPORTS:
+                local_logger.error(
+                    f"Queue {name} has unknown transport: {queue_config.transport}", True
+                )
+                return False
+
+        for name, stage_config in stage_configs.items():
+            if name not in stage_targets:
+                local_logger.error(f"Stage {name} has no worker function", True)
+                return False
+
+            if stage_config.max_count < stage_config.count:
+                local_logger.error(
+                    f"Stage {name} maximum count {stage_config.max_count} "
+                    f"is less than its count {stage_config.count}",
+                    True,
+                )
+                return False
+
+            for queue_name in stage_config.inputs + stage_config.outputs:
+                if queue_name not in queue_configs:
+                    local_logger.error(f"Stage {name} has unknown queue: {queue_name}", True)
+                    return False
+
+                if (
+                    queue_configs[queue_name].transport == LOCAL
+                    and stage_config.backend == worker_backend.PROCESS
+                ):
+                    local_logger.error(
+                        f"Local queue {queue_name} cannot be passed to worker processes of {name}",
+                        True,
+                    )
+                    return False
+
+            for queue_name in stage_config.inputs:
+                queue_configs[queue_name].consumers.append(stage_config)
+
+            for queue_name in stage_config.outputs:
+                queue_configs[queue_name].producers.append(stage_config)
+
+        for name, queue_config in queue_configs.items():
+            if len(queue_config.producers) == 0:
+                local_logger.error(f"Queue {name} has no producers", True)
+                return False
+
+            # Mailboxes always hold a single item
+            if queue_config.maxsize <= 0 or queue_config.transport == MAILBOX:
+                continue
+
+            # Every worker must be able to put or get at once, main counts as a single consumer
+            producer_count = sum(stage_config.max_count for stage_config in queue_config.producers)
+            consumer_count = max(
+                sum(stage_config.max_count for stage_config in queue_config.consumers), 1
+            )
+            if queue_config.maxsize < max(producer_count, consumer_count):
+                local_logger.error(
+                    f"Queue {name} maxsize {queue_config.maxsize} is less than "
+                    f"{producer_count} producers or {consumer_count} consumers",
+                    True,
+                )
+                return False
+
+        return True
+
+    @staticmethod
+    def __sort_stages(
+        stage_configs: "dict[str, _StageConfig]", local_logger: logger.Logger
+    ) -> "tuple[True, list[_StageConfig]] | tuple[False, None]":
+        """
+        Orders the stages so that every stage comes after the stages producing its inputs,
+        keeping the configuration order otherwise. Fails if the stages form a cycle.
+        """
+        producers = {
+            name: {
+                producer.name
+                for producer in stage_configs.values()
+                if any(queue_name in producer.outputs for queue_name in stage_config.inputs)
+                and producer.name != name
+            }
+            for name, stage_config in stage_configs.items()
+        }
+        for name, stage_config in stage_configs.items():
+            if any(queue_name in stage_config.outputs for queue_name in stage_config.inputs):
+                local_logger.error(f"Stage {name} reads its own output", True)
+                return False, None
+
+        stage_order = []
+        remaining = list(stage_configs)
+        while len(remaining) > 0:
+            started = {stage_config.name for stage_config in stage_order}
+            ready = [name for name in remaining if producers[name] <= started]
+            if len(ready) == 0:
+                local_logger.error(f"Stages form a cycle: {remaining}", True)
+                return False, None
+
+            stage_order.append(stage_configs[ready[0]])
+            remaining.remove(ready[0])
+
+        return True, stage_order
+
+    @staticmethod
+    def __release_queues(
+        queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+        mp_manager: multiprocessing.managers.SyncManager,
+    ) -> None:
+        """
+        Frees the shared memory queues and shuts down the manager hosting the other queues.
+        Only call once no worker uses the queues.
+        """
+        for created_queue in queues:
+            if isinstance(created_queue, shared_memory_queue.SharedMemoryQueueWrapper):
+                created_queue.unlink()
+
+        mp_manager.shutdown()
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        stage_names: "list[str]",
+        managers: "list[worker_manager.WorkerManager]",
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        main_queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        controller: worker_controller.WorkerController,
+        mp_manager: multiprocessing.managers.SyncManager,
+        supervisor: worker_supervisor.WorkerSupervisor,
+        external_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+        local_logger: logger.Logger,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is Pipeline.__create_key, "Use create() method"
+
+        self.__stage_names = stage_names
+        self.__managers = managers
+        self.__queues = queues
+        self.__main_queues = main_queues
+        self.__controller = controller
+        self.__mp_manager = mp_manager
+        self.__supervisor = supervisor
+        self.__external_queues = external_queues
+        self.__logger = local_logger
+
+    def get_stage_names(self) -> "list[str]":
+        """
+        Returns the stage names in the order they are started.
+        """
+        return self.__stage_names
+
+    def get_queues(self) -> "dict[str, queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns all queues by name.
+        """
+        return self.__queues
+
+    def get_main_queues(self) -> "dict[str, queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns the queues read by main by name, which can be waited on with queue_wait.wait_any() .
+        """
+        return self.__main_queues
+
+    def get_controller(self) -> worker_controller.WorkerController:
+        """
+        Returns the worker controller shared by all stages.
+        """
+        return self.__controller
+
+    def start(self) -> None:
+        """
+        Starts the stages so that producers start before their consumers,
+        then supervises them.
+        """
+        for manager in self.__managers:
+            manager.start_workers()
+
+        self.__supervisor.start()
+
+    def stop(self, join_timeout: float | None = None) -> bool:
+        """
+        Requests exit and stops the stages in the reverse order they were started,
+        then frees the queues, including the external ones, which cannot be used afterwards.
+        The controller can be reused after clear_exit() .
+
+        join_timeout: Time waiting in seconds for each stage, workers that do not exit in time
+            are terminated. None waits forever.
+
+        Returns whether all workers exited on their own.
+        """
+        # Stop supervising first so that exiting workers are not restarted
+        self.__supervisor.stop()
+        for name, restart_statistics in self.__supervisor.get_statistics().items():
+            self.__logger.info(f"{name} {restart_statistics}")
+
+        self.__controller.request_exit()
+
+        # Close queues so that workers blocked on a queue wake up immediately
+        # Blocked gets return the sentinel (None) and blocked puts discard their item
+        for output_queue in reversed(self.__queues.values()):
+            output_queue.close()
+
+        for external_queue in self.__external_queues:
+            external_queue.close()
+
+        is_clean = True
+        for manager in reversed(self.__managers):
+            is_clean = manager.join_workers(join_timeout) and is_clean
+
+        # No worker uses the queues anymore, including the external ones
+        Pipeline.__release_queues(
+            list(self.__queues.values()) + self.__external_queues, self.__mp_manager
+        )
+
+        return is_clean
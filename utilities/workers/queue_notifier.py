@@ -0,0 +1,104 @@
+"""
+Notification of puts shared by several queues.
+"""
+
+import ctypes
+import multiprocessing as mp
+
+
+class QueueNotifier:
+    """
+    Counts puts into any of the queues sharing it and wakes waiters,
+    so that a consumer can block on several queues at once.
+    """
+
+    def __init__(self) -> None:
+        self.__condition = mp.Condition()
+        self.__sequence = mp.RawValue(ctypes.c_uint64, 0)
+
+    def notify(self) -> None:
+        """
+        Wakes all waiters, called after every put and on close.
+        """
+        with self.__condition:
+            self.__sequence.value += 1
+            self.__condition.notify_all()
+
+    def get_sequence(self) -> int:
+        """
+        Returns the number of notifications so far.
+        Read this before checking the queues, then wait for it to change.
+        """
+        return self.__sequence.value
+
+    def wait(self, sequence: int, timeout: float | None = None) -> bool:
+        """
+        Waits for a notification after the one numbered `sequence`.
+
+        sequence: Previously read sequence number.
+        timeout: Time waiting in seconds, None waits forever.
+
+        Returns whether there was a notification.
+        """
+        with self.__condition:
+            return self.__condition.wait_for(lambda: self.__sequence.value != sequence, timeout)
+
+
+class NotifyingQueue:
+    """
+    Wraps a queue with the same interface and notifies after every put.
+    """
+
+    def __init__(self, underlying_queue: object, notifier: QueueNotifier) -> None:
+        """
+        underlying_queue: Queue or queue proxy to wrap.
+        notifier: Notifier shared with other queues.
+        """
+        self.__queue = underlying_queue
+        self.__notifier = notifier
+
+    def __getattr__(self, name: str) -> object:
+        # Pass through transport specific methods
+        # Private names are not passed through, which also keeps unpickling safe
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        return getattr(self.__queue, name)
+
+    def put(self, item: object, block: bool = True, timeout: float | None = None) -> None:
+        """
+        Same as the underlying queue.
+        """
+        self.__queue.put(item, block, timeout)
+        self.__notifier.notify()
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def put_many(self, items: list, timeout: float | None = None) -> int:
+        """
+        Same as the underlying queue.
+        """
+        count = self.__queue.put_many(items, timeout)
+        if count > 0:
+            self.__notifier.notify()
+
+        return count
+
+    def put_many_drop_oldest(self, items: list) -> int:
+        """
+        Same as the underlying queue.
+        """
+        dropped = self.__queue.put_many_drop_oldest(items)
+        self.__notifier.notify()
+        return dropped
+
+    def close(self) -> None:
+        """
+        Same as the underlying queue, waiters are woken.
+        """
+        self.__queue.close()
+        self.__notifier.notify()
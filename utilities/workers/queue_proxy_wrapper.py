@@ -6,21 +6,323 @@ import multiprocessing.managers
 import queue
 import time
 
+from utilities.workers import overflow_policy
+from utilities.workers import queue_notifier
+from utilities.workers import queue_statistics
+
+
+class BatchQueue(queue.Queue):
+    """
+    Queue with batched operations, hosted in the manager process
+    so that a whole batch costs a single round trip.
+
+    Once closed, every blocked or later get returns the sentinel (None)
+    and every put discards its item, so that workers can exit immediately.
+    """
+
+    def __init__(self, maxsize: int = 0) -> None:
+        super().__init__(maxsize)
+        self.__closed = False
+
+    def __is_full(self) -> bool:
+        """
+        Returns whether there is no free space. Lock must be held.
+        """
+        return 0 < self.maxsize <= self._qsize()
+
+    def put(self, item: object, block: bool = True, timeout: float | None = None) -> None:
+        """
+        Same as queue.Queue, but discards the item if closed.
+        """
+        with self.not_full:
+            if not self.not_full.wait_for(
+                lambda: self.__closed or not self.__is_full(),
+                timeout if block else 0.0,
+            ):
+                raise queue.Full
+
+            if self.__closed:
+                return
+
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def get(self, block: bool = True, timeout: float | None = None) -> object:
+        """
+        Same as queue.Queue, but returns the sentinel (None) if closed.
+        """
+        with self.not_empty:
+            if not self.not_empty.wait_for(
+                lambda: self.__closed or self._qsize(),
+                timeout if block else 0.0,
+            ):
+                raise queue.Empty
+
+            if self.__closed:
+                return None
+
+            item = self._get()
+            self.not_full.notify()
+            return item
+
+    def put_many(self, items: list, timeout: float | None = None) -> int:
+        """
+        Puts items in order, waiting for free space as required.
+
+        items: Items to put.
+        timeout: Time waiting in seconds for all items to fit, None waits forever.
+
+        Returns the number of items put, fewer than all of them if the timeout expired.
+        All items count as put if closed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        count = 0
+        with self.not_full:
+            for item in items:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if not self.not_full.wait_for(
+                    lambda: self.__closed or not self.__is_full(),
+                    remaining,
+                ):
+                    return count
+
+                if self.__closed:
+                    return len(items)
+
+                self._put(item)
+                self.unfinished_tasks += 1
+                count += 1
+                self.not_empty.notify()
+
+        return count
+
+    def put_many_drop_oldest(self, items: list) -> int:
+        """
+        Puts items in order without waiting, removing the oldest items to make space.
+
+        items: Items to put.
+
+        Returns the number of items removed.
+        """
+        dropped = 0
+        with self.not_full:
+            if self.__closed:
+                return 0
+
+            for item in items:
+                if self.__is_full():
+                    self._get()
+                    dropped += 1
+                else:
+                    self.unfinished_tasks += 1
+
+                self._put(item)
+                self.not_empty.notify()
+
+        return dropped
+
+    def get_many(self, max_items: int, timeout: float | None = None) -> list:
+        """
+        Waits for at least 1 item, then removes and returns up to `max_items` items without waiting.
+
+        max_items: Maximum number of items to return.
+        timeout: Time waiting in seconds for the first item, None waits forever.
+
+        Returns the items in order, empty if the timeout expired, and only the sentinel (None)
+        if closed.
+        """
+        if max_items <= 0:
+            return []
+
+        with self.not_empty:
+            if not self.not_empty.wait_for(lambda: self.__closed or self._qsize(), timeout):
+                return []
+
+            if self.__closed:
+                return [None]
+
+            items = []
+            while self._qsize() and len(items) < max_items:
+                items.append(self._get())
+
+            self.not_full.notify(len(items))
+
+        return items
+
+    def empty(self) -> bool:
+        """
+        Same as queue.Queue, but never empty if closed, since a get returns without blocking.
+        """
+        with self.mutex:
+            return not self.__closed and not self._qsize()
+
+    def close(self) -> None:
+        """
+        Closes the queue and wakes every blocked getter and putter.
+        Items still in the queue are discarded.
+        """
+        with self.mutex:
+            self.__closed = True
+            self.queue.clear()
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the queue is closed.
+        """
+        with self.mutex:
+            return self.__closed
+
+
+class SyncManager(multiprocessing.managers.SyncManager):
+    """
+    Manager process hosting the queue types of the workers, use instead of mp.Manager() .
+    Types are registered on this subclass, so the registry of SyncManager itself is unchanged.
+    """
+
+
+# Manager must be started after this for the type to be available
+SyncManager.register("BatchQueue", BatchQueue)
+
+
+def create_manager() -> SyncManager:
+    """
+    Starts a manager with the start method of the process, like mp.Manager() .
+    Start it after setting the start method and importing the queue types used with it.
+
+    Returns the started manager.
+    """
+    manager = SyncManager()
+    # Shut down by its owner
+    manager.start()  # pylint: disable=consider-using-with
+    return manager
+
 
 class QueueProxyWrapper:
     """
     Wrapper for an underlying queue proxy which also stores `maxsize`.
 
     `maxsize <= 0` means infinite size.
+    `instrumented` records statistics on the queue, see get_statistics().
+    `overflow` decides what a put does when the queue is full, see get_dropped_count().
+    `notifier` is shared with other queues to wait on all of them, see queue_wait.wait_any().
     """
 
     __QUEUE_TIMEOUT = 0.1  # seconds
     __QUEUE_DELAY = 0.1  # seconds
 
-    def __init__(self, mp_manager: multiprocessing.managers.SyncManager, maxsize: int = 0) -> None:
-        self.queue = mp_manager.Queue(maxsize)
+    def __init__(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        maxsize: int = 0,
+        instrumented: bool = False,
+        overflow: overflow_policy.OverflowPolicy = overflow_policy.OverflowPolicy.BLOCK,
+        overflow_timeout: float = 0.0,
+        notifier: queue_notifier.QueueNotifier | None = None,
+    ) -> None:
+        self.queue = self._create_queue(mp_manager, maxsize)
         self.maxsize = maxsize
 
+        self.__instrumented_queue = None
+        if instrumented:
+            self.__instrumented_queue = queue_statistics.InstrumentedQueue(
+                self.queue, maxsize, self._is_conflating()
+            )
+            self.queue = self.__instrumented_queue
+
+        # Around statistics so that they only see items that made it into the queue
+        self.__overflow_queue = None
+        if overflow != overflow_policy.OverflowPolicy.BLOCK:
+            self.__overflow_queue = overflow_policy.OverflowQueue(
+                self.queue, overflow, overflow_timeout
+            )
+            self.queue = self.__overflow_queue
+
+        # Notifies after dropping, so that waiters wake up for any put
+        self.__notifier = notifier
+        if notifier is not None:
+            self.queue = queue_notifier.NotifyingQueue(self.queue, notifier)
+
+    def _create_queue(
+        self, mp_manager: multiprocessing.managers.SyncManager, maxsize: int
+    ) -> BatchQueue:
+        """
+        Creates the underlying queue. Subclasses override this to change the transport.
+
+        mp_manager: Manager hosting the queue.
+        maxsize: Maximum size of the queue.
+
+        Returns the queue proxy.
+        """
+        return mp_manager.BatchQueue(maxsize)
+
+    def _is_conflating(self) -> bool:
+        """
+        Returns whether every put replaces the unread item of the underlying queue.
+        Subclasses with a conflating transport override this.
+        """
+        return False
+
+    def put_many(self, items: list, timeout: float | None = None) -> int:
+        """
+        Puts a batch of items in a single operation on the underlying queue.
+
+        items: Items to put.
+        timeout: Time waiting in seconds for all items to fit, None waits forever.
+
+        Returns the number of items put, fewer than all of them if the timeout expired.
+        """
+        return self.queue.put_many(items, timeout)
+
+    def get_many(self, max_items: int, timeout: float | None = None) -> list:
+        """
+        Gets a batch of items in a single operation on the underlying queue.
+        Waits for at least 1 item, then takes whatever else is available up to `max_items`.
+
+        max_items: Maximum number of items to return.
+        timeout: Time waiting in seconds for the first item, None waits forever.
+
+        Returns the items in order, empty if the timeout expired.
+        """
+        return self.queue.get_many(max_items, timeout)
+
+    def get_statistics(
+        self,
+    ) -> "tuple[True, queue_statistics.QueueStatistics] | tuple[False, None]":
+        """
+        Returns a snapshot of the queue statistics, can be called from any process.
+        Fails if the queue is not instrumented.
+        """
+        if self.__instrumented_queue is None:
+            return False, None
+
+        return True, self.__instrumented_queue.get_statistics()
+
+    def get_notifier(self) -> queue_notifier.QueueNotifier | None:
+        """
+        Returns the notifier, None if there is none.
+        """
+        return self.__notifier
+
+    def get_dropped_count(self) -> int:
+        """
+        Returns the number of items dropped by the overflow policy, can be called from any process.
+        """
+        if self.__overflow_queue is None:
+            return 0
+
+        return self.__overflow_queue.get_dropped_count()
+
+    def close(self) -> None:
+        """
+        Closes the queue, can be called from any process.
+        Wakes every blocked getter and putter immediately: gets return the sentinel (None)
+        and puts discard their item from then on, so workers exit without sleeps or draining.
+        """
+        self.queue.close()
+
     def fill_queue_with_sentinel(self, timeout: float = 0.0) -> None:
         """
         Fills the queue with sentinel (None).
@@ -54,7 +356,35 @@ class QueueProxyWrapper:
     def fill_and_drain_queue(self) -> None:
         """
         Fill with sentinel and then drain.
+        Prefer close() for shutdown, which does not depend on delays.
         """
         self.fill_queue_with_sentinel()
         time.sleep(self.__QUEUE_DELAY)
         self.drain_queue()
+
+
+class LocalQueueWrapper(QueueProxyWrapper):
+    """
+    Drop-in alternative to QueueProxyWrapper for thread and asyncio workers in main.
+    Items are passed by reference without serialization, so `mp_manager` is unused
+    and the queue cannot be passed to worker processes.
+    """
+
+    def __init__(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager | None = None,
+        maxsize: int = 0,
+        instrumented: bool = False,
+        overflow: overflow_policy.OverflowPolicy = overflow_policy.OverflowPolicy.BLOCK,
+        overflow_timeout: float = 0.0,
+        notifier: queue_notifier.QueueNotifier | None = None,
+    ) -> None:
+        """
+        mp_manager: Unused, kept for the same signature as QueueProxyWrapper.
+        """
+        super().__init__(mp_manager, maxsize, instrumented, overflow, overflow_timeout, notifier)
+
+    def _create_queue(
+        self, mp_manager: multiprocessing.managers.SyncManager | None, maxsize: int
+    ) -> BatchQueue:
+        return BatchQueue(maxsize)
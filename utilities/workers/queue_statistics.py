@@ -0,0 +1,344 @@
+"""
+Queue instrumentation.
+"""
+
+import ctypes
+import multiprocessing as mp
+import queue
+import time
+
+
+# Upper bounds of the histogram buckets in seconds, the last bucket has no upper bound
+HISTOGRAM_BOUNDS = (0.0001, 0.001, 0.01, 0.1, 1.0)
+
+
+class QueueStatistics:  # pylint: disable=too-many-instance-attributes
+    """
+    Snapshot of queue statistics. Times are in seconds.
+    Histograms count occurrences per bucket of HISTOGRAM_BOUNDS.
+    """
+
+    def __init__(
+        self,
+        depth: int,
+        high_water_depth: int,
+        put_count: int,
+        get_count: int,
+        sentinel_put_count: int,
+        sentinel_get_count: int,
+        evicted_count: int,
+        put_blocked_total: float,
+        put_blocked_max: float,
+        get_blocked_total: float,
+        get_blocked_max: float,
+        residence_total: float,
+        residence_max: float,
+        put_blocked_histogram: "list[int]",
+        get_blocked_histogram: "list[int]",
+        residence_histogram: "list[int]",
+    ) -> None:
+        self.depth = depth
+        self.high_water_depth = high_water_depth
+        self.put_count = put_count
+        self.get_count = get_count
+        self.sentinel_put_count = sentinel_put_count
+        self.sentinel_get_count = sentinel_get_count
+        self.evicted_count = evicted_count
+        self.put_blocked_total = put_blocked_total
+        self.put_blocked_max = put_blocked_max
+        self.get_blocked_total = get_blocked_total
+        self.get_blocked_max = get_blocked_max
+        self.residence_total = residence_total
+        self.residence_max = residence_max
+        self.put_blocked_histogram = put_blocked_histogram
+        self.get_blocked_histogram = get_blocked_histogram
+        self.residence_histogram = residence_histogram
+
+    def get_residence_mean(self) -> float:
+        """
+        Returns the mean time an item spent in the queue, 0 if none were taken out.
+        """
+        if self.get_count == 0:
+            return 0.0
+
+        return self.residence_total / self.get_count
+
+    def get_queued_mean(self) -> float:
+        """
+        Returns the mean time an item spent in the queue after its put returned,
+        estimated as the mean residence minus the mean time a put was blocked.
+        """
+        if self.put_count == 0:
+            return 0.0
+
+        return max(self.get_residence_mean() - self.put_blocked_total / self.put_count, 0.0)
+
+    def __str__(self) -> str:
+        return (
+            f"depth: {self.depth} (high water {self.high_water_depth}), "
+            f"put: {self.put_count} ({self.sentinel_put_count} sentinel), "
+            f"get: {self.get_count} ({self.sentinel_get_count} sentinel), "
+            f"evicted: {self.evicted_count}, "
+            f"put blocked: {self.put_blocked_total:.3f} s (max {self.put_blocked_max:.4f} s), "
+            f"get blocked: {self.get_blocked_total:.3f} s (max {self.get_blocked_max:.4f} s), "
+            f"residence: mean {self.get_residence_mean():.4f} s "
+            f"({self.get_queued_mean():.4f} s after put, max {self.residence_max:.4f} s), "
+            f"residence histogram: {self.residence_histogram}"
+        )
+
+
+class InstrumentedQueue:
+    """
+    Wraps a queue with the same interface and records statistics in shared memory,
+    so that they can be read from any process.
+
+    Items are put into the underlying queue inside an envelope with the time put was called,
+    so residence time includes the time the producer was blocked, which is also recorded
+    as put blocked time, see QueueStatistics.get_queued_mean() .
+    Time blocked includes calls that timed out.
+    High water depth is computed from the put, get and evicted counters, and capped at maxsize.
+    Items overwritten in a conflating mailbox are counted as evicted.
+    """
+
+    # Indices into the shared statistics array
+    __PUT_COUNT = 0
+    __GET_COUNT = 1
+    __SENTINEL_PUT_COUNT = 2
+    __SENTINEL_GET_COUNT = 3
+    __HIGH_WATER_DEPTH = 4
+    __PUT_BLOCKED_TOTAL = 5
+    __PUT_BLOCKED_MAX = 6
+    __GET_BLOCKED_TOTAL = 7
+    __GET_BLOCKED_MAX = 8
+    __RESIDENCE_TOTAL = 9
+    __RESIDENCE_MAX = 10
+    __EVICTED_COUNT = 11
+    __PUT_BLOCKED_HISTOGRAM = 12
+    __GET_BLOCKED_HISTOGRAM = __PUT_BLOCKED_HISTOGRAM + len(HISTOGRAM_BOUNDS) + 1
+    __RESIDENCE_HISTOGRAM = __GET_BLOCKED_HISTOGRAM + len(HISTOGRAM_BOUNDS) + 1
+    __SIZE = __RESIDENCE_HISTOGRAM + len(HISTOGRAM_BOUNDS) + 1
+
+    def __init__(
+        self, underlying_queue: object, maxsize: int = 0, is_conflating: bool = False
+    ) -> None:
+        """
+        underlying_queue: Queue or queue proxy to wrap.
+        maxsize: Maximum size of the underlying queue, <= 0 for infinite size.
+        is_conflating: Whether the underlying queue is a conflating mailbox,
+            where every put replaces the unread item.
+        """
+        self.__queue = underlying_queue
+        self.__maxsize = maxsize
+        self.__is_conflating = is_conflating
+        self.__statistics = mp.Array(ctypes.c_double, self.__SIZE)
+
+    def __getattr__(self, name: str) -> object:
+        # Pass through transport specific methods
+        # Private names are not passed through, which also keeps unpickling safe
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        return getattr(self.__queue, name)
+
+    @staticmethod
+    def __bucket(duration: float) -> int:
+        """
+        Returns the histogram bucket index of the duration.
+        """
+        for i, bound in enumerate(HISTOGRAM_BOUNDS):
+            if duration <= bound:
+                return i
+
+        return len(HISTOGRAM_BOUNDS)
+
+    @classmethod
+    def __record_time(
+        cls, values: ctypes.Array, total_index: int, histogram_index: int, duration: float
+    ) -> None:
+        """
+        Adds the duration to a total, maximum (following the total) and histogram.
+        Lock must be held.
+        """
+        values[total_index] += duration
+        if duration > values[total_index + 1]:
+            values[total_index + 1] = duration
+
+        values[histogram_index + cls.__bucket(duration)] += 1
+
+    def __record_put(self, items: list, blocked: float, evicted: int = 0) -> None:
+        """
+        Records items that were put, and the items they evicted.
+        """
+        # The raw array is used under a single lock, the synchronized one locks every access
+        values = self.__statistics.get_obj()
+        with self.__statistics.get_lock():
+            self.__record_time(
+                values, self.__PUT_BLOCKED_TOTAL, self.__PUT_BLOCKED_HISTOGRAM, blocked
+            )
+            values[self.__PUT_COUNT] += len(items)
+            values[self.__SENTINEL_PUT_COUNT] += sum(item is None for item in items)
+            values[self.__EVICTED_COUNT] += evicted
+
+            # Gets can be recorded before the puts of their items, so the counters can overshoot
+            depth = (
+                values[self.__PUT_COUNT] - values[self.__GET_COUNT] - values[self.__EVICTED_COUNT]
+            )
+            if self.__maxsize > 0:
+                depth = min(depth, self.__maxsize)
+
+            if depth > values[self.__HIGH_WATER_DEPTH]:
+                values[self.__HIGH_WATER_DEPTH] = depth
+
+    def __record_get(self, envelopes: list, blocked: float) -> list:
+        """
+        Records envelopes that were taken out.
+
+        Returns the items inside the envelopes.
+        """
+        now = time.perf_counter()
+        items = []
+        received = []
+        values = self.__statistics.get_obj()
+        with self.__statistics.get_lock():
+            self.__record_time(
+                values, self.__GET_BLOCKED_TOTAL, self.__GET_BLOCKED_HISTOGRAM, blocked
+            )
+            for envelope in envelopes:
+                # Sentinel from a closed queue, which was never put
+                if envelope is None:
+                    items.append(None)
+                    continue
+
+                enqueue_time, item = envelope
+                self.__record_time(
+                    values, self.__RESIDENCE_TOTAL, self.__RESIDENCE_HISTOGRAM, now - enqueue_time
+                )
+                items.append(item)
+                received.append(item)
+
+            values[self.__GET_COUNT] += len(received)
+            values[self.__SENTINEL_GET_COUNT] += sum(item is None for item in received)
+
+        return items
+
+    def put(self, item: object, block: bool = True, timeout: float | None = None) -> None:
+        """
+        Same as the underlying queue.
+        """
+        start = time.perf_counter()
+        if self.__is_conflating:
+            evicted = self.__queue.put_many_drop_oldest([(start, item)])
+            self.__record_put([item], time.perf_counter() - start, evicted)
+            return
+
+        try:
+            self.__queue.put((start, item), block, timeout)
+        except queue.Full:
+            self.__record_put([], time.perf_counter() - start)
+            raise
+
+        self.__record_put([item], time.perf_counter() - start)
+
+    def get(self, block: bool = True, timeout: float | None = None) -> object:
+        """
+        Same as the underlying queue.
+        """
+        start = time.perf_counter()
+        try:
+            envelope = self.__queue.get(block, timeout)
+        except queue.Empty:
+            self.__record_get([], time.perf_counter() - start)
+            raise
+
+        return self.__record_get([envelope], time.perf_counter() - start)[0]
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def put_many(self, items: list, timeout: float | None = None) -> int:
+        """
+        Same as the underlying queue.
+        """
+        start = time.perf_counter()
+        if self.__is_conflating:
+            evicted = self.__queue.put_many_drop_oldest([(start, item) for item in items])
+            self.__record_put(items, time.perf_counter() - start, evicted)
+            return len(items)
+
+        count = self.__queue.put_many([(start, item) for item in items], timeout)
+        self.__record_put(items[:count], time.perf_counter() - start)
+        return count
+
+    def put_many_drop_oldest(self, items: list) -> int:
+        """
+        Same as the underlying queue, removed items are counted as evicted.
+        """
+        start = time.perf_counter()
+        dropped = self.__queue.put_many_drop_oldest([(start, item) for item in items])
+        self.__record_put(items, time.perf_counter() - start, dropped)
+        return dropped
+
+    def get_many(self, max_items: int, timeout: float | None = None) -> list:
+        """
+        Same as the underlying queue.
+        """
+        start = time.perf_counter()
+        envelopes = self.__queue.get_many(max_items, timeout)
+        return self.__record_get(envelopes, time.perf_counter() - start)
+
+    def qsize(self) -> int:
+        """
+        Same as the underlying queue.
+        """
+        return self.__queue.qsize()
+
+    def empty(self) -> bool:
+        """
+        Same as the underlying queue.
+        """
+        return self.__queue.empty()
+
+    def full(self) -> bool:
+        """
+        Same as the underlying queue.
+        """
+        return self.__queue.full()
+
+    def get_statistics(self) -> QueueStatistics:
+        """
+        Returns a snapshot of the statistics.
+        """
+        depth = self.__queue.qsize()
+        with self.__statistics.get_lock():
+            values = self.__statistics.get_obj()[:]
+
+        def histogram(start: int) -> "list[int]":
+            return [int(count) for count in values[start : start + len(HISTOGRAM_BOUNDS) + 1]]
+
+        return QueueStatistics(
+            depth,
+            int(values[self.__HIGH_WATER_DEPTH]),
+            int(values[self.__PUT_COUNT]),
+            int(values[self.__GET_COUNT]),
+            int(values[self.__SENTINEL_PUT_COUNT]),
+            int(values[self.__SENTINEL_GET_COUNT]),
+            int(values[self.__EVICTED_COUNT]),
+            values[self.__PUT_BLOCKED_TOTAL],
+            values[self.__PUT_BLOCKED_MAX],
+            values[self.__GET_BLOCKED_TOTAL],
+            values[self.__GET_BLOCKED_MAX],
+            values[self.__RESIDENCE_TOTAL],
+            values[self.__RESIDENCE_MAX],
+            histogram(self.__PUT_BLOCKED_HISTOGRAM),
+            histogram(self.__GET_BLOCKED_HISTOGRAM),
+            histogram(self.__RESIDENCE_HISTOGRAM),
+        )
@@ -0,0 +1,169 @@
+"""
+Waiting on several queues at once.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+# Period of checking for exit while waiting on queues the controller does not notify
+EXIT_CHECK_PERIOD = 0.05  # seconds
+
+
+def wait_any(
+    queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    timeout: float | None = None,
+    controller: worker_controller.WorkerController | None = None,
+) -> "tuple[True, list[queue_proxy_wrapper.QueueProxyWrapper]] | tuple[False, None]":
+    """
+    Blocks until any of the queues has an item, the timeout expires or exit is requested.
+    The queues must share a single notifier.
+    Exit is noticed right away if the controller notifies it, otherwise every EXIT_CHECK_PERIOD.
+
+    queues: Queues to wait on.
+    timeout: Time waiting in seconds, None waits forever.
+    controller: Worker controller checked for exit, None does not check.
+
+    Returns the queues that have items or are closed,
+    which is empty if the timeout expired or exit was requested.
+    Fails if the queues do not share a single notifier.
+    """
+    notifiers = {id(wrapper.get_notifier()): wrapper.get_notifier() for wrapper in queues}
+    if len(notifiers) != 1 or None in notifiers.values():
+        return False, None
+
+    (notifier,) = notifiers.values()
+    is_polling_exit = controller is not None and not controller.is_notifying(notifier)
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        # Read before checking so that a put in between is not missed
+        sequence = notifier.get_sequence()
+
+        ready_queues = [wrapper for wrapper in queues if not wrapper.queue.empty()]
+        if len(ready_queues) > 0:
+            return True, ready_queues
+
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0.0:
+            return True, []
+
+        if controller is not None and controller.is_exit_requested():
+            return True, []
+
+        if is_polling_exit:
+            remaining = (
+                EXIT_CHECK_PERIOD if remaining is None else min(remaining, EXIT_CHECK_PERIOD)
+            )
+
+        notifier.wait(sequence, remaining)
+
+
+def get_or_exit(
+    wrapper: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+    timeout: float | None = None,
+) -> "tuple[True, object] | tuple[False, None]":
+    """
+    Blocking get for consumer workers instead of polling empty() in a loop.
+    Does not take an item while paused.
+    Waits on the notifier of the queue if it has one, otherwise in a blocking get.
+    Requests are noticed right away if the controller notifies the notifier,
+    otherwise the wait is in slices of EXIT_CHECK_PERIOD and they are noticed within a slice.
+
+    wrapper: Queue to get from.
+    controller: Worker controller checked for exit and pause.
+    timeout: Time waiting in seconds, None waits until an item or exit.
+
+    Returns the item, which is the sentinel (None) if the queue was closed.
+    Fails if exit was requested or the timeout expired.
+    """
+    return _get_or_exit(wrapper, controller, timeout, None)
+
+
+def _get_or_exit(
+    wrapper: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+    timeout: float | None,
+    cancelled: threading.Event | None,
+) -> "tuple[True, object] | tuple[False, None]":
+    """
+    get_or_exit() that also fails once cancelled is set, without taking another item.
+    An item taken anyway by a get already running when cancelled is set is put back
+    at the end of the queue. Only a blocking get on a queue without a notifier runs for long.
+    """
+    notifier = wrapper.get_notifier()
+    # Requests are only noticed within a slice if the controller does not notify
+    is_polling_exit = notifier is None or not controller.is_notifying(notifier)
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while not controller.is_exit_requested():
+        controller.check_pause()
+
+        # Read before trying so that a put in between is not missed
+        sequence = 0 if notifier is None else notifier.get_sequence()
+
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0.0:
+            return False, None
+
+        if cancelled is not None and cancelled.is_set():
+            return False, None
+
+        if is_polling_exit:
+            remaining = (
+                EXIT_CHECK_PERIOD if remaining is None else min(remaining, EXIT_CHECK_PERIOD)
+            )
+
+        try:
+            if notifier is None:
+                item = wrapper.queue.get(True, remaining)
+            else:
+                item = wrapper.queue.get(False)
+        except queue.Empty:
+            if notifier is not None:
+                notifier.wait(sequence, remaining)
+
+            continue
+
+        if cancelled is not None and cancelled.is_set() and item is not None:
+            wrapper.queue.put(item)
+            return False, None
+
+        return True, item
+
+    return False, None
+
+
+async def async_get_or_exit(
+    wrapper: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+    timeout: float | None = None,
+) -> "tuple[True, object] | tuple[False, None]":
+    """
+    Same as get_or_exit() for asyncio workers.
+    Waits in a thread, so other workers keep running and the item is taken without polling.
+    The thread cannot be cancelled, so cancelling the task tells the thread to stop before
+    its next get and wakes it through the notifier of the queue.
+    An item that a get already running takes anyway is put back at the end of the queue.
+    """
+    await controller.async_check_pause()
+    cancelled = threading.Event()
+    getter = asyncio.ensure_future(
+        asyncio.to_thread(_get_or_exit, wrapper, controller, timeout, cancelled)
+    )
+    try:
+        return await asyncio.shield(getter)
+    except asyncio.CancelledError:
+        cancelled.set()
+        # Waiters check their queues again on any notification
+        notifier = wrapper.get_notifier()
+        if notifier is not None:
+            notifier.notify()
+
+        raise
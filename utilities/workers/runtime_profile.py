@@ -0,0 +1,131 @@
+"""
+OS scheduling and garbage collection settings of workers.
+"""
+
+import gc
+import os
+
+from modules.common.modules.logger import logger
+
+
+class RuntimeProfile:
+    """
+    Settings applied in each worker process before its target runs,
+    so that latency critical workers can be kept apart from noisy ones.
+    """
+
+    __create_key = object()
+
+    __MIN_NICE = -20
+    __MAX_NICE = 19
+    # Full collections only happen after this many generation 1 collections
+    __SUPPRESSED_THRESHOLD = 1_000_000_000
+
+    @classmethod
+    def create(
+        cls,
+        local_logger: logger.Logger,
+        cpu_affinity: "set[int] | None" = None,
+        nice: int = 0,
+        freeze_gc_after_init: bool = False,
+        suppress_full_gc: bool = False,
+    ) -> "tuple[True, RuntimeProfile] | tuple[False, None]":
+        """
+        Creates a runtime profile, which is passed to WorkerProperties.create() .
+
+        local_logger: Existing logger from process.
+        cpu_affinity: CPUs the workers may run on, None for any CPU.
+        nice: Increment to the niceness of main, positive yields the CPU to other processes
+            and negative usually requires privileges.
+        freeze_gc_after_init: Whether to move all objects existing at the first loop iteration
+            into the permanent generation, so that collections no longer scan them.
+        suppress_full_gc: Whether to suppress full (generation 2) collections,
+            which take the longest. Cyclic garbage that reaches generation 2 is never freed.
+
+        Returns the RuntimeProfile object.
+        """
+        if cpu_affinity is not None:
+            if not hasattr(os, "sched_setaffinity"):
+                local_logger.error("CPU affinity is not supported on this platform", True)
+                return False, None
+
+            available_cpus = os.sched_getaffinity(0)
+            if len(cpu_affinity) == 0 or not cpu_affinity.issubset(available_cpus):
+                local_logger.error(
+                    f"CPU affinity {cpu_affinity} is not a subset of the available CPUs "
+                    f"{available_cpus}",
+                    True,
+                )
+                return False, None
+
+        if nice < cls.__MIN_NICE or nice > cls.__MAX_NICE:
+            local_logger.error(f"Nice value out of range: {nice}", True)
+            return False, None
+
+        return True, RuntimeProfile(
+            cls.__create_key,
+            cpu_affinity,
+            nice,
+            freeze_gc_after_init,
+            suppress_full_gc,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        cpu_affinity: "set[int] | None",
+        nice: int,
+        freeze_gc_after_init: bool,
+        suppress_full_gc: bool,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is RuntimeProfile.__create_key, "Use create() method"
+
+        self.__cpu_affinity = cpu_affinity
+        self.__nice = nice
+        self.__freeze_gc_after_init = freeze_gc_after_init
+        self.__suppress_full_gc = suppress_full_gc
+
+    def __str__(self) -> str:
+        return (
+            f"CPUs: {self.__cpu_affinity}, nice: {self.__nice}, "
+            f"freeze GC after init: {self.__freeze_gc_after_init}, "
+            f"suppress full GC: {self.__suppress_full_gc}"
+        )
+
+    def apply(self) -> bool:
+        """
+        Applies the settings to this process, called in the worker before its target runs.
+
+        Returns whether all settings were applied, the others are left unchanged.
+        """
+        is_applied = True
+        if self.__cpu_affinity is not None:
+            try:
+                os.sched_setaffinity(0, self.__cpu_affinity)
+            except OSError:
+                is_applied = False
+
+        if self.__nice != 0:
+            try:
+                os.nice(self.__nice)
+            except OSError:
+                is_applied = False
+
+        if self.__suppress_full_gc:
+            threshold_0, threshold_1, _ = gc.get_threshold()
+            gc.set_threshold(threshold_0, threshold_1, self.__SUPPRESSED_THRESHOLD)
+
+        return is_applied
+
+    def finish_init(self) -> None:
+        """
+        Applies the settings that depend on the worker being initialized,
+        called on the first loop iteration of the worker.
+        """
+        if self.__freeze_gc_after_init:
+            # Garbage from initializing would never be freed once frozen
+            gc.collect()
+            gc.freeze()
@@ -0,0 +1,426 @@
+"""
+Shared memory queue.
+"""
+
+import multiprocessing as mp
+import multiprocessing.managers
+import multiprocessing.shared_memory
+import os
+import pickle
+import queue
+import struct
+import time
+import weakref
+
+from utilities.workers import overflow_policy
+from utilities.workers import queue_notifier
+from utilities.workers import queue_proxy_wrapper
+
+
+DEFAULT_SLOT_SIZE = 4096  # bytes
+
+
+class SharedMemoryRingBuffer:  # pylint: disable=too-many-instance-attributes
+    """
+    Fixed size ring buffer in shared memory with the same interface as a queue proxy.
+
+    Each item is pickled into its own slot, so items larger than the slot size are rejected.
+    Semaphores count the filled and free slots, and a lock protects the head and tail indices.
+
+    Once closed, every blocked or later get returns the sentinel (None)
+    and every put discards its item, so that workers can exit immediately.
+    """
+
+    # Head and tail are monotonically increasing counters, index is counter % slot count
+    # Closed is a flag, 1 if closed
+    __HEADER = struct.Struct("=QQQ")
+    __LENGTH = struct.Struct("=I")
+    __EVICT_RETRY_TIMEOUT = 0.001  # seconds
+
+    def __init__(self, slot_count: int, slot_size: int = DEFAULT_SLOT_SIZE) -> None:
+        """
+        slot_count: Number of slots, must be greater than 0 .
+        slot_size: Maximum size of a pickled item in bytes, must be greater than 0 .
+        """
+        assert slot_count > 0, "Slot count must be greater than 0"
+        assert slot_size > 0, "Slot size must be greater than 0"
+
+        self.__slot_count = slot_count
+        self.__slot_size = slot_size
+        self.__stride = self.__LENGTH.size + slot_size
+
+        self.__shared_memory = multiprocessing.shared_memory.SharedMemory(
+            create=True,
+            size=self.__HEADER.size + slot_count * self.__stride,
+        )
+        self.__HEADER.pack_into(self.__shared_memory.buf, 0, 0, 0, 0)
+
+        self.__lock = mp.Lock()
+        self.__items = mp.Semaphore(0)
+        self.__spaces = mp.Semaphore(slot_count)
+
+        # Only the creating process frees the shared memory, workers just detach on exit
+        self.__finalizer = weakref.finalize(
+            self,
+            SharedMemoryRingBuffer.__release,
+            self.__shared_memory,
+            os.getpid(),
+        )
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # The finalizer belongs to the creating process
+        del state["_SharedMemoryRingBuffer__finalizer"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__finalizer = None
+
+    @staticmethod
+    def __release(
+        shared_memory: multiprocessing.shared_memory.SharedMemory, creator_pid: int
+    ) -> None:
+        """
+        Frees the shared memory if called from the creating process.
+        """
+        if os.getpid() != creator_pid:
+            return
+
+        shared_memory.close()
+        shared_memory.unlink()
+
+    def __write_slot(self, counter: int, payload: bytes) -> None:
+        """
+        Writes the payload into the slot of the counter. Lock must be held.
+        """
+        offset = self.__HEADER.size + (counter % self.__slot_count) * self.__stride
+        buffer = self.__shared_memory.buf
+        self.__LENGTH.pack_into(buffer, offset, len(payload))
+        start = offset + self.__LENGTH.size
+        buffer[start : start + len(payload)] = payload
+
+    def __read_slot(self, counter: int) -> bytes:
+        """
+        Copies the payload out of the slot of the counter. Lock must be held.
+        """
+        offset = self.__HEADER.size + (counter % self.__slot_count) * self.__stride
+        buffer = self.__shared_memory.buf
+        (length,) = self.__LENGTH.unpack_from(buffer, offset)
+        start = offset + self.__LENGTH.size
+        return bytes(buffer[start : start + length])
+
+    def put(self, item: object, block: bool = True, timeout: float | None = None) -> None:
+        """
+        Puts an item into the ring buffer.
+
+        item: Picklable object.
+        block: Whether to wait for a free slot.
+        timeout: Time waiting in seconds for a free slot, None waits forever.
+
+        Raises queue.Full if no slot became free, and ValueError if the item is too large.
+        """
+        payload = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.__slot_size:
+            raise ValueError(
+                f"Pickled item is {len(payload)} bytes, larger than slot size {self.__slot_size}"
+            )
+
+        if not self.__spaces.acquire(block, timeout):
+            raise queue.Full
+
+        with self.__lock:
+            head, tail, closed = self.__HEADER.unpack_from(self.__shared_memory.buf, 0)
+            if not closed:
+                self.__write_slot(tail, payload)
+                self.__HEADER.pack_into(self.__shared_memory.buf, 0, head, tail + 1, closed)
+
+        # Pass the wake up on to the next waiter if closed
+        if closed:
+            self.__spaces.release()
+            return
+
+        self.__items.release()
+
+    def get(self, block: bool = True, timeout: float | None = None) -> object:
+        """
+        Removes and returns the oldest item from the ring buffer.
+
+        block: Whether to wait for an item.
+        timeout: Time waiting in seconds for an item, None waits forever.
+
+        Raises queue.Empty if no item became available.
+        Returns the sentinel (None) if closed.
+        """
+        if not self.__items.acquire(block, timeout):
+            raise queue.Empty
+
+        with self.__lock:
+            head, tail, closed = self.__HEADER.unpack_from(self.__shared_memory.buf, 0)
+            if not closed:
+                payload = self.__read_slot(head)
+                self.__HEADER.pack_into(self.__shared_memory.buf, 0, head + 1, tail, closed)
+
+        # Pass the wake up on to the next waiter if closed
+        if closed:
+            self.__items.release()
+            return None
+
+        self.__spaces.release()
+
+        return pickle.loads(payload)
+
+    def put_many(self, items: list, timeout: float | None = None) -> int:
+        """
+        Puts items in order, taking the lock once for every run of free slots.
+
+        items: Picklable objects.
+        timeout: Time waiting in seconds for all items to fit, None waits forever.
+
+        Returns the number of items put, fewer than all of them if the timeout expired.
+        All items count as put if closed.
+        Raises ValueError if any item is too large, in which case none are put.
+        """
+        payloads = [pickle.dumps(item, pickle.HIGHEST_PROTOCOL) for item in items]
+        for payload in payloads:
+            if len(payload) > self.__slot_size:
+                raise ValueError(
+                    f"Pickled item is {len(payload)} bytes, larger than slot size {self.__slot_size}"
+                )
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        count = 0
+        while count < len(payloads):
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            if not self.__spaces.acquire(True, remaining):
+                break
+
+            # Claim whatever else is free so the run is written under a single lock
+            run = 1
+            while count + run < len(payloads) and self.__spaces.acquire(False):
+                run += 1
+
+            with self.__lock:
+                head, tail, closed = self.__HEADER.unpack_from(self.__shared_memory.buf, 0)
+                if not closed:
+                    for i in range(run):
+                        self.__write_slot(tail + i, payloads[count + i])
+
+                    self.__HEADER.pack_into(self.__shared_memory.buf, 0, head, tail + run, closed)
+
+            if closed:
+                for _ in range(run):
+                    self.__spaces.release()
+
+                return len(payloads)
+
+            for _ in range(run):
+                self.__items.release()
+
+            count += run
+
+        return count
+
+    def put_many_drop_oldest(self, items: list) -> int:
+        """
+        Puts items in order without waiting for a consumer, removing the oldest items to make space.
+
+        items: Picklable objects.
+
+        Returns the number of items removed.
+        Raises ValueError if any item is too large, in which case none are put.
+        """
+        payloads = [pickle.dumps(item, pickle.HIGHEST_PROTOCOL) for item in items]
+        for payload in payloads:
+            if len(payload) > self.__slot_size:
+                raise ValueError(
+                    f"Pickled item is {len(payload)} bytes, larger than slot size {self.__slot_size}"
+                )
+
+        dropped = 0
+        for payload in payloads:
+            # Either claim a free slot or take the oldest item and reuse its slot
+            # If getters hold every item, they free their slots shortly, so wait for one of those
+            evict = False
+            while not self.__spaces.acquire(False):
+                if self.__items.acquire(False):
+                    evict = True
+                    break
+
+                if self.__spaces.acquire(True, self.__EVICT_RETRY_TIMEOUT):
+                    break
+
+            with self.__lock:
+                head, tail, closed = self.__HEADER.unpack_from(self.__shared_memory.buf, 0)
+                if not closed:
+                    if evict:
+                        head += 1
+                        dropped += 1
+
+                    self.__write_slot(tail, payload)
+                    self.__HEADER.pack_into(self.__shared_memory.buf, 0, head, tail + 1, closed)
+
+            if closed:
+                if evict:
+                    self.__items.release()
+                else:
+                    self.__spaces.release()
+
+                return dropped
+
+            self.__items.release()
+
+        return dropped
+
+    def get_many(self, max_items: int, timeout: float | None = None) -> list:
+        """
+        Waits for at least 1 item, then removes and returns up to `max_items` items without waiting.
+
+        max_items: Maximum number of items to return.
+        timeout: Time waiting in seconds for the first item, None waits forever.
+
+        Returns the items in order, empty if the timeout expired, and only the sentinel (None)
+        if closed.
+        """
+        if max_items <= 0 or not self.__items.acquire(True, timeout):
+            return []
+
+        run = 1
+        while run < max_items and self.__items.acquire(False):
+            run += 1
+
+        with self.__lock:
+            head, tail, closed = self.__HEADER.unpack_from(self.__shared_memory.buf, 0)
+            if not closed:
+                payloads = [self.__read_slot(head + i) for i in range(run)]
+                self.__HEADER.pack_into(self.__shared_memory.buf, 0, head + run, tail, closed)
+
+        if closed:
+            for _ in range(run):
+                self.__items.release()
+
+            return [None]
+
+        for _ in range(run):
+            self.__spaces.release()
+
+        return [pickle.loads(payload) for payload in payloads]
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Returns the number of items in the ring buffer.
+        """
+        with self.__lock:
+            head, tail, _ = self.__HEADER.unpack_from(self.__shared_memory.buf, 0)
+
+        return tail - head
+
+    def empty(self) -> bool:
+        """
+        Returns whether the ring buffer is empty.
+        Never empty if closed, since a get returns without blocking.
+        """
+        with self.__lock:
+            head, tail, closed = self.__HEADER.unpack_from(self.__shared_memory.buf, 0)
+
+        return not closed and tail == head
+
+    def full(self) -> bool:
+        """
+        Returns whether all slots are filled.
+        """
+        return self.qsize() >= self.__slot_count
+
+    def close(self) -> None:
+        """
+        Closes the ring buffer and wakes every blocked getter and putter.
+        Items still in the ring buffer are discarded.
+        """
+        with self.__lock:
+            _, tail, _ = self.__HEADER.unpack_from(self.__shared_memory.buf, 0)
+            self.__HEADER.pack_into(self.__shared_memory.buf, 0, tail, tail, 1)
+
+        # Each woken waiter releases again to wake the next one
+        self.__items.release()
+        self.__spaces.release()
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the ring buffer is closed.
+        """
+        with self.__lock:
+            _, _, closed = self.__HEADER.unpack_from(self.__shared_memory.buf, 0)
+
+        return closed == 1
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory.
+        Only call from the creating process after all workers have stopped,
+        otherwise this is done automatically when the ring buffer is garbage collected.
+        Does nothing in other processes, which only detach when they exit.
+        """
+        if self.__finalizer is None:
+            return
+
+        self.__finalizer()
+
+
+class SharedMemoryQueueWrapper(queue_proxy_wrapper.QueueProxyWrapper):
+    """
+    Drop-in alternative to QueueProxyWrapper backed by a shared memory ring buffer.
+    Items are exchanged without a round trip to the manager process, so `mp_manager` is unused.
+
+    `maxsize <= 0` uses a default slot count as `maxsize`, since shared memory cannot grow.
+    """
+
+    __DEFAULT_SLOT_COUNT = 1024
+
+    def __init__(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager | None = None,
+        maxsize: int = 0,
+        slot_size: int = DEFAULT_SLOT_SIZE,
+        instrumented: bool = False,
+        overflow: overflow_policy.OverflowPolicy = overflow_policy.OverflowPolicy.BLOCK,
+        overflow_timeout: float = 0.0,
+        notifier: queue_notifier.QueueNotifier | None = None,
+    ) -> None:
+        """
+        mp_manager: Unused, kept for the same signature as QueueProxyWrapper.
+        maxsize: Number of slots.
+        slot_size: Maximum size of a pickled item in bytes.
+        instrumented: Whether to record statistics.
+        overflow: What a put does when all slots are filled.
+        overflow_timeout: Time waiting in seconds before dropping, only used by BLOCK_THEN_DROP.
+        notifier: Notifier shared with other queues for queue_wait.wait_any().
+        """
+        self.__slot_size = slot_size
+        if maxsize <= 0:
+            maxsize = self.__DEFAULT_SLOT_COUNT
+
+        super().__init__(mp_manager, maxsize, instrumented, overflow, overflow_timeout, notifier)
+
+    def _create_queue(
+        self, mp_manager: multiprocessing.managers.SyncManager | None, maxsize: int
+    ) -> SharedMemoryRingBuffer:
+        self.__ring_buffer = SharedMemoryRingBuffer(maxsize, self.__slot_size)
+        return self.__ring_buffer
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory of the ring buffer, see SharedMemoryRingBuffer.unlink() .
+        """
+        self.__ring_buffer.unlink()
@@ -0,0 +1,193 @@
+"""
+For scaling the number of workers with their load.
+"""
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_manager
+
+
+class WorkerAutoscaler:  # pylint: disable=too-many-instance-attributes
+    """
+    Adds workers when their input queues back up and retires them again once the queues
+    have stayed empty for a while, between a minimum and maximum number of workers.
+
+    Queues are backed up when they hold more items per worker than the depth limit,
+    or, for instrumented queues, when items waited longer than the residence limit on average.
+    """
+
+    __create_key = object()
+
+    @classmethod
+    def create(
+        cls,
+        manager: worker_manager.WorkerManager,
+        min_count: int,
+        max_count: int,
+        local_logger: logger.Logger,
+        depth_limit: float = 4.0,
+        residence_limit: float = 0.1,
+        scale_up_cooldown: float = 1.0,
+        scale_down_idle_time: float = 5.0,
+        period: float = 0.5,
+    ) -> "tuple[True, WorkerAutoscaler] | tuple[False, None]":
+        """
+        Creates an autoscaler, which is run by the worker supervisor.
+
+        manager: Worker manager to scale, its workers must have input queues.
+        min_count: Minimum number of workers.
+        max_count: Maximum number of workers.
+        local_logger: Existing logger from process.
+        depth_limit: Items per worker in the input queues above which a worker is added.
+        residence_limit: Mean time in seconds items waited in the input queues
+            above which a worker is added.
+        scale_up_cooldown: Time in seconds after adding a worker before adding another,
+            so that the new worker can catch up first.
+        scale_down_idle_time: Time in seconds the input queues must stay empty
+            before a worker is retired.
+        period: Time in seconds between checks of the input queues.
+
+        Returns the WorkerAutoscaler object.
+        """
+        if len(manager.get_input_queues()) == 0:
+            local_logger.error(
+                f"Workers of {manager.get_target_name()} have no input queues to scale with", True
+            )
+            return False, None
+
+        if min_count < 1 or max_count < min_count:
+            local_logger.error(
+                f"Invalid worker counts, minimum: {min_count}, maximum: {max_count}", True
+            )
+            return False, None
+
+        if depth_limit <= 0.0 or residence_limit <= 0.0 or period <= 0.0:
+            local_logger.error(
+                f"Invalid limits, depth: {depth_limit}, residence: {residence_limit} s, "
+                f"period: {period} s",
+                True,
+            )
+            return False, None
+
+        return True, WorkerAutoscaler(
+            cls.__create_key,
+            manager,
+            min_count,
+            max_count,
+            local_logger,
+            depth_limit,
+            residence_limit,
+            scale_up_cooldown,
+            scale_down_idle_time,
+            period,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        manager: worker_manager.WorkerManager,
+        min_count: int,
+        max_count: int,
+        local_logger: logger.Logger,
+        depth_limit: float,
+        residence_limit: float,
+        scale_up_cooldown: float,
+        scale_down_idle_time: float,
+        period: float,
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is WorkerAutoscaler.__create_key, "Use create() method"
+
+        self.__manager = manager
+        self.__min_count = min_count
+        self.__max_count = max_count
+        self.__local_logger = local_logger
+        self.__depth_limit = depth_limit
+        self.__residence_limit = residence_limit
+        self.__scale_up_cooldown = scale_up_cooldown
+        self.__scale_down_idle_time = scale_down_idle_time
+        self.__period = period
+
+        self.__next_update_time = 0.0
+        self.__last_scale_up_time = float("-inf")
+        # Time the input queues were last seen with items
+        self.__last_busy_time: float | None = None
+        # Residence totals and get counts at the previous update, to average over a period
+        self.__previous_residence = [(0.0, 0) for _ in manager.get_input_queues()]
+
+    def get_manager(self) -> worker_manager.WorkerManager:
+        """
+        Returns the worker manager being scaled.
+        """
+        return self.__manager
+
+    def __measure(self) -> "tuple[int, float]":
+        """
+        Returns the total depth of the input queues and the highest mean residence time
+        since the previous measurement, 0 for queues that are not instrumented.
+        """
+        depth = 0
+        residence_mean = 0.0
+        for i, wrapper in enumerate(self.__manager.get_input_queues()):
+            result, statistics = wrapper.get_statistics()
+            if not result:
+                depth += wrapper.queue.qsize()
+                continue
+
+            depth += statistics.depth
+            previous_residence_total, previous_get_count = self.__previous_residence[i]
+            get_count = statistics.get_count - previous_get_count
+            if get_count > 0:
+                residence_mean = max(
+                    residence_mean,
+                    (statistics.residence_total - previous_residence_total) / get_count,
+                )
+
+            self.__previous_residence[i] = (statistics.residence_total, statistics.get_count)
+
+        return depth, residence_mean
+
+    def update(self, now: float) -> float:
+        """
+        Scales the workers by at most one if the period has passed since the last update.
+
+        now: Current time from time.monotonic() .
+
+        Returns the time in seconds until the next update.
+        """
+        if now < self.__next_update_time:
+            return self.__next_update_time - now
+
+        self.__next_update_time = now + self.__period
+        if self.__last_busy_time is None:
+            self.__last_busy_time = now
+
+        count = self.__manager.get_worker_count()
+        depth, residence_mean = self.__measure()
+        if depth > 0:
+            self.__last_busy_time = now
+
+        is_backed_up = depth > self.__depth_limit * count or residence_mean > self.__residence_limit
+        is_cooled_down = now - self.__last_scale_up_time >= self.__scale_up_cooldown
+        if is_backed_up and is_cooled_down and count < self.__max_count:
+            self.__local_logger.info(
+                f"Scaling up {self.__manager.get_target_name()} to {count + 1} workers, "
+                f"depth: {depth}, residence: {residence_mean:.3f} s",
+                True,
+            )
+            self.__manager.scale_to(count + 1)
+            self.__last_scale_up_time = now
+            self.__last_busy_time = now
+            return self.__period
+
+        is_idle = now - self.__last_busy_time >= self.__scale_down_idle_time
+        if is_idle and count > self.__min_count:
+            self.__local_logger.info(
+                f"Scaling down {self.__manager.get_target_name()} to {count - 1} workers", True
+            )
+            self.__manager.scale_to(count - 1)
+            # Each retirement needs a full idle time
+            self.__last_busy_time = now
+
+        return self.__period
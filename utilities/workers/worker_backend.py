@@ -0,0 +1,235 @@
+"""
+Workers that run in main as threads or asyncio tasks instead of as processes.
+"""
+
+import abc
+import asyncio
+import itertools
+import multiprocessing as mp
+import os
+import threading
+import traceback
+
+from utilities.workers import worker_slot
+
+
+# Backends of WorkerManager
+PROCESS = "process"
+THREAD = "thread"
+ASYNCIO = "asyncio"
+BACKENDS = [PROCESS, THREAD, ASYNCIO]
+
+
+class InProcessWorker(abc.ABC):  # pylint: disable=too-many-instance-attributes
+    """
+    Worker in main with the same interface as mp.Process,
+    so that the worker manager and supervisor handle all backends the same way.
+
+    Workers in main cannot be terminated or killed,
+    so a worker that ignores exit requests keeps running until main exits.
+    Like a process, an exited worker is closed to release its sentinel.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        slot: worker_slot.WorkerSlot,
+        target: "(...) -> object",  # type: ignore
+        args: "tuple",
+    ) -> None:
+        """
+        name: Name of the worker for logging.
+        slot: Liveness slot of the worker.
+        target: Worker function.
+        args: Worker function arguments.
+        """
+        self.name = name
+        self.pid = os.getpid()
+        self.exitcode: int | None = None
+        self._slot = slot
+        self._target = target
+        self._args = args
+
+        # Closing the writer makes the reader ready, like the sentinel of a process
+        self.__sentinel_reader, self.__sentinel_writer = mp.Pipe(False)
+        self.sentinel = self.__sentinel_reader.fileno()
+
+    def _finish(self, exitcode: int) -> None:
+        """
+        Records the exit code and makes the sentinel ready, called when the target returns.
+        """
+        self.exitcode = exitcode
+        self.__sentinel_writer.close()
+
+    @abc.abstractmethod
+    def start(self) -> None:
+        """
+        Starts the worker.
+        """
+
+    @abc.abstractmethod
+    def join(self, timeout: float | None = None) -> None:
+        """
+        Waits for the worker to exit.
+
+        timeout: Time waiting in seconds, None waits forever.
+        """
+
+    @abc.abstractmethod
+    def is_alive(self) -> bool:
+        """
+        Returns whether the worker has been started and has not exited.
+        """
+
+    def close(self) -> None:
+        """
+        Releases the sentinel, once the worker has exited.
+
+        Raises ValueError if the worker is still running, like a process.
+        """
+        if self.is_alive():
+            raise ValueError("Cannot close a worker that is still running")
+
+        self.__sentinel_writer.close()
+        self.__sentinel_reader.close()
+
+    def terminate(self) -> None:
+        """
+        Does nothing, workers in main cannot be stopped from outside.
+        """
+
+    def kill(self) -> None:
+        """
+        Does nothing, workers in main cannot be stopped from outside.
+        """
+
+
+class ThreadWorker(InProcessWorker):
+    """
+    Runs a worker in a daemon thread of main.
+    """
+
+    __counter = itertools.count(1)
+
+    def __init__(
+        self,
+        slot: worker_slot.WorkerSlot,
+        target: "(...) -> object",  # type: ignore
+        args: "tuple",
+    ) -> None:
+        """
+        slot: Liveness slot of the worker.
+        target: Worker function.
+        args: Worker function arguments.
+        """
+        super().__init__(f"ThreadWorker-{next(ThreadWorker.__counter)}", slot, target, args)
+        self.__thread = threading.Thread(target=self.__run, name=self.name, daemon=True)
+
+    def __run(self) -> None:
+        """
+        Thread running the worker.
+        """
+        worker_slot.WorkerSlot.set_current(self._slot)
+        exitcode = 1
+        try:
+            self._target(*self._args)
+            exitcode = 0
+        # Same as an uncaught exception in a process
+        # pylint: disable-next=broad-exception-caught
+        except Exception:
+            traceback.print_exc()
+        finally:
+            self._finish(exitcode)
+
+    def start(self) -> None:
+        """
+        Starts the thread.
+        """
+        self.__thread.start()
+
+    def join(self, timeout: float | None = None) -> None:
+        """
+        Waits for the thread to exit.
+
+        timeout: Time waiting in seconds, None waits forever.
+        """
+        self.__thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self.__thread.is_alive() and self.exitcode is None
+
+
+class AsyncioWorker(InProcessWorker):
+    """
+    Runs an async worker as a task on an event loop in a thread of main,
+    which is shared by all asyncio workers. A worker that blocks stalls all of them.
+    """
+
+    __counter = itertools.count(1)
+    __loop: asyncio.AbstractEventLoop | None = None
+    __loop_lock = threading.Lock()
+
+    def __init__(
+        self,
+        slot: worker_slot.WorkerSlot,
+        target: "(...) -> object",  # type: ignore
+        args: "tuple",
+    ) -> None:
+        """
+        slot: Liveness slot of the worker.
+        target: Async worker function.
+        args: Worker function arguments.
+        """
+        super().__init__(f"AsyncioWorker-{next(AsyncioWorker.__counter)}", slot, target, args)
+        self.__is_started = False
+        self.__done = threading.Event()
+
+    @classmethod
+    def __get_loop(cls) -> asyncio.AbstractEventLoop:
+        """
+        Returns the shared event loop, starting it on first use.
+        """
+        with cls.__loop_lock:
+            if cls.__loop is None:
+                cls.__loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=cls.__loop.run_forever, name="AsyncioWorkers", daemon=True
+                ).start()
+
+            return cls.__loop
+
+    async def __run(self) -> None:
+        """
+        Task running the worker, which has its own copy of the context.
+        """
+        worker_slot.WorkerSlot.set_current(self._slot)
+        exitcode = 1
+        try:
+            await self._target(*self._args)
+            exitcode = 0
+        # Same as an uncaught exception in a process
+        # pylint: disable-next=broad-exception-caught
+        except Exception:
+            traceback.print_exc()
+        finally:
+            self._finish(exitcode)
+            self.__done.set()
+
+    def start(self) -> None:
+        """
+        Schedules the task on the shared event loop.
+        """
+        self.__is_started = True
+        asyncio.run_coroutine_threadsafe(self.__run(), AsyncioWorker.__get_loop())
+
+    def join(self, timeout: float | None = None) -> None:
+        """
+        Waits for the task to finish.
+
+        timeout: Time waiting in seconds, None waits forever.
+        """
+        if self.__is_started:
+            self.__done.wait(timeout)
+
+    def is_alive(self) -> bool:
+        return self.__is_started and not self.__done.is_set()
@@ -0,0 +1,47 @@
+"""
+Start methods of worker processes.
+"""
+
+import multiprocessing as mp
+
+from modules.common.modules.logger import logger
+
+
+# Modules imported by every worker, imported once by the forkserver instead of by every worker
+PRELOAD_MODULES = [
+    "pymavlink.mavutil",
+    "modules.common.modules.logger.logger",
+]
+
+# Workers are restarted from a thread, which must not fork, and forkserver is not on every platform
+DEFAULT_START_METHOD = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+
+
+def set_start_method(
+    start_method: str,
+    local_logger: logger.Logger,
+    preload_modules: "list[str] | None" = None,
+) -> "tuple[True, mp.context.BaseContext] | tuple[False, None]":
+    """
+    Sets the start method of all processes created afterwards, call before creating
+    any controllers, queues or managers so that they can be shared with the workers.
+
+    start_method: "fork" to copy main, which is the fastest but also copies its threads' locks,
+        "forkserver" to fork from a server process with the preloaded modules already imported,
+        "spawn" to start a fresh interpreter that imports everything again.
+    local_logger: Existing logger from process.
+    preload_modules: Modules for the forkserver to import, PRELOAD_MODULES if None.
+
+    Returns the context, which can be passed to WorkerManager.create() .
+    """
+    if start_method not in mp.get_all_start_methods():
+        local_logger.error(f"Start method not supported on this platform: {start_method}", True)
+        return False, None
+
+    if start_method == "forkserver":
+        mp.set_forkserver_preload(PRELOAD_MODULES if preload_modules is None else preload_modules)
+
+    # Replaces any start method already set
+    mp.set_start_method(start_method, True)
+
+    return True, mp.get_context(start_method)
@@ -2,71 +2,171 @@
 For controlling workers.
 """
 
+import asyncio
+import ctypes
 import multiprocessing as mp
 import time
 
+from utilities.workers import queue_notifier
+from utilities.workers import worker_slot
+
 
 class WorkerController:
     """
     For interprocess communication from main to worker.
     Contains exit and pause requests.
+
+    Requests are bits of a flag word in shared memory, so checking them is a plain memory read.
+    Events are only used to block while paused and to sleep until exit,
+    and added notifiers wake workers waiting on queues, see add_notifier() .
+    Asyncio workers cannot block on events, so the async methods poll the flag word instead.
     """
 
-    __QUEUE_DELAY = 0.1  # seconds
+    __EXIT = 0x1
+    __PAUSE = 0x2
+
+    __ASYNC_POLL_PERIOD = 0.05  # seconds
 
     def __init__(self) -> None:
         """
-        Constructor creates internal queue and semaphore.
+        Constructor creates internal flag word and events.
+        """
+        self.__flags = mp.RawValue(ctypes.c_uint32, 0)
+        # Serializes writes to the flag word, reads do not need it
+        self.__lock = mp.Lock()
+        # Set while not paused or once exit is requested
+        self.__resume = mp.Event()
+        self.__resume.set()
+        self.__exit = mp.Event()
+        self.__notifiers: "list[queue_notifier.QueueNotifier]" = []
+
+    def add_notifier(self, notifier: queue_notifier.QueueNotifier) -> None:
         """
-        self.__pause = mp.BoundedSemaphore(1)
-        self.__is_paused = False
-        self.__exit_queue = mp.Queue(1)
+        Notifies on every request, so that workers waiting on the queues sharing the notifier
+        notice requests right away. Call before the workers are started.
+
+        notifier: Notifier of queues that workers wait on.
+        """
+        self.__notifiers.append(notifier)
+
+    def is_notifying(self, notifier: queue_notifier.QueueNotifier) -> bool:
+        """
+        Returns whether requests notify the notifier.
+        """
+        return any(added is notifier for added in self.__notifiers)
+
+    def wake(self) -> None:
+        """
+        Wakes workers waiting on the added notifiers, such as after retiring one of them.
+        """
+        for notifier in self.__notifiers:
+            notifier.notify()
 
     def request_pause(self) -> None:
         """
         Requests worker processes to pause.
         """
-        if not self.__is_paused:
-            self.__pause.acquire()
-            self.__is_paused = True
+        with self.__lock:
+            self.__flags.value |= self.__PAUSE
+            if not self.__flags.value & self.__EXIT:
+                self.__resume.clear()
+
+        self.wake()
 
     def request_resume(self) -> None:
         """
         Requests worker processes to resume.
         """
-        if self.__is_paused:
-            self.__pause.release()
-            self.__is_paused = False
+        with self.__lock:
+            self.__flags.value &= ~self.__PAUSE
+            self.__resume.set()
 
     def check_pause(self) -> None:
         """
         Blocks worker if main has requested it to pause, otherwise continues.
+        Returns early if exit is requested while paused.
+
+        Also signals main that the worker is not hung, so call this every loop iteration.
+        """
+        worker_slot.WorkerSlot.bump_current()
+        if self.__flags.value & self.__PAUSE:
+            self.__resume.wait()
+
+    def is_pause_requested(self) -> bool:
         """
-        self.__pause.acquire()
-        self.__pause.release()
+        Returns whether main has requested the worker processes to pause.
+        """
+        return bool(self.__flags.value & self.__PAUSE)
 
     def request_exit(self) -> None:
         """
         Requests worker processes to exit.
         Does nothing if already requested.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if self.__exit_queue.empty():
-            self.__exit_queue.put(None)
+        with self.__lock:
+            self.__flags.value |= self.__EXIT
+            self.__exit.set()
+            # Paused workers must be able to exit
+            self.__resume.set()
+
+        self.wake()
 
     def clear_exit(self) -> None:
         """
         Clears the exit request condition.
         Does nothing if already cleared.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if not self.__exit_queue.empty():
-            _ = self.__exit_queue.get()
+        with self.__lock:
+            self.__flags.value &= ~self.__EXIT
+            self.__exit.clear()
+            if self.__flags.value & self.__PAUSE:
+                self.__resume.clear()
 
     def is_exit_requested(self) -> bool:
         """
-        Returns whether main has requested the worker process to exit.
-        There is a race condition, but it's fine because the worker process
-        will do at most 1 additional loop.
+        Returns whether main has requested the worker process to exit,
+        either all workers or only the worker running in this process.
+        """
+        return (
+            bool(self.__flags.value & self.__EXIT) or worker_slot.WorkerSlot.is_current_retiring()
+        )
+
+    def wait_for_exit(self, timeout: float | None = None) -> bool:
+        """
+        Sleeps until exit is requested, use instead of time.sleep() so that exit is not delayed.
+        A retire request of only this worker is noticed once the timeout expires.
+
+        timeout: Time waiting in seconds, None waits forever.
+
+        Returns whether exit is requested.
+        """
+        return self.__exit.wait(timeout)
+
+    async def async_check_pause(self) -> None:
         """
-        return not self.__exit_queue.empty()
+        Same as check_pause() for asyncio workers, other workers keep running while paused.
+        """
+        worker_slot.WorkerSlot.bump_current()
+        while self.__flags.value & self.__PAUSE and not self.__flags.value & self.__EXIT:
+            await asyncio.sleep(self.__ASYNC_POLL_PERIOD)
+
+    async def async_wait_for_exit(self, timeout: float | None = None) -> bool:
+        """
+        Same as wait_for_exit() for asyncio workers, other workers keep running while waiting.
+        Exit is noticed within the poll period.
+
+        timeout: Time waiting in seconds, None waits forever.
+
+        Returns whether exit is requested.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.is_exit_requested():
+            remaining = self.__ASYNC_POLL_PERIOD
+            if deadline is not None:
+                remaining = min(deadline - time.monotonic(), self.__ASYNC_POLL_PERIOD)
+                if remaining <= 0.0:
+                    return False
+
+            await asyncio.sleep(remaining)
+
+        return True
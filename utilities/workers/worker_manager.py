@@ -2,14 +2,22 @@
 For managing workers.
 """
 
+import asyncio
+import faulthandler
 import multiprocessing as mp
+import multiprocessing.context
+import os
+import time
 
 from modules.common.modules.logger import logger
 from utilities.workers import worker_controller
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import runtime_profile
+from utilities.workers import worker_backend
+from utilities.workers import worker_slot
 
 
-class WorkerProperties:
+class WorkerProperties:  # pylint: disable=too-many-instance-attributes
     """
     Worker Properties.
     """
@@ -26,6 +34,9 @@ class WorkerProperties:
         output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         controller: worker_controller.WorkerController,
         local_logger: logger.Logger,
+        liveness_timeout: float = 0.0,
+        kill_hung_workers: bool = False,
+        profile: runtime_profile.RuntimeProfile | None = None,
     ) -> "tuple[bool, WorkerProperties | None]":
         """
         Creates worker properties.
@@ -37,6 +48,11 @@ class WorkerProperties:
         output_queues: Output queues.
         controller: Worker controller.
         local_logger: Existing logger from process.
+        liveness_timeout: Time in seconds without a loop iteration after which a worker is hung,
+            0 disables the check.
+        kill_hung_workers: Whether to kill hung workers so that they can be restarted.
+        profile: Scheduling and garbage collection settings of the workers,
+            None to keep the settings of main.
 
         Returns the WorkerProperties object.
         """
@@ -47,6 +63,10 @@ class WorkerProperties:
             )
             return False, None
 
+        if liveness_timeout < 0.0:
+            local_logger.error(f"Liveness timeout is negative: {liveness_timeout}", True)
+            return False, None
+
         return True, WorkerProperties(
             cls.__create_key,
             count,
@@ -55,6 +75,9 @@ class WorkerProperties:
             input_queues,
             output_queues,
             controller,
+            liveness_timeout,
+            kill_hung_workers,
+            profile,
         )
 
     def __init__(
@@ -66,6 +89,9 @@ class WorkerProperties:
         input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         controller: worker_controller.WorkerController,
+        liveness_timeout: float,
+        kill_hung_workers: bool,
+        profile: runtime_profile.RuntimeProfile | None,
     ) -> None:
         """
         Private constructor, use create() method.
@@ -78,6 +104,9 @@ class WorkerProperties:
         self.__input_queues = input_queues
         self.__output_queues = output_queues
         self.__controller = controller
+        self.__liveness_timeout = liveness_timeout
+        self.__kill_hung_workers = kill_hung_workers
+        self.__profile = profile
 
     def get_worker_arguments(self) -> "tuple":
         """
@@ -116,8 +145,32 @@ class WorkerProperties:
         """
         return self.__target.__name__
 
+    def get_controller(self) -> worker_controller.WorkerController:
+        """
+        Returns the worker controller.
+        """
+        return self.__controller
+
+    def get_liveness_timeout(self) -> float:
+        """
+        Returns the liveness timeout in seconds, 0 if disabled.
+        """
+        return self.__liveness_timeout
+
+    def is_kill_hung_workers(self) -> bool:
+        """
+        Returns whether hung workers are killed.
+        """
+        return self.__kill_hung_workers
+
+    def get_runtime_profile(self) -> runtime_profile.RuntimeProfile | None:
+        """
+        Returns the runtime profile, None if there is none.
+        """
+        return self.__profile
+
 
-class WorkerManager:
+class WorkerManager:  # pylint: disable=too-many-instance-attributes
     """
     For interprocess communication from main to worker.
     Contains exit and pause requests.
@@ -125,23 +178,62 @@ class WorkerManager:
 
     __create_key = object()
 
+    __ESCALATION_TIMEOUT = 0.1  # seconds
+    # Time for a hung worker to write its stacks before it is killed
+    __STACK_DUMP_DELAY = 0.05  # seconds
+
     @classmethod
     def create(
         cls,
         worker_properties: WorkerProperties,
         local_logger: logger.Logger,
+        context: multiprocessing.context.BaseContext | None = None,
+        backend: str = worker_backend.PROCESS,
     ) -> "tuple[bool, WorkerManager | None]":
         """
         Create identical workers and append them to a workers list.
 
         worker_properties: Worker properties.
         local_logger: Existing logger from process.
+        context: Context with the start method of the workers, None for the default.
+            See worker_context.set_start_method() .
+        backend: "process" to run each worker in its own process,
+            "thread" to run each worker in a thread of main,
+            "asyncio" to run async workers as tasks on an event loop shared in main.
+            Workers in main can use queue_proxy_wrapper.LocalQueueWrapper to skip serialization.
 
         Returns whether the workers were able to be created and the Worker Manager.
         """
+        if context is None:
+            context = mp.get_context()
+
+        if backend not in worker_backend.BACKENDS:
+            local_logger.error(f"Unknown worker backend: {backend}", True)
+            return False, None
+
+        is_profiled = worker_properties.get_runtime_profile() is not None
+        if backend != worker_backend.PROCESS and is_profiled:
+            local_logger.error("Runtime profiles only apply to worker processes", True)
+            return False, None
+
+        is_async_target = asyncio.iscoroutinefunction(worker_properties.get_worker_target())
+        if is_async_target != (backend == worker_backend.ASYNCIO):
+            local_logger.error(
+                f"{worker_properties.get_target_name()} cannot run with the {backend} backend, "
+                "async workers require the asyncio backend and the others cannot use it",
+                True,
+            )
+            return False, None
+
         workers = []
+        slots = []
         for _ in range(0, worker_properties.get_worker_count()):
+            slot = worker_slot.WorkerSlot()
             result, worker = WorkerManager.__create_single_worker(
+                backend,
+                context,
+                slot,
+                worker_properties.get_runtime_profile(),
                 worker_properties.get_worker_target(),
                 worker_properties.get_worker_arguments(),
                 local_logger,
@@ -151,20 +243,27 @@ class WorkerManager:
                 return False, None
 
             workers.append(worker)
+            slots.append(slot)
 
         return True, WorkerManager(
             cls.__create_key,
             workers,
+            slots,
             worker_properties,
             local_logger,
+            context,
+            backend,
         )
 
     def __init__(
         self,
         class_private_create_key: object,
         workers: "list[mp.Process]",
+        slots: "list[worker_slot.WorkerSlot]",
         worker_properties: WorkerProperties,
         local_logger: logger.Logger,
+        context: multiprocessing.context.BaseContext,
+        backend: str,
     ) -> None:
         """
         Private constructor, use create() method.
@@ -172,14 +271,26 @@ class WorkerManager:
         assert class_private_create_key is WorkerManager.__create_key, "Use create() method"
 
         self.__workers = workers
+        self.__slots = slots
         self.__worker_properties = worker_properties
         self.__local_logger = local_logger
+        self.__context = context
+        self.__backend = backend
+        # Workers removed by scaling down that have not exited yet
+        self.__retiring_workers: "list[mp.Process]" = []
+
+        # Last liveness counter of each worker and when it was seen to change
+        self.__liveness_seen = [(0, time.monotonic()) for _ in workers]
 
     @staticmethod
-    def __create_single_worker(target: "(...) -> object", args: "tuple", local_logger: logger.Logger) -> "tuple[bool, mp.Process | None]":  # type: ignore
+    def __create_single_worker(backend: str, context: multiprocessing.context.BaseContext, slot: worker_slot.WorkerSlot, profile: runtime_profile.RuntimeProfile | None, target: "(...) -> object", args: "tuple", local_logger: logger.Logger) -> "tuple[bool, mp.Process | None]":  # type: ignore
         """
         Creates a single worker.
 
+        backend: Backend running the worker.
+        context: Context with the start method of the worker.
+        slot: Liveness slot of the worker.
+        profile: Runtime profile of the worker.
         target: Function.
         args: Target function arguments.
         local_logger: Existing logger from process.
@@ -187,7 +298,14 @@ class WorkerManager:
         Returns whether a worker was created and the worker.
         """
         try:
-            worker = mp.Process(target=target, args=args)
+            if backend == worker_backend.THREAD:
+                worker = worker_backend.ThreadWorker(slot, target, args)
+            elif backend == worker_backend.ASYNCIO:
+                worker = worker_backend.AsyncioWorker(slot, target, args)
+            else:
+                worker = context.Process(
+                    target=worker_slot.worker_entry, args=(slot, profile, target) + args
+                )
         # Catching all exceptions for library call
         # pylint: disable-next=broad-exception-caught
         except Exception as e:
@@ -196,6 +314,12 @@ class WorkerManager:
 
         return True, worker
 
+    def __get_worker_name(self, worker: mp.Process) -> str:
+        """
+        Returns the target and worker names for logging.
+        """
+        return f"{self.__worker_properties.get_target_name()} {worker.name}"
+
     def start_workers(self) -> None:
         """
         Start workers.
@@ -203,12 +327,94 @@ class WorkerManager:
         for worker in self.__workers:
             worker.start()
 
-    def join_workers(self) -> None:
+        self.__liveness_seen = [(slot.get_liveness(), time.monotonic()) for slot in self.__slots]
+
+    def join_workers(self, timeout: float | None = None) -> bool:
         """
-        Join workers.
+        Join workers, escalating to terminate and then kill for workers that do not exit in time.
+
+        timeout: Time waiting in seconds for all workers to exit on their own,
+            None waits forever.
+
+        Returns whether all workers exited on their own.
         """
-        for worker in self.__workers:
-            worker.join()
+        all_workers = self.__workers + self.__retiring_workers
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in all_workers:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            worker.join(remaining)
+
+        stuck_workers = [worker for worker in all_workers if worker.is_alive()]
+        if len(stuck_workers) == 0:
+            return True
+
+        # SIGTERM first, then SIGKILL for workers that ignore it
+        for worker in stuck_workers:
+            self.__local_logger.warning(
+                f"Worker did not exit in time, terminating {self.__get_worker_name(worker)}", True
+            )
+            worker.terminate()
+
+        for worker in stuck_workers:
+            worker.join(self.__ESCALATION_TIMEOUT)
+            if not worker.is_alive():
+                continue
+
+            self.__local_logger.warning(
+                f"Worker did not terminate, killing {self.__get_worker_name(worker)}", True
+            )
+            worker.kill()
+            worker.join(self.__ESCALATION_TIMEOUT)
+            if worker.is_alive():
+                self.__local_logger.error(f"Failed to stop {self.__get_worker_name(worker)}", True)
+
+        return False
+
+    def get_target_name(self) -> str:
+        """
+        Returns the name of the target of the workers.
+        """
+        return self.__worker_properties.get_target_name()
+
+    def get_worker_count(self) -> int:
+        """
+        Returns the number of workers, not counting retiring workers.
+        """
+        return len(self.__workers)
+
+    def get_input_queues(self) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":
+        """
+        Returns the input queues of the workers.
+        """
+        return self.__worker_properties.get_input_queues()
+
+    def get_liveness_timeout(self) -> float:
+        """
+        Returns the liveness timeout of the workers in seconds, 0 if disabled.
+        """
+        return self.__worker_properties.get_liveness_timeout()
+
+    def get_start_method(self) -> str | None:
+        """
+        Returns the start method of the worker processes, None for workers in main.
+        """
+        if self.__backend != worker_backend.PROCESS:
+            return None
+
+        return self.__context.get_start_method()
+
+    def get_alive_sentinels(self) -> "list[int]":
+        """
+        Returns the sentinels of the alive workers, which become ready when the worker exits.
+        See multiprocessing.connection.wait() .
+        """
+        return [worker.sentinel for worker in self.__workers if worker.is_alive()]
+
+    def get_dead_worker_count(self) -> int:
+        """
+        Returns the number of started workers that have exited.
+        """
+        return sum(1 for worker in self.__workers if worker.exitcode is not None)
 
     def check_and_restart_dead_workers(self) -> bool:
         """
@@ -216,32 +422,172 @@ class WorkerManager:
 
         Returns whether the dead workers were able to be restarted.
         """
+        is_restarted = True
         new_workers = []
-        for worker in self.__workers:
+        new_slots = []
+        new_liveness_seen = []
+        for worker, slot, seen in zip(self.__workers, self.__slots, self.__liveness_seen):
             if worker.is_alive():
                 new_workers.append(worker)
+                new_slots.append(slot)
+                new_liveness_seen.append(seen)
                 continue
 
             # Log dead worker
-            target_and_worker_name = f"{self.__worker_properties.get_target_name()} {worker.name}"
+            target_and_worker_name = self.__get_worker_name(worker)
             self.__local_logger.warning(
-                f"Worker died, restarting {target_and_worker_name}",
+                f"Worker died with exit code {worker.exitcode}, restarting {target_and_worker_name}",
                 True,
             )
 
             # Create a new worker
+            new_slot = worker_slot.WorkerSlot()
             result, new_worker = WorkerManager.__create_single_worker(
+                self.__backend,
+                self.__context,
+                new_slot,
+                self.__worker_properties.get_runtime_profile(),
                 self.__worker_properties.get_worker_target(),
                 self.__worker_properties.get_worker_arguments(),
                 self.__local_logger,
             )
             if not result:
                 self.__local_logger.error(f"Failed to restart {target_and_worker_name}", True)
-                return False
+                # Keep the dead worker so that restarting can be tried again
+                new_workers.append(worker)
+                new_slots.append(slot)
+                new_liveness_seen.append(seen)
+                is_restarted = False
+                continue
 
-            # Append the new worker
+            # Release the dead worker, then start and append the new worker
+            worker.close()
+            new_worker.start()
             new_workers.append(new_worker)
+            new_slots.append(new_slot)
+            # Restarted workers get a fresh liveness timeout
+            new_liveness_seen.append((0, time.monotonic()))
 
         self.__workers = new_workers
+        self.__slots = new_slots
+        self.__liveness_seen = new_liveness_seen
+
+        return is_restarted
+
+    def check_hung_workers(self) -> int:
+        """
+        Check for workers that are alive but have not run a loop iteration within the liveness
+        timeout. Hung workers dump their stacks to stderr and are killed if configured,
+        so that they are restarted. Paused workers are never hung.
+
+        Returns the number of hung workers found.
+        """
+        liveness_timeout = self.__worker_properties.get_liveness_timeout()
+        if liveness_timeout <= 0.0:
+            return 0
+
+        now = time.monotonic()
+        controller = self.__worker_properties.get_controller()
+        is_waiting = controller.is_pause_requested() or controller.is_exit_requested()
+
+        hung_count = 0
+        for i, (worker, slot) in enumerate(zip(self.__workers, self.__slots)):
+            liveness = slot.get_liveness()
+            last_liveness, last_seen = self.__liveness_seen[i]
+            if liveness != last_liveness or is_waiting or not worker.is_alive():
+                self.__liveness_seen[i] = (liveness, now)
+                continue
+
+            if now - last_seen <= liveness_timeout:
+                continue
+
+            hung_count += 1
+            # Reset so that a hung worker is reported once per timeout
+            self.__liveness_seen[i] = (liveness, now)
+            self.__local_logger.warning(
+                f"Worker hung for {now - last_seen:.3f} s, {self.__get_worker_name(worker)}",
+                True,
+            )
+
+            if self.__backend != worker_backend.PROCESS:
+                # Workers in main cannot be killed, and their stacks are among those of main
+                faulthandler.dump_traceback(all_threads=True)
+                continue
+
+            if worker_slot.STACK_DUMP_SIGNAL is not None:
+                try:
+                    os.kill(worker.pid, worker_slot.STACK_DUMP_SIGNAL)
+                except ProcessLookupError:
+                    continue
+
+            if self.__worker_properties.is_kill_hung_workers():
+                if worker_slot.STACK_DUMP_SIGNAL is not None:
+                    time.sleep(self.__STACK_DUMP_DELAY)
+
+                self.__local_logger.warning(
+                    f"Killing hung worker {self.__get_worker_name(worker)}", True
+                )
+                worker.kill()
+
+        return hung_count
+
+    def scale_to(self, count: int) -> bool:
+        """
+        Starts new workers or retires the newest workers until there are the requested number.
+        Retired workers exit at the end of their current loop iteration,
+        leaving the items in their input queues to the other workers.
+
+        count: Number of workers, at least 1.
+
+        Returns whether the requested number of workers is running.
+        """
+        if count < 1:
+            self.__local_logger.error(f"Cannot scale to less than 1 worker: {count}", True)
+            return False
+
+        # Checking if alive also reaps the retired workers that have exited
+        retiring_workers = []
+        for worker in self.__retiring_workers:
+            if worker.is_alive():
+                retiring_workers.append(worker)
+            else:
+                worker.close()
+
+        self.__retiring_workers = retiring_workers
+
+        is_retiring = len(self.__workers) > count
+        while len(self.__workers) > count:
+            worker = self.__workers.pop()
+            self.__slots.pop().retire()
+            self.__liveness_seen.pop()
+            self.__retiring_workers.append(worker)
+            self.__local_logger.info(f"Retiring {self.__get_worker_name(worker)}", True)
+
+        # Retiring workers waiting on a queue notice it right away
+        if is_retiring:
+            self.__worker_properties.get_controller().wake()
+
+        while len(self.__workers) < count:
+            slot = worker_slot.WorkerSlot()
+            result, worker = WorkerManager.__create_single_worker(
+                self.__backend,
+                self.__context,
+                slot,
+                self.__worker_properties.get_runtime_profile(),
+                self.__worker_properties.get_worker_target(),
+                self.__worker_properties.get_worker_arguments(),
+                self.__local_logger,
+            )
+            if not result:
+                self.__local_logger.error(
+                    f"Failed to add a worker to {self.get_target_name()}", True
+                )
+                return False
+
+            worker.start()
+            self.__workers.append(worker)
+            self.__slots.append(slot)
+            self.__liveness_seen.append((0, time.monotonic()))
+            self.__local_logger.info(f"Added {self.__get_worker_name(worker)}", True)
 
         return True
@@ -0,0 +1,124 @@
+"""
+Per worker state shared between main and the worker.
+"""
+
+import contextvars
+import ctypes
+import faulthandler
+import multiprocessing as mp
+import signal
+
+from utilities.workers import runtime_profile
+
+
+# Signal that makes a worker dump the stacks of all its threads to stderr, None if unsupported
+STACK_DUMP_SIGNAL = getattr(signal, "SIGUSR1", None)
+
+
+class WorkerSlot:
+    """
+    Liveness counter of a single worker, bumped by the worker every loop iteration
+    so that main can tell a hung worker from a busy one.
+    Also holds the retire request of the worker, for removing a single worker.
+
+    The current slot is a context variable, so that thread and asyncio workers
+    sharing a process each have their own.
+    """
+
+    # Slot of the worker running in this thread or task, None in main
+    __current: "contextvars.ContextVar[WorkerSlot | None]" = contextvars.ContextVar(
+        "current_worker_slot", default=None
+    )
+    # Runtime profile of the worker process until its first loop iteration
+    __initializing_profile = None
+
+    def __init__(self) -> None:
+        # Only written by the worker, so no lock is required
+        self.__liveness = mp.RawValue(ctypes.c_uint64, 0)
+        # Only written by main
+        self.__retire = mp.RawValue(ctypes.c_bool, False)
+
+    @classmethod
+    def bump_current(cls) -> None:
+        """
+        Bumps the liveness counter of the worker running in this thread or task.
+        Does nothing in main.
+        """
+        slot = cls.__current.get()
+        if slot is None:
+            return
+
+        if cls.__initializing_profile is not None:
+            profile = cls.__initializing_profile
+            cls.__initializing_profile = None
+            profile.finish_init()
+
+        slot.bump()
+
+    @classmethod
+    def is_current_retiring(cls) -> bool:
+        """
+        Returns whether the worker running in this thread or task has been requested to retire.
+        Always false in main.
+        """
+        slot = cls.__current.get()
+        return slot is not None and slot.is_retiring()
+
+    @classmethod
+    def set_current(
+        cls, slot: "WorkerSlot", profile: runtime_profile.RuntimeProfile | None = None
+    ) -> None:
+        """
+        Sets the slot of the worker running in this thread or task.
+
+        slot: Slot of the worker.
+        profile: Runtime profile of the worker process to finish on the first loop iteration,
+            None if there is none.
+        """
+        cls.__current.set(slot)
+        cls.__initializing_profile = profile
+
+    def bump(self) -> None:
+        """
+        Bumps the liveness counter.
+        """
+        self.__liveness.value += 1
+
+    def get_liveness(self) -> int:
+        """
+        Returns the liveness counter.
+        """
+        return self.__liveness.value
+
+    def retire(self) -> None:
+        """
+        Requests the worker to exit as if exit was requested, without affecting other workers.
+        """
+        self.__retire.value = True
+
+    def is_retiring(self) -> bool:
+        """
+        Returns whether the worker has been requested to retire.
+        """
+        return self.__retire.value
+
+
+def worker_entry(slot: WorkerSlot, profile: runtime_profile.RuntimeProfile | None, target: "(...) -> object", *args: object) -> None:  # type: ignore
+    """
+    Entry point of worker processes, sets up the slot and runtime profile and then runs the target.
+
+    slot: Slot of this worker.
+    profile: Runtime profile of this worker, None to keep the settings of main.
+    target: Worker function.
+    args: Worker function arguments.
+    """
+    WorkerSlot.set_current(slot, profile)
+
+    if STACK_DUMP_SIGNAL is not None:
+        faulthandler.register(STACK_DUMP_SIGNAL, all_threads=True)
+
+    # No logger exists yet, workers run with the settings of main instead
+    if profile is not None and not profile.apply():
+        print(f"WARNING: Worker failed to apply runtime profile: {profile}")
+
+    target(*args)
@@ -0,0 +1,307 @@
+"""
+For restarting workers that die.
+"""
+
+import multiprocessing as mp
+import multiprocessing.connection
+import threading
+import time
+
+from modules.common.modules.logger import logger
+from utilities.workers import worker_autoscaler
+from utilities.workers import worker_controller
+from utilities.workers import worker_manager
+
+
+class RestartStatistics:
+    """
+    Snapshot of the restarts of a worker manager. Times are in seconds.
+    Downtime is from noticing a dead worker to starting its replacement.
+    """
+
+    def __init__(
+        self,
+        restart_count: int,
+        downtime_total: float,
+        downtime_max: float,
+        is_crash_looping: bool,
+        hang_count: int = 0,
+    ) -> None:
+        self.restart_count = restart_count
+        self.downtime_total = downtime_total
+        self.downtime_max = downtime_max
+        self.is_crash_looping = is_crash_looping
+        self.hang_count = hang_count
+
+    def __str__(self) -> str:
+        return (
+            f"restarts: {self.restart_count}, "
+            f"downtime: {self.downtime_total:.3f} s (max {self.downtime_max:.3f} s), "
+            f"crash looping: {self.is_crash_looping}, "
+            f"hangs: {self.hang_count}"
+        )
+
+
+class _ManagerState:
+    """
+    Restart bookkeeping of a worker manager, only used by the supervisor thread.
+    """
+
+    def __init__(self, manager: worker_manager.WorkerManager) -> None:
+        self.manager = manager
+        self.restart_times: "list[float]" = []
+        # Time a dead worker was noticed, None if all workers are alive
+        self.dead_since: float | None = None
+        self.next_restart_time = 0.0
+        self.statistics = RestartStatistics(0, 0.0, 0.0, False)
+
+
+class WorkerSupervisor:  # pylint: disable=too-many-instance-attributes
+    """
+    Restarts dead workers from a thread in main, without involving the main loop.
+
+    Waits on the process sentinels of all workers, so a death is noticed immediately.
+    Worker processes must not be started with fork, since forking from the thread copies the locks
+    held by other threads of main, such as a logging handler's, into the child.
+    Restarts are delayed with exponential backoff, and a worker manager whose workers
+    keep dying is given up on once it reaches the crash loop limit.
+    Workers with a liveness timeout are also checked for hangs every watchdog period,
+    and autoscalers are run from the same thread.
+    """
+
+    __create_key = object()
+
+    __WATCHDOG_PERIOD = 0.1  # seconds
+
+    @classmethod
+    def create(
+        cls,
+        managers: "list[worker_manager.WorkerManager]",
+        local_logger: logger.Logger,
+        controller: worker_controller.WorkerController | None = None,
+        backoff_initial: float = 0.01,
+        backoff_max: float = 1.0,
+        crash_loop_limit: int = 5,
+        crash_loop_window: float = 10.0,
+        autoscalers: "list[worker_autoscaler.WorkerAutoscaler] | None" = None,
+    ) -> "tuple[True, WorkerSupervisor] | tuple[False, None]":
+        """
+        Creates a supervisor, call start() once the workers have been started.
+        Fails if any worker processes are started with fork.
+
+        managers: Worker managers to supervise.
+        local_logger: Existing logger from process.
+        controller: Worker controller, no workers are restarted once exit is requested.
+        backoff_initial: Delay in seconds before the first restart, doubled for every recent restart.
+        backoff_max: Maximum delay in seconds before a restart.
+        crash_loop_limit: Number of restarts within the window after which restarting stops.
+        crash_loop_window: Window in seconds for counting recent restarts.
+        autoscalers: Autoscalers of supervised worker managers.
+
+        Returns the WorkerSupervisor object.
+        """
+        if len(managers) == 0:
+            local_logger.error("No worker managers to supervise", True)
+            return False, None
+
+        if backoff_initial < 0.0 or backoff_max < backoff_initial:
+            local_logger.error(
+                f"Invalid backoff, initial: {backoff_initial}, maximum: {backoff_max}", True
+            )
+            return False, None
+
+        if crash_loop_limit <= 0 or crash_loop_window <= 0.0:
+            local_logger.error(
+                f"Invalid crash loop limit: {crash_loop_limit} in {crash_loop_window} s", True
+            )
+            return False, None
+
+        for manager in managers:
+            if manager.get_start_method() == "fork":
+                local_logger.error(
+                    f"Workers of {manager.get_target_name()} are started with fork, "
+                    "which cannot be done from the supervisor thread, use forkserver or spawn",
+                    True,
+                )
+                return False, None
+
+        if autoscalers is None:
+            autoscalers = []
+
+        for autoscaler in autoscalers:
+            if autoscaler.get_manager() not in managers:
+                local_logger.error(
+                    f"Autoscaled workers of {autoscaler.get_manager().get_target_name()} "
+                    "are not supervised",
+                    True,
+                )
+                return False, None
+
+        return True, WorkerSupervisor(
+            cls.__create_key,
+            managers,
+            local_logger,
+            controller,
+            backoff_initial,
+            backoff_max,
+            crash_loop_limit,
+            crash_loop_window,
+            autoscalers,
+        )
+
+    def __init__(
+        self,
+        class_private_create_key: object,
+        managers: "list[worker_manager.WorkerManager]",
+        local_logger: logger.Logger,
+        controller: worker_controller.WorkerController | None,
+        backoff_initial: float,
+        backoff_max: float,
+        crash_loop_limit: int,
+        crash_loop_window: float,
+        autoscalers: "list[worker_autoscaler.WorkerAutoscaler]",
+    ) -> None:
+        """
+        Private constructor, use create() method.
+        """
+        assert class_private_create_key is WorkerSupervisor.__create_key, "Use create() method"
+
+        self.__states = [_ManagerState(manager) for manager in managers]
+        self.__local_logger = local_logger
+        self.__controller = controller
+        self.__backoff_initial = backoff_initial
+        self.__backoff_max = backoff_max
+        self.__crash_loop_limit = crash_loop_limit
+        self.__crash_loop_window = crash_loop_window
+        self.__autoscalers = autoscalers
+
+        # Statistics are read from main while the thread updates them
+        self.__lock = threading.Lock()
+        # Writing to the pipe wakes the thread up to stop
+        self.__stop_reader, self.__stop_writer = mp.Pipe(False)
+        self.__thread = threading.Thread(target=self.__run, name="WorkerSupervisor", daemon=True)
+
+    def start(self) -> None:
+        """
+        Starts supervising in a thread.
+        """
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops supervising, call before requesting workers to exit so they are not restarted.
+        """
+        if not self.__thread.is_alive():
+            return
+
+        self.__stop_writer.send(None)
+        self.__thread.join()
+
+    def get_statistics(self) -> "dict[str, RestartStatistics]":
+        """
+        Returns a snapshot of the restart statistics by worker target name.
+        """
+        with self.__lock:
+            return {
+                state.manager.get_target_name(): RestartStatistics(
+                    state.statistics.restart_count,
+                    state.statistics.downtime_total,
+                    state.statistics.downtime_max,
+                    state.statistics.is_crash_looping,
+                    state.statistics.hang_count,
+                )
+                for state in self.__states
+            }
+
+    def __notice_dead_workers(self, state: _ManagerState, now: float) -> None:
+        """
+        Schedules a restart with backoff, or gives up if the workers are crash looping.
+        """
+        if state.dead_since is not None or state.manager.get_dead_worker_count() == 0:
+            return
+
+        state.dead_since = now
+        state.restart_times = [
+            restart_time
+            for restart_time in state.restart_times
+            if now - restart_time < self.__crash_loop_window
+        ]
+        recent_restart_count = len(state.restart_times)
+        if recent_restart_count >= self.__crash_loop_limit:
+            self.__local_logger.error(
+                f"Workers of {state.manager.get_target_name()} are crash looping, "
+                f"{recent_restart_count} restarts in {self.__crash_loop_window} s, not restarting",
+                True,
+            )
+            with self.__lock:
+                state.statistics.is_crash_looping = True
+
+            return
+
+        backoff = min(self.__backoff_initial * 2**recent_restart_count, self.__backoff_max)
+        state.next_restart_time = now + backoff
+
+    def __restart_dead_workers(self, state: _ManagerState, now: float) -> None:
+        """
+        Restarts the dead workers of the manager.
+        """
+        restart_count = state.manager.get_dead_worker_count()
+        if not state.manager.check_and_restart_dead_workers():
+            # Try again after another backoff
+            state.dead_since = None
+            return
+
+        downtime = now - state.dead_since
+        state.dead_since = None
+        state.restart_times.append(now)
+        with self.__lock:
+            state.statistics.restart_count += restart_count
+            state.statistics.downtime_total += downtime
+            state.statistics.downtime_max = max(state.statistics.downtime_max, downtime)
+
+    def __run(self) -> None:
+        """
+        Supervisor thread.
+        """
+        is_watchdog = any(state.manager.get_liveness_timeout() > 0.0 for state in self.__states)
+        while True:
+            now = time.monotonic()
+            timeout = self.__WATCHDOG_PERIOD if is_watchdog else None
+            is_exiting = self.__controller is not None and self.__controller.is_exit_requested()
+
+            # Scaling adds and retires workers, so it is done before collecting the sentinels
+            for autoscaler in self.__autoscalers:
+                if is_exiting:
+                    break
+
+                remaining = autoscaler.update(now)
+                timeout = remaining if timeout is None else min(timeout, remaining)
+
+            sentinels = []
+            for state in self.__states:
+                # Killed hung workers are noticed as dead right away
+                hang_count = state.manager.check_hung_workers()
+                if hang_count > 0:
+                    with self.__lock:
+                        state.statistics.hang_count += hang_count
+
+                self.__notice_dead_workers(state, now)
+
+                is_pending = state.dead_since is not None and not state.statistics.is_crash_looping
+                if is_pending and not is_exiting:
+                    if state.next_restart_time <= now:
+                        self.__restart_dead_workers(state, now)
+                    else:
+                        remaining = state.next_restart_time - now
+                        timeout = remaining if timeout is None else min(timeout, remaining)
+
+                sentinels += state.manager.get_alive_sentinels()
+
+            # Workers that died before their sentinel was collected would never wake the wait
+            for state in self.__states:
+                if state.dead_since is None and state.manager.get_dead_worker_count() > 0:
+                    timeout = 0.0
+
+            ready = multiprocessing.connection.wait(sentinels + [self.__stop_reader], timeout)
+            if self.__stop_reader in ready:
+                return